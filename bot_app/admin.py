@@ -1,12 +1,14 @@
 
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 
 from .models import (
     BotClient, PassengerTravel, PassengerPost,
-    Driver, Car, DriverTransaction, City, Order, Passenger, DriverGallery, CityPrice, Route, Tariff, RouteCashback
+    Driver, Car, DriverTransaction, City, Order, Passenger, DriverGallery, CityPrice, Route, Tariff, RouteCashback,
+    GeocodeCache
 )
+from .tasks.city_tasks import backfill_city_coordinates
 
 admin.site.site_header = "Taxi Bot Admin"
 admin.site.site_title = "Taxi Bot Administration"
@@ -278,6 +280,23 @@ class CityAdmin(admin.ModelAdmin):
 
     get_subcategory.short_description = "Subkategoriya"
 
+    actions = ['geocode_selected']
+
+    def geocode_selected(self, request, queryset):
+        """Tanlangan shaharlar koordinatalarini nom bo'yicha fon rejimida qayta aniqlash"""
+        city_ids = list(queryset.values_list('id', flat=True))
+        try:
+            backfill_city_coordinates.delay(city_ids, overwrite=True)
+        except Exception as e:
+            self.message_user(request, f"Navbatga qo'yib bo'lmadi: {e}", level=messages.ERROR)
+            return
+        self.message_user(
+            request,
+            f"{len(city_ids)} ta shahar geocoding navbatiga qo'yildi (natija celery logida)."
+        )
+
+    geocode_selected.short_description = "Koordinatalarni nom bo'yicha aniqlash (Nominatim)"
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     # Ro'yxatda ko'rsatiladigan maydonlar
@@ -305,6 +324,9 @@ class OrderAdmin(admin.ModelAdmin):
     ]
     list_editable = ["status", "driver"]
 
+    # Journey lar ko'p - select o'rniga id
+    raw_id_fields = ['travel', 'post']
+
     # Readonly maydonlar
     readonly_fields = [
         'created_at',
@@ -432,4 +454,12 @@ class RouteAdmin(admin.ModelAdmin):
         extra = 1
 
     list_display = ('id', "from_city", "to_city", 'is_active')
-    inlines = [CityPriceAdmin, RouteCashbackInline]
\ No newline at end of file
+    inlines = [CityPriceAdmin, RouteCashbackInline]
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ('key', 'kind', 'hit_count', 'last_hit_at', 'expires_at', 'updated_at')
+    list_filter = ('kind',)
+    search_fields = ('key',)
+    readonly_fields = ('hit_count', 'last_hit_at', 'created_at', 'updated_at')
@@ -2,10 +2,13 @@
 import django_filters
 
 from .. import models
-from ..models import Order, TravelStatus, OrderType
+from ..models import City, Order, Tariff, TravelStatus, OrderType
 from django.utils import timezone
 from datetime import timedelta
 
+# content_type nomi -> Order dagi tiplangan FK
+JOURNEY_FIELDS = {'passengertravel': 'travel', 'passengerpost': 'post'}
+
 
 class OrderFilter(django_filters.FilterSet):
     # Asosiy filterlar
@@ -26,15 +29,17 @@ class OrderFilter(django_filters.FilterSet):
     # Content type filterlari
     content_type = django_filters.CharFilter(method='filter_content_type')
 
-    # travel class
+    # travel class (tarif id yoki nomi)
     travel_class = django_filters.CharFilter(method='filter_travel_class')
+    route = django_filters.NumberFilter(field_name='route_id', lookup_expr='exact')
+    tariff = django_filters.NumberFilter(field_name='tariff_id', lookup_expr='exact')
 
     # Driver mavjudligi filteri
     has_driver = django_filters.BooleanFilter(method='filter_has_driver')
 
-    # Narx filterlari (content_object orqali)
-    min_price = django_filters.NumberFilter(method='filter_min_price')
-    max_price = django_filters.NumberFilter(method='filter_max_price')
+    # Narx filterlari (Order.price - buyurtma paytidagi narx)
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
 
     # Status guruhlari
     status_in = django_filters.BaseInFilter(field_name='status', lookup_expr='in')
@@ -43,9 +48,9 @@ class OrderFilter(django_filters.FilterSet):
     # User va driver birgalikda
     user_and_driver = django_filters.CharFilter(method='filter_user_and_driver')
 
-    # locationlar bilan ishlash
-    from_city = django_filters.CharFilter(method='filter_from_city')
-    to_city = django_filters.CharFilter(method='filter_to_city')
+    # locationlar bilan ishlash (shahar id yoki nomi)
+    from_city = django_filters.CharFilter(method='filter_city')
+    to_city = django_filters.CharFilter(method='filter_city')
 
 
 
@@ -60,57 +65,11 @@ class OrderFilter(django_filters.FilterSet):
             'updated_at': ['gte', 'lte', 'exact'],
         }
 
-    def filter_from_city(self, queryset, name, value):
-        from django.db.models import Q
-        from django.contrib.contenttypes.models import ContentType
-        from ..models import PassengerTravel, PassengerPost
-
-        try:
-            # Get content types
-            travel_content_type = ContentType.objects.get_for_model(PassengerTravel)
-            post_content_type = ContentType.objects.get_for_model(PassengerPost)
-
-            # Get travel objects with matching from_location
-            travel_ids = PassengerTravel.objects.filter(
-                from_location__city__icontains=value
-            ).values_list('id', flat=True)
-
-            # Get post objects with matching from_location
-            post_ids = PassengerPost.objects.filter(
-                from_location__city__icontains=value
-            ).values_list('id', flat=True)
-
-            return queryset.filter(
-                Q(content_type=travel_content_type, object_id__in=travel_ids) |
-                Q(content_type=post_content_type, object_id__in=post_ids)
-            )
-        except Exception as e:
-            # Log the error if needed
-            return queryset.none()
-
-    def filter_to_city(self, queryset, name, value):
-        from django.db.models import Q
-        from django.contrib.contenttypes.models import ContentType
-        from ..models import PassengerTravel, PassengerPost
-
-        try:
-            travel_content_type = ContentType.objects.get_for_model(PassengerTravel)
-            post_content_type = ContentType.objects.get_for_model(PassengerPost)
-
-            travel_ids = PassengerTravel.objects.filter(
-                to_location__city__icontains=value
-            ).values_list('id', flat=True)
-
-            post_ids = PassengerPost.objects.filter(
-                to_location__city__icontains=value
-            ).values_list('id', flat=True)
-
-            return queryset.filter(
-                Q(content_type=travel_content_type, object_id__in=travel_ids) |
-                Q(content_type=post_content_type, object_id__in=post_ids)
-            )
-        except Exception:
-            return queryset.none()
+    def filter_city(self, queryset, name, value):
+        """from_city / to_city: indekslangan ustun bo'yicha, nom berilsa mos shaharlar subquery si"""
+        if value.isdigit():
+            return queryset.filter(**{f'{name}_id': int(value)})
+        return queryset.filter(**{f'{name}__in': City.objects.filter(title__icontains=value).values('pk')})
 
     def filter_created_today(self, queryset, name, value):
         if value:
@@ -133,12 +92,10 @@ class OrderFilter(django_filters.FilterSet):
 
     def filter_content_type(self, queryset, name, value):
         if value:
-            from django.contrib.contenttypes.models import ContentType
-            try:
-                content_type = ContentType.objects.get(model=value.lower())
-                return queryset.filter(content_type=content_type)
-            except ContentType.DoesNotExist:
+            field = JOURNEY_FIELDS.get(value.lower())
+            if field is None:
                 return queryset.none()
+            return queryset.filter(**{f'{field}__isnull': False})
         return queryset
 
     def filter_has_driver(self, queryset, name, value):
@@ -148,59 +105,6 @@ class OrderFilter(django_filters.FilterSet):
             return queryset.filter(driver__isnull=True)
         return queryset
 
-    def filter_min_price(self, queryset, name, value):
-        if value is not None:
-            from django.db.models import Q
-            from django.contrib.contenttypes.models import ContentType
-
-            # Import your related models
-            from ..models import PassengerTravel, PassengerPost
-
-            # Get content types for the models
-            travel_content_type = ContentType.objects.get_for_model(PassengerTravel)
-            post_content_type = ContentType.objects.get_for_model(PassengerPost)
-
-            # Get all travel objects with price >= value
-            travel_ids = PassengerTravel.objects.filter(
-                price__gte=value
-            ).values_list('id', flat=True)
-
-            # Get all post objects with price >= value
-            post_ids = PassengerPost.objects.filter(
-                price__gte=value
-            ).values_list('id', flat=True)
-
-            # Filter orders that reference these objects
-            return queryset.filter(
-                Q(content_type=travel_content_type, object_id__in=travel_ids) |
-                Q(content_type=post_content_type, object_id__in=post_ids)
-            )
-        return queryset
-
-    def filter_max_price(self, queryset, name, value):
-        if value is not None:
-            from django.db.models import Q
-            from django.contrib.contenttypes.models import ContentType
-
-            from ..models import PassengerTravel, PassengerPost
-
-            travel_content_type = ContentType.objects.get_for_model(PassengerTravel)
-            post_content_type = ContentType.objects.get_for_model(PassengerPost)
-
-            travel_ids = PassengerTravel.objects.filter(
-                price__lte=value
-            ).values_list('id', flat=True)
-
-            post_ids = PassengerPost.objects.filter(
-                price__lte=value
-            ).values_list('id', flat=True)
-
-            return queryset.filter(
-                Q(content_type=travel_content_type, object_id__in=travel_ids) |
-                Q(content_type=post_content_type, object_id__in=post_ids)
-            )
-        return queryset
-
     def filter_user_and_driver(self, queryset, name, value):
         if value:
             try:
@@ -211,32 +115,9 @@ class OrderFilter(django_filters.FilterSet):
         return queryset
 
     def filter_travel_class(self, queryset, name, value):
-        from django.db.models import Q
-        from django.contrib.contenttypes.models import ContentType
-        from ..models import PassengerTravel, PassengerPost
-
-        if value:
-            try:
-                travel_content_type = ContentType.objects.get_for_model(PassengerTravel)
-                post_content_type = ContentType.objects.get_for_model(PassengerPost)
-
-                # Get travel objects with matching travel_class
-                travel_ids = PassengerTravel.objects.filter(
-                    travel_class=value
-                ).values_list('id', flat=True)
-
-                posts_ids = PassengerPost.objects.all().values_list('id', flat=True)
-
-                # Return orders that reference these travel objects
-                return queryset.filter(
-                    Q(content_type=travel_content_type,
-                    object_id__in=travel_ids) |
-                    Q(content_type=post_content_type,
-                      object_id__in=posts_ids)
-                )
-            except (ValueError, TypeError):
-                return queryset.none()
-        return queryset
+        if value.isdigit():
+            return queryset.filter(tariff_id=int(value))
+        return queryset.filter(tariff__in=Tariff.objects.filter(title__iexact=value).values('pk'))
 
 class OrderSearchFilter(django_filters.FilterSet):
     """Qidiruv uchun alohida filter"""
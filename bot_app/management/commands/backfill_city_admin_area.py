@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from bot_app.models import City
+from bot_app.tasks.city_tasks import refresh_city_admin_area
+from bot_app.utils.location_settings import location_setting
+
+
+class Command(BaseCommand):
+    help = 'Compute City.admin_area (shahar_tuman/viloyat of the city centre) for cities missing it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute for all cities, not only missing ones')
+        parser.add_argument('--batch-size', type=int, default=location_setting('ADMIN_AREA_BATCH_SIZE'))
+        parser.add_argument('--async', action='store_true', dest='use_celery', help='Enqueue celery tasks instead')
+
+    def handle(self, *args, **options):
+        cities = City.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        if not options['all']:
+            cities = cities.filter(admin_area__isnull=True)
+
+        city_ids = list(cities.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        updated = 0
+
+        for offset in range(0, len(city_ids), batch_size):
+            batch = city_ids[offset:offset + batch_size]
+            if options['use_celery']:
+                refresh_city_admin_area.delay(batch)
+                continue
+            updated += refresh_city_admin_area(batch)
+            self.stdout.write(f"{min(offset + batch_size, len(city_ids))}/{len(city_ids)}")
+
+        if options['use_celery']:
+            self.stdout.write(self.style.SUCCESS(f'{len(city_ids)} cities enqueued'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{updated}/{len(city_ids)} cities updated'))
@@ -0,0 +1,48 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from bot_app.utils.geo_utils import haversine_km, haversine_many, haversine_matrix
+
+
+class Command(BaseCommand):
+    help = 'Compare scalar and vectorized (numpy) haversine distance computation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10_000, 1_000_000])
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        origin = (41.3111, 69.2797)  # Toshkent
+
+        self.stdout.write(f"{'points':>10} {'scalar, ms':>12} {'numpy, ms':>12} {'speedup':>9}")
+        for size in options['sizes']:
+            lats = [rnd.uniform(37.0, 46.0) for _ in range(size)]
+            lons = [rnd.uniform(56.0, 73.0) for _ in range(size)]
+
+            scalar_ms = self._best_of(options['repeat'], lambda: [
+                haversine_km(origin[0], origin[1], lat, lon) for lat, lon in zip(lats, lons)
+            ])
+            vector_ms = self._best_of(options['repeat'], lambda: haversine_many(origin[0], origin[1], lats, lons))
+
+            self.stdout.write(
+                f"{size:>10} {scalar_ms:>12.3f} {vector_ms:>12.3f} {scalar_ms / vector_ms:>8.1f}x"
+            )
+
+        # M x N: 100 ta nuqtadan barcha 10k nuqtagacha
+        lats = [rnd.uniform(37.0, 46.0) for _ in range(10_000)]
+        lons = [rnd.uniform(56.0, 73.0) for _ in range(10_000)]
+        matrix_ms = self._best_of(options['repeat'], lambda: haversine_matrix(lats[:100], lons[:100], lats, lons))
+        self.stdout.write(f"matrix 100 x 10000: {matrix_ms:.3f} ms")
+
+    @staticmethod
+    def _best_of(repeat, func) -> float:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best * 1000
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import random
+import subprocess
+import time
+from collections import Counter
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from bot_app.models import City
+from bot_app.services.city_locator import CityLocator
+from bot_app.services.geocode_cache import GeocodeCacheService
+from bot_app.services.location_response_cache import LocationResponseCache
+from bot_app.utils.fake_nominatim import FakeNominatim
+from bot_app.utils.nominatim_utils import breaker as nominatim_breaker
+from bot_app.views.city_views import CityViewSet
+
+# endpoint -> (CityViewSet action, URL)
+ENDPOINTS = {
+    'check-location': ('check_location', '/api/v1/cities/check-location/'),
+    'validate-city-location': ('validate_city_location', '/api/v1/cities/validate-city-location/'),
+    'nearby-cities': ('nearby_cities', '/api/v1/cities/nearby-cities/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark check-location / validate-city-location / nearby-cities in-process against a local '
+        'fake Nominatim. Each scenario starts with empty caches and its DB writes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+        parser.add_argument('--repeat-ratio', type=float, default=0.5,
+                            help='Share of requests reusing an earlier point (cache hits)')
+        parser.add_argument('--spread-km', type=float, default=5.0, help='Std deviation of points around cities')
+        parser.add_argument('--latency', type=float, default=150, help='Fake Nominatim latency, ms')
+        parser.add_argument('--jitter', type=float, default=50, help='Extra random latency, ms')
+        parser.add_argument('--error-rate', type=float, default=0.0)
+        parser.add_argument('--timeout-rate', type=float, default=0.0)
+        parser.add_argument('--client-timeout', type=float, default=2.0, help='NOMINATIM_TIMEOUT, seconds')
+        parser.add_argument('--rate-limit', type=float, default=1000.0,
+                            help='NOMINATIM_RATE_LIMIT (the real Nominatim policy is 1 req/s)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write results as JSON (compare across commits with --compare)')
+        parser.add_argument('--compare', help='Baseline JSON from an earlier --output run')
+
+    def handle(self, *args, **options):
+        cities = list(City.objects.filter(is_allowed=True, latitude__isnull=False, longitude__isnull=False))
+        if not cities:
+            raise CommandError('No allowed cities with coordinates in the database')
+
+        fake = FakeNominatim.from_cities(
+            cities,
+            latency_ms=options['latency'],
+            jitter_ms=options['jitter'],
+            error_rate=options['error_rate'],
+            timeout_rate=options['timeout_rate'],
+            seed=options['seed'],
+        )
+        url = fake.start()
+        self.stdout.write(f"Fake Nominatim at {url}, {len(cities)} cities")
+
+        location_service = {
+            **getattr(settings, 'LOCATION_SERVICE', {}),
+            'NOMINATIM_URL': url,
+            'NOMINATIM_TIMEOUT': options['client_timeout'],
+            'NOMINATIM_RATE_LIMIT': options['rate_limit'],
+            'NOMINATIM_RATE_BURST': max(int(options['rate_limit']), 1),
+        }
+        results = []
+        if options['verbosity'] < 2:
+            # So'rovlar bo'yicha debug/info loglar o'lchovga ta'sir qilmasin
+            logging.disable(logging.INFO)
+        try:
+            with override_settings(LOCATION_SERVICE=location_service):
+                for endpoint in options['endpoints']:
+                    payloads = self._payloads(endpoint, cities, options)
+                    for concurrency in options['concurrency']:
+                        result = self._scenario(endpoint, payloads, concurrency, fake)
+                        results.append(result)
+                        self._print_result(result)
+        finally:
+            fake.stop()
+            logging.disable(logging.NOTSET)
+
+        report = {'meta': self._meta(options, len(cities)), 'results': results}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                self._print_comparison(json.load(f), report)
+
+    @staticmethod
+    def _payloads(endpoint, cities, options):
+        """Endpoint uchun deterministik so'rovlar (seed bo'yicha): shaharlar atrofidagi nuqtalar"""
+        rnd = random.Random(f"{options['seed']}:{endpoint}")
+        spread_deg = options['spread_km'] / 111.0
+        payloads = []
+        for _ in range(options['requests']):
+            if payloads and rnd.random() < options['repeat_ratio']:
+                payloads.append(rnd.choice(payloads))
+                continue
+            city = rnd.choice(cities)
+            payload = {
+                'latitude': round(city.latitude + rnd.gauss(0, spread_deg), 6),
+                'longitude': round(city.longitude + rnd.gauss(0, spread_deg), 6),
+            }
+            if endpoint == 'validate-city-location':
+                payload['city_name'] = city.title
+            else:
+                payload['max_distance_km'] = 20.0
+            payloads.append(payload)
+        return payloads
+
+    def _scenario(self, endpoint, payloads, concurrency, fake):
+        action, path = ENDPOINTS[endpoint]
+        view = CityViewSet.as_view({'post': action})
+        factory = APIRequestFactory()
+        user = get_user_model()(username='bench')
+
+        # Har bir scenario bo'sh cache bilan; DB geocode cache yozuvlari rollback qilinadi
+        cache.clear()
+        CityLocator.invalidate()
+        nominatim_breaker.reset()
+        GeocodeCacheService.stats.clear()
+        LocationResponseCache.stats.clear()
+        fake.reset_counts()
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies, statuses = [], Counter()
+
+            async def call(payload):
+                async with semaphore:
+                    request = factory.post(path, payload, format='json')
+                    force_authenticate(request, user=user)
+                    started = time.perf_counter()
+                    response = await view(request)
+                    response.render()
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*[call(payload) for payload in payloads])
+            return latencies, statuses, time.perf_counter() - started
+
+        with transaction.atomic():
+            latencies, statuses, wall = async_to_sync(run)()
+            transaction.set_rollback(True)
+
+        latencies_ms = np.array(latencies) * 1000
+        geocode = GeocodeCacheService.stats
+        geocode_lookups = geocode['local'] + geocode['db'] + geocode['fetch']
+        responses = LocationResponseCache.stats
+        response_lookups = responses['hit'] + responses['miss']
+        return {
+            'endpoint': endpoint,
+            'concurrency': concurrency,
+            'requests': len(payloads),
+            'errors': sum(count for code, count in statuses.items() if code >= 400),
+            'rps': round(len(payloads) / wall, 1),
+            'p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+            'p95_ms': round(float(np.percentile(latencies_ms, 95)), 2),
+            'p99_ms': round(float(np.percentile(latencies_ms, 99)), 2),
+            'nominatim_calls': fake.counts['reverse'] + fake.counts['search'],
+            'nominatim_errors': fake.counts['errors'] + fake.counts['timeouts'],
+            'geocode_hit_ratio': round((geocode['local'] + geocode['db']) / geocode_lookups, 3)
+            if geocode_lookups else None,
+            'response_hit_ratio': round(responses['hit'] / response_lookups, 3) if response_lookups else None,
+        }
+
+    def _print_result(self, result):
+        self.stdout.write(
+            f"{result['endpoint']:<24} c={result['concurrency']:<3} "
+            f"p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms p99={result['p99_ms']:>8.2f}ms "
+            f"rps={result['rps']:>7.1f} errors={result['errors']} "
+            f"nominatim={result['nominatim_calls']} (failed {result['nominatim_errors']}) "
+            f"geocode_hits={result['geocode_hit_ratio']} response_hits={result['response_hit_ratio']}"
+        )
+
+    def _print_comparison(self, baseline, report):
+        base = {(r['endpoint'], r['concurrency']): r for r in baseline['results']}
+        self.stdout.write(f"\nvs {baseline['meta'].get('commit') or 'baseline'}:")
+        for result in report['results']:
+            old = base.get((result['endpoint'], result['concurrency']))
+            if old is None:
+                continue
+            changes = " ".join(
+                f"{metric}={self._delta(old[metric], result[metric])}"
+                for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'rps', 'nominatim_calls')
+            )
+            self.stdout.write(f"{result['endpoint']:<24} c={result['concurrency']:<3} {changes}")
+
+    @staticmethod
+    def _delta(old, new) -> str:
+        if not old:
+            return f"{old}->{new}"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    @staticmethod
+    def _meta(options, cities):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        keys = ('requests', 'repeat_ratio', 'spread_km', 'latency', 'jitter', 'error_rate', 'timeout_rate',
+                'client_timeout', 'rate_limit', 'seed')
+        return {
+            'commit': commit,
+            'created_at': timezone.now().isoformat(),
+            'cities': cities,
+            'options': {key: options[key] for key in keys},
+        }
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from bot_app.models import City
+from bot_app.services.city_geocoder import CityGeocoder
+from bot_app.tasks.city_tasks import backfill_city_coordinates, refresh_city_admin_area_in_batches
+
+
+class Command(BaseCommand):
+    help = 'Geocode City latitude/longitude by title (cities missing coordinates by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-geocode all cities, not only missing ones')
+        parser.add_argument('--ids', type=int, nargs='+', help='Only these city ids')
+        parser.add_argument('--async', action='store_true', dest='use_celery', help='Enqueue a celery task instead')
+
+    def handle(self, *args, **options):
+        cities = City.objects.order_by('id')
+        if options['ids']:
+            cities = cities.filter(id__in=options['ids'])
+        if not options['all']:
+            cities = cities.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True))
+
+        if options['use_celery']:
+            city_ids = list(cities.values_list('id', flat=True))
+            backfill_city_coordinates.delay(city_ids, overwrite=options['all'])
+            self.stdout.write(self.style.SUCCESS(f'{len(city_ids)} cities enqueued'))
+            return
+
+        def progress(done, total, title, coords):
+            status = f"{coords[0]:.5f}, {coords[1]:.5f}" if coords else self.style.ERROR("not found")
+            self.stdout.write(f"{done}/{total} {title}: {status}")
+
+        result = CityGeocoder.geocode(list(cities), progress=progress, refresh=options['all'])
+        refresh_city_admin_area_in_batches(result['updated'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(result['updated'])} updated, {result['unchanged']} unchanged, "
+            f"{len(result['failed'])} failed of {result['total']} cities"
+        ))
+        if result['failed']:
+            self.stdout.write(self.style.WARNING(f"Not found: {', '.join(result['failed'])}"))
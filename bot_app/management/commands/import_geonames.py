@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bot_app.services.city_importer import DEFAULT_FEATURE_CODES, CityImporter
+
+
+class Command(BaseCommand):
+    help = 'Import cities and districts from a local GeoNames dump (e.g. UZ.zip), no network access'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='GeoNames dump (.txt or .zip)')
+        parser.add_argument('--alternate-names', help='alternateNamesV2 file (.txt or .zip) for translate names')
+        parser.add_argument('--languages', default='uz,ru,en',
+                            help='translate languages, the first one is used as the title of new cities')
+        parser.add_argument('--features', default=','.join(DEFAULT_FEATURE_CODES), help='GeoNames feature codes')
+        parser.add_argument('--min-population', type=int, default=0, help='Skip smaller populated places')
+        parser.add_argument('--allow', action='store_true', help='Mark new cities as is_allowed')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(stats):
+            self.stdout.write(f"{stats['processed']} processed")
+
+        importer = CityImporter(
+            options['path'],
+            feature_codes=[code for code in options['features'].split(',') if code],
+            min_population=options['min_population'],
+            alternate_names=options['alternate_names'],
+            languages=[language for language in options['languages'].split(',') if language],
+            allow_new=options['allow'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        stats = importer.run()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['processed']} places in {time.monotonic() - started:.1f}s: {stats['created']} created, "
+            f"{stats['updated']} updated, {stats['unchanged']} unchanged ({stats['linked']} linked by name)"
+        ))
+        self.stdout.write('Run backfill_city_admin_area to compute admin areas of new/moved cities.')
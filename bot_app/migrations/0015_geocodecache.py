@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot_app', '0014_alter_driver_last_online_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('kind', models.CharField(choices=[('forward', 'Nom -> koordinata'), ('reverse', 'Koordinata -> joy')], max_length=10)),
+                ('query', models.JSONField(default=dict)),
+                ('payload', models.JSONField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Geocoding cache',
+                'verbose_name_plural': 'Geocoding cache',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot_app', '0015_geocodecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='admin_area',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='admin_area_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
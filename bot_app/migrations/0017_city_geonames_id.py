@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot_app', '0016_city_admin_area'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='geonames_id',
+            field=models.PositiveIntegerField(blank=True, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot_app', '0017_city_geonames_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='from_city',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders_from', to='bot_app.city'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='price',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='route',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='bot_app.route'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='tariff',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='bot_app.tariff'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='to_city',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders_to', to='bot_app.city'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+JOURNEY_MODELS = ('passengertravel', 'passengerpost')
+
+
+def backfill_order_journey_fields(apps, schema_editor):
+    """Mavjud orderlar uchun route/tariff/from_city/to_city/price - har bir tur uchun set-based UPDATE lar"""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Order = apps.get_model('bot_app', 'Order')
+    Route = apps.get_model('bot_app', 'Route')
+    CityPrice = apps.get_model('bot_app', 'CityPrice')
+
+    for content_type in ContentType.objects.filter(app_label='bot_app', model__in=JOURNEY_MODELS):
+        Journey = apps.get_model('bot_app', content_type.model)
+        journey = Journey.objects.filter(pk=OuterRef('object_id'))
+        Order.objects.filter(content_type=content_type, route__isnull=True, tariff__isnull=True).update(
+            route_id=Subquery(journey.values('route_id')[:1]),
+            tariff_id=Subquery(journey.values('tariff_id')[:1]),
+        )
+
+    # Ikkinchi bosqich yangi route/tariff qiymatlariga tayanadi
+    route = Route.objects.filter(pk=OuterRef('route_id'))
+    Order.objects.filter(route__isnull=False, from_city__isnull=True, to_city__isnull=True).update(
+        from_city_id=Subquery(route.values('from_city_id')[:1]),
+        to_city_id=Subquery(route.values('to_city_id')[:1]),
+    )
+    Order.objects.filter(price__isnull=True, route__isnull=False, tariff__isnull=False).update(
+        price=Subquery(
+            CityPrice.objects.filter(route_id=OuterRef('route_id'), tariff_id=OuterRef('tariff_id'))
+            .order_by('pk').values('price')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot_app', '0018_order_journey_fields'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_journey_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot_app', '0019_backfill_order_journey_fields'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='bot_app.passengerpost'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='travel',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='bot_app.passengertravel'),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.CheckConstraint(condition=models.Q(('travel__isnull', True), ('post__isnull', True), _connector='OR'), name='order_single_journey', violation_error_message="Buyurtma bir vaqtda sayohat va pochtaga bog'lana olmaydi"),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db.models import F
+
+# content_type.model -> Order dagi tiplangan FK
+JOURNEY_FIELDS = {'passengertravel': 'travel', 'passengerpost': 'post'}
+
+
+def backfill_order_journey_fks(apps, schema_editor):
+    """content_type/object_id -> travel/post (har bir tur uchun bitta UPDATE, o'chirilgan journey lar o'tkaziladi)"""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Order = apps.get_model('bot_app', 'Order')
+
+    for content_type in ContentType.objects.filter(app_label='bot_app', model__in=JOURNEY_FIELDS):
+        Journey = apps.get_model('bot_app', content_type.model)
+        field = JOURNEY_FIELDS[content_type.model]
+        Order.objects.filter(
+            content_type=content_type,
+            object_id__in=Journey.objects.values('pk'),
+            **{f'{field}__isnull': True},
+        ).update(**{f'{field}_id': F('object_id')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot_app', '0020_order_journey_fks'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_journey_fks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot_app', '0021_backfill_order_journey_fks'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['-created_at', '-id'], name='driver_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drivertransaction',
+            index=models.Index(fields=['-created_at', '-id'], name='transaction_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passengertravel',
+            index=models.Index(fields=['-created_at', '-id'], name='travel_created_id_idx'),
+        ),
+    ]
@@ -91,6 +91,17 @@ class Journey(models.Model):
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Order ga nusxalangan qiymatlar - OrderJourney.sync faqat ular o'zgarganda UPDATE qiladi
+        if "route_id" in field_names and "tariff_id" in field_names:
+            instance._order_state = instance.order_state()
+        return instance
+
+    def order_state(self):
+        return self.route_id, self.tariff_id
+
 class PassengerTravel(Journey):
     passenger = models.IntegerField(default=1)
     has_woman = models.BooleanField(default=False)
@@ -102,6 +113,10 @@ class PassengerTravel(Journey):
         ordering = ['-created_at']
         verbose_name_plural = "Sayohatlar"
         verbose_name = "Sayohat"
+        indexes = [
+            # CreatedAtCursorPagination
+            models.Index(fields=['-created_at', '-id'], name='travel_created_id_idx'),
+        ]
 
 class PassengerPost(Journey):
 
@@ -161,6 +176,10 @@ class Driver(models.Model):
         ordering = ['-created_at']
         verbose_name_plural = "Haydovchilar"
         verbose_name = "Haydovchi"
+        indexes = [
+            # CreatedAtCursorPagination
+            models.Index(fields=['-created_at', '-id'], name='driver_created_id_idx'),
+        ]
 
 class DriverGallery(models.Model):
     telegram_id = models.OneToOneField(Driver, on_delete=models.CASCADE)
@@ -194,6 +213,10 @@ class DriverTransaction(models.Model):
         ordering = ['-created_at']
         verbose_name_plural = "Haydovchi pul o'tkazmalari"
         verbose_name = "Haydovchi pul o'tkazmasi"
+        indexes = [
+            # CreatedAtCursorPagination
+            models.Index(fields=['-created_at', '-id'], name='transaction_created_id_idx'),
+        ]
 
 class City(models.Model):
     title = models.CharField(max_length=200)
@@ -202,17 +225,71 @@ class City(models.Model):
     longitude = models.FloatField(null=True, blank=True)
     translate = models.JSONField(null=True, blank=True)
     is_allowed = models.BooleanField(default=True)
+    # Markaz koordinatasining ma'muriy hududi (mahalla/shahar_tuman/viloyat), celery task hisoblaydi
+    admin_area = models.JSONField(null=True, blank=True)
+    admin_area_updated_at = models.DateTimeField(null=True, blank=True)
+    # GeoNames import qilingan shaharlar uchun (import_geonames qayta ishga tushganda yangilanadi)
+    geonames_id = models.PositiveIntegerField(null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # admin_area shu maydonlardan hisoblanadi (city_signals)
+    ADMIN_AREA_SOURCE_FIELDS = ("title", "latitude", "longitude")
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # pre_save da qayta SELECT qilmasdan taqqoslash uchun
+        if all(field in field_names for field in cls.ADMIN_AREA_SOURCE_FIELDS):
+            instance._admin_area_source = instance.admin_area_source()
+        return instance
+
+    def admin_area_source(self):
+        return tuple(getattr(self, field) for field in self.ADMIN_AREA_SOURCE_FIELDS)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if not set(self.ADMIN_AREA_SOURCE_FIELDS) & self.get_deferred_fields():
+            self._admin_area_source = self.admin_area_source()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Shaharlar"
         verbose_name = "Shahar"
 
+
+class GeocodeCache(models.Model):
+    """Nominatim natijalari uchun doimiy cache (deploy dan keyin ham saqlanadi)"""
+
+    class Kind(models.TextChoices):
+        FORWARD = "forward", "Nom -> koordinata"
+        REVERSE = "reverse", "Koordinata -> joy"
+
+    key = models.CharField(max_length=255, unique=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    # Yangilash uchun so'rov parametrlari (masalan, {"lat": ..., "lon": ...})
+    query = models.JSONField(default=dict)
+    payload = models.JSONField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    hit_count = models.PositiveIntegerField(default=0)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= timezone.now()
+
+    class Meta:
+        verbose_name_plural = "Geocoding cache"
+        verbose_name = "Geocoding cache"
+
 class Language(BaseModel):
     uz: str = ""
     en: str = ""
@@ -306,6 +383,23 @@ class Order(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
     object_id = models.PositiveIntegerField(null=True, blank=True)
     content_object = GenericForeignKey('content_type', 'object_id')
+    # content_object ning tiplangan nusxasi - select_related bilan bitta JOIN da olinadi
+    travel = models.ForeignKey(
+        'PassengerTravel', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders'
+    )
+    post = models.ForeignKey(
+        'PassengerPost', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders'
+    )
+    # content_object dan nusxa (filterlar uchun indekslangan), OrderJourney.fields()
+    route = models.ForeignKey('Route', on_delete=models.SET_NULL, null=True, blank=True)
+    tariff = models.ForeignKey('Tariff', on_delete=models.SET_NULL, null=True, blank=True)
+    from_city = models.ForeignKey(
+        'City', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders_from'
+    )
+    to_city = models.ForeignKey(
+        'City', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders_to'
+    )
+    price = models.IntegerField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -313,12 +407,33 @@ class Order(models.Model):
         ordering = ['-created_at']
         verbose_name_plural = "Buyurtmalar"
         verbose_name = "Buyurtma"
+        indexes = [
+            # CreatedAtCursorPagination
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+        ]
+        constraints = [
+            # Order faqat bitta journey ga (sayohat yoki pochta) bog'lanadi
+            models.CheckConstraint(
+                condition=models.Q(travel__isnull=True) | models.Q(post__isnull=True),
+                name='order_single_journey',
+                violation_error_message="Buyurtma bir vaqtda sayohat va pochtaga bog'lana olmaydi",
+            ),
+        ]
 
     def __str__(self):
-        if self.content_object:
+        if self.journey:
             return f"{self.content_type} -> {self.object_id}"
         return f"Order #{self.pk} - User: {self.user}"
 
+    @property
+    def journey(self):
+        """Bog'langan PassengerTravel yoki PassengerPost (content_object o'rniga)"""
+        if self.travel_id is not None:
+            return self.travel
+        if self.post_id is not None:
+            return self.post
+        return None
+
     def clean(self):
         super().clean()
         if self.driver and self.pk:
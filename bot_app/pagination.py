@@ -1,13 +1,157 @@
 # pagination.py
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+
+def approximate_count(queryset) -> int:
+    """PostgreSQL da planner bahosi (EXPLAIN), boshqa bazalarda oddiy COUNT"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CreatedAtCursorPagination(BasePagination):
+    """
+    (created_at, id) bo'yicha keyset pagination - COUNT(*) va OFFSET siz, chuqur sahifalar ham
+    birinchisi kabi (Meta.indexes dagi (-created_at, -id) indeksi bo'yicha).
+
+    Faqat ?cursor= (birinchi sahifa uchun bo'sh) yuborilganda ishlaydi, aks holda (va ?ordering= bilan)
+    javob avvalgidek PageNumberPagination: {count, next, previous, results} - mavjud mijozlar uchun.
+    Cursor - oxirgi/birinchi qator kaliti (base64), yangi qatorlar qo'shilsa ham sahifalar siljimaydi.
+    ?with_count=1 taxminiy umumiy sonni qo'shadi.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.legacy = None
+        if self.cursor_query_param not in request.query_params or request.query_params.get(api_settings.ORDERING_PARAM):
+            self.legacy = PageNumberPagination()
+            return self.legacy.paginate_queryset(queryset, request, view)
+
+        # Taxminiy son faqat so'ralgan sahifada, keyingi/oldingi havolalarda qayta hisoblanmaydi
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.count_query_param)
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true', 'True'):
+            self.count = approximate_count(queryset)
+
+        reverse = False
+        if cursor is None:
+            queryset = queryset.order_by('-created_at', '-pk')
+        else:
+            created_at, pk, reverse = cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+                ).order_by('created_at', 'pk')
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                ).order_by('-created_at', '-pk')
+
+        page = list(queryset[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if reverse:
+            page.reverse()
+
+        # Orqaga yurilganda oldingi sahifalar borligi has_more dan, keyingisi esa aniq bor
+        self.has_next = bool(page) and (reverse or has_more)
+        self.has_previous = bool(page) and cursor is not None and (has_more if reverse else True)
+        self.page = page
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk, reverse = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            return datetime.fromisoformat(created_at), int(pk), bool(reverse)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse: bool) -> str:
+        value = json.dumps([instance.created_at.isoformat(), instance.pk, reverse])
+        cursor = urlsafe_b64encode(value.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+
+        response = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            response['approximate_count'] = self.count
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                # ?cursor= siz (sahifa raqamli javob)
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'approximate_count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
 # settings.py ga qo'shing
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'yourapp.pagination.StandardResultsSetPagination',
     'PAGE_SIZE': 20,
-}
\ No newline at end of file
+}
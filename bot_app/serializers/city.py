@@ -1,6 +1,7 @@
 # serializers.py
 from rest_framework import serializers
 from ..models import City
+from ..utils.location_settings import location_setting
 
 
 class CitySerializer(serializers.ModelSerializer):
@@ -20,6 +21,16 @@ class LocationCheckSerializer(serializers.Serializer):
     max_distance_km = serializers.FloatField(default=20.0, min_value=1, max_value=200)
 
 
+class LocationCheckBatchSerializer(serializers.Serializer):
+    locations = LocationCheckSerializer(many=True, allow_empty=False)
+
+    def validate_locations(self, value):
+        max_size = location_setting("LOCATION_BATCH_MAX_SIZE")
+        if len(value) > max_size:
+            raise serializers.ValidationError(f"Bitta so'rovda ko'pi bilan {max_size} ta lokatsiya")
+        return value
+
+
 class LocationCheckResponseSerializer(serializers.Serializer):
     is_in_city = serializers.BooleanField()
     city = serializers.DictField(required=False)  # ✅ shunday qiling
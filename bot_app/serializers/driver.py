@@ -142,7 +142,8 @@ class DriverSerializer(serializers.ModelSerializer):
     def get_full_profile_image_url(self, obj):
         """Driverning profile rasmini to'liq URL sifatida olish"""
         try:
-            gallery = DriverGallery.objects.get(telegram_id=obj)
+            # select_related/prefetch qilingan bo'lsa qo'shimcha so'rovsiz
+            gallery = obj.drivergallery
             if gallery.profile_image:
                 request = self.context.get('request')
                 if request:
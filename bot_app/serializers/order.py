@@ -1,10 +1,10 @@
 # serializers.py
 import logging
 
+from django.db import models
 from django.db.models import Q
 import json
 from rest_framework import serializers
-from django.contrib.contenttypes.models import ContentType
 from django.core.serializers.json import DjangoJSONEncoder
 
 from .driver import DriverSerializer
@@ -12,6 +12,9 @@ from .passenger import PassengerSerializer
 from .bot_client import BotClientSerializer
 from .route import RouteSerializer
 from .tariff_serializer import TariffSerializer
+from ..services.order_batch import OrderBatch
+from ..services.order_journey import OrderJourney
+from ..services.reference_data import ReferenceData
 from ..models import Order, OrderType, Driver, BotClient, Passenger, CityPrice, Tariff, PassengerTravel, PassengerPost, \
     PassengerReject, PassengerToDriverReview, Route
 
@@ -21,17 +24,14 @@ class ContentObjectSerializer(serializers.Serializer):
     """Generic content object serializer"""
 
     def to_representation(self, instance):
-        route_id = instance.route.id if getattr(instance, "route", None) else None
-        tariff_id = instance.tariff.id if getattr(instance, "tariff", None) else None
+        route_id = instance.route_id
+        tariff_id = instance.tariff_id
 
-        price = CityPrice.objects.filter(Q(tariff=tariff_id) & Q(route=route_id)).first()
-        if price:
-            price = price.price
-        else:
-            price = None
+        reference = ReferenceData.get_snapshot()
+        price = reference.price(route_id, tariff_id)
 
         if tariff_id:
-            tariff = TariffSerializer(Tariff.objects.filter(id=tariff_id).first(), many=False).data
+            tariff = TariffSerializer(reference.tariffs.get(tariff_id) or instance.tariff).data
         else:
             tariff = None
 
@@ -73,21 +73,14 @@ class ContentObject2Serializer(serializers.Serializer):
         """Generic content object serializer"""
 
         def to_representation(self, instance):
-            route_id = instance.route.id if getattr(instance, "route", None) else None
-            tariff_id = instance.tariff.id if getattr(instance, "tariff", None) else None
-            price = CityPrice.objects.filter(Q(tariff=tariff_id) & Q(route=route_id)).first()
-
-            logger.warning(price)
-
-
-            if price:
-                price = price.price
-            else:
-                price = None
+            route_id = instance.route_id
+            tariff_id = instance.tariff_id
 
+            reference = ReferenceData.get_snapshot()
+            price = reference.price(route_id, tariff_id)
 
             if route_id:
-                route = RouteSerializer(Route.objects.filter(id=route_id).first()).data
+                route = RouteSerializer(reference.routes.get(route_id) or instance.route).data
             else:
                 route = {}
 
@@ -116,7 +109,7 @@ class ContentObject2Serializer(serializers.Serializer):
 
 
 class DriverOrderSerializer(serializers.ModelSerializer):
-    content_object = ContentObject2Serializer(read_only=True)
+    content_object = ContentObject2Serializer(source='journey', read_only=True)
     creator = serializers.SerializerMethodField()
     driver_details = serializers.SerializerMethodField()
 
@@ -146,7 +139,7 @@ class DriverOrderSerializer(serializers.ModelSerializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    content_object = ContentObjectSerializer(read_only=True)
+    content_object = ContentObjectSerializer(source='journey', read_only=True)
     driver_details = DriverSerializer(source='driver', read_only=True)
     content_type_name = serializers.CharField(source='content_type.model', read_only=True)
     creator = serializers.SerializerMethodField()
@@ -179,13 +172,16 @@ class OrderSerializer(serializers.ModelSerializer):
             representation['updated_at'] = instance.updated_at.isoformat()
 
         # Content objectni serializatsiya qilish
-        if instance.content_object:
+        if instance.journey:
             content_serializer = ContentObjectSerializer()
-            representation['content_object'] = content_serializer.get_serialized_data(instance.content_object)
+            representation['content_object'] = content_serializer.get_serialized_data(instance.journey)
 
         return representation
 
 
+JOURNEY_MODELS = {'passengertravel': PassengerTravel, 'passengerpost': PassengerPost}
+
+
 class OrderCreateSerializer(serializers.ModelSerializer):
     content_type = serializers.ChoiceField(
         choices=['passengertravel', 'passengerpost'],
@@ -202,15 +198,10 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         object_id = attrs.get('object_id')
         order_type = attrs.get('order_type')
 
-        # Content type va object mavjudligini tekshirish
+        # Object mavjudligini tekshirish (content_type choices bilan cheklangan)
+        model_class = JOURNEY_MODELS[content_type_name]
         try:
-            content_type = ContentType.objects.get(model=content_type_name)
-            model_class = content_type.model_class()
-            obj = model_class.objects.get(id=object_id)
-        except ContentType.DoesNotExist:
-            raise serializers.ValidationError({
-                'content_type': 'Noto\'g\'ri content type'
-            })
+            attrs['journey'] = model_class.objects.get(id=object_id)
         except model_class.DoesNotExist:
             raise serializers.ValidationError({
                 'object_id': f'{content_type_name} topilmadi'
@@ -231,15 +222,15 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        content_type_name = validated_data.pop('content_type')
-        object_id = validated_data.pop('object_id')
-
-        content_type = ContentType.objects.get(model=content_type_name)
+        validated_data.pop('content_type')
+        validated_data.pop('object_id')
+        journey = validated_data.pop('journey')
 
+        # content_type/object_id eski mijozlar uchun ham yoziladi
         return Order.objects.create(
             **validated_data,
-            content_type=content_type,
-            object_id=object_id
+            content_object=journey,
+            **OrderJourney.fields(journey),
         )
 
 
@@ -249,9 +240,18 @@ class OrderUpdateSerializer(serializers.ModelSerializer):
         fields = ['driver', 'status']
 
 
+class OrderListBatchSerializer(serializers.ListSerializer):
+    """OrderListSerializer(many=True): bog'liq obyektlar butun sahifa uchun birdaniga yuklanadi (OrderBatch)"""
+
+    def to_representation(self, data):
+        orders = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.context['order_batch'] = OrderBatch.load(orders)
+        return [self.child.to_representation(order) for order in orders]
+
+
 class OrderListSerializer(serializers.ModelSerializer):
     driver_details = serializers.SerializerMethodField()
-    content_object = ContentObjectSerializer(read_only=True)
+    content_object = ContentObjectSerializer(source='journey', read_only=True)
     creator = serializers.SerializerMethodField()
 
     class Meta:
@@ -259,21 +259,20 @@ class OrderListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'creator', 'content_object', 'driver', 'driver_details', 'status', 'order_type', 'object_id',
         ]
+        list_serializer_class = OrderListBatchSerializer
 
     def get_driver_details(self, obj):
-        try:
-            driver = Driver.objects.get(id=obj.driver.id)
-            return DriverSerializer(driver).data
-        except Exception as e:
+        if obj.driver is None:
             return None
+        return DriverSerializer(obj.driver).data
 
     def get_creator(self, obj):
-        try:
-            creator = BotClient.objects.get(telegram_id=obj.user)
-            return BotClientSerializer(creator).data
-        except Exception as e:
-            print("order list error: ", e)
-            return {}
+        batch = self.context.get('order_batch')
+        if batch is not None:
+            creator = batch.creator(obj.user)
+        else:
+            creator = BotClient.objects.filter(telegram_id=obj.user).first()
+        return BotClientSerializer(creator).data if creator else {}
 
 
 class PassengerRejectCreateSerializer(serializers.ModelSerializer):
@@ -1,5 +1,4 @@
 # serializers/passenger_post.py
-from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
 
 from .bot_client import BotClientSerializer
@@ -31,10 +30,7 @@ class PassengerPostSerializer(serializers.ModelSerializer):
     def get_order_id(self, obj):
         """Get order_id after object is created"""
         try:
-            order = Order.objects.filter(
-                content_type=ContentType.objects.get_for_model(obj),
-                object_id=obj.id
-            ).first()
+            order = obj.orders.first()
             return order.pk if order else None
         except Order.DoesNotExist:
             return None
@@ -1,11 +1,15 @@
-from django.contrib.contenttypes.models import ContentType
+import logging
+
 from django.db.models import Q
 from rest_framework import serializers
 
 from .city import CitySerializer
 from .passenger import PassengerSerializer
+from ..services.reference_data import ReferenceData
 from ..models import PassengerTravel, Order, CityPrice, City, Route, Tariff, Passenger
 
+logger = logging.getLogger(__name__)
+
 
 class PassengerTravelSerializer(serializers.ModelSerializer):
     from_city = serializers.SerializerMethodField()
@@ -40,10 +44,7 @@ class PassengerTravelSerializer(serializers.ModelSerializer):
     def get_order_id(self, obj):
         """Get order_id after object is created"""
         try:
-            order = Order.objects.filter(
-                content_type=ContentType.objects.get_for_model(obj),
-                object_id=obj.id
-            ).first()
+            order = obj.orders.first()
             return order.pk if order else None
         except Order.DoesNotExist:
             return None
@@ -59,11 +60,10 @@ class PassengerTravelSerializer(serializers.ModelSerializer):
     def get_price(self, obj):
         try:
             """Get price after object is created"""
-            print(obj.route_id, obj.tariff_id)
-            price = CityPrice.objects.filter(Q(route=obj.route_id) & Q(tariff=obj.tariff_id)).first()
-            return price.price - obj.cashback
-        except Exception as e:
-            print(e)
+            price = ReferenceData.get_snapshot().price(obj.route_id, obj.tariff_id)
+            return price - obj.cashback
+        except Exception:
+            logger.exception(f"Travel price calculation failed for {obj.pk}")
             return 0
 
 class PassengerTravelCreateSerializer(serializers.ModelSerializer):
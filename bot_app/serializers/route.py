@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from bot_app.models import Route, CityPrice, City, RouteCashback
 from bot_app.serializers.tariff_serializer import TariffSerializer
+from bot_app.services.reference_data import ReferenceData
 
 
 class CitySimpleSerializer(serializers.ModelSerializer):
@@ -45,8 +46,8 @@ class RoutePriceOptimizedSerializer(serializers.ModelSerializer):
         fields = ("route_id", "cashback", "to_city", 'prices')
 
     def get_prices(self, obj):
-        # Prefetch orqali optimallashtirilgan malumotlar
-        city_prices = CityPrice.objects.filter(route=obj)
+        # Narxlar snapshotidan (ReferenceData), so'rovsiz
+        city_prices = ReferenceData.get_snapshot().prices_for_route(obj.pk)
         # None qiymatlarni filtrlash
         valid_prices = [
             price for price in city_prices
@@ -55,13 +56,6 @@ class RoutePriceOptimizedSerializer(serializers.ModelSerializer):
         return CityPriceOptimizedSerializer(valid_prices, many=True).data
 
     def get_cashback(self, obj):
-        try:
-            city_prices = RouteCashback.objects.filter(route=obj).first()
-            if city_prices:
-                return city_prices.order_cashback
-            return 0
-        except Exception as e:
-            print(e)
-            return 0
+        return ReferenceData.get_snapshot().cashback(obj.pk)
 
 
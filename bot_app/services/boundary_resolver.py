@@ -0,0 +1,76 @@
+# services/boundary_resolver.py
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from asgiref.sync import sync_to_async
+
+from ..utils.boundary_index import BoundaryIndex
+from ..utils.location_settings import location_setting
+
+logger = logging.getLogger(__name__)
+
+
+class BoundaryResolver:
+    """
+    Lokal GeoJSON fayldagi tuman/viloyat chegaralari bo'yicha offline reverse geocoding.
+
+    Fayl (BOUNDARIES_GEOJSON) process da bir marta yuklanadi; sozlanmagan yoki
+    yuklab bo'lmasa resolver o'chiq va Nominatim ishlatiladi.
+    """
+
+    _index: Optional[BoundaryIndex] = None
+    _loaded_path: Optional[str] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_index(cls) -> Optional[BoundaryIndex]:
+        path = location_setting("BOUNDARIES_GEOJSON")
+        if not path:
+            return None
+        if cls._loaded_path == path:
+            return cls._index
+
+        with cls._lock:
+            if cls._loaded_path != path:
+                cls._index = cls._load(path)
+                cls._loaded_path = path
+        return cls._index
+
+    @classmethod
+    async def aget_index(cls) -> Optional[BoundaryIndex]:
+        path = location_setting("BOUNDARIES_GEOJSON")
+        if not path:
+            return None
+        if cls._loaded_path == path:
+            return cls._index
+        return await sync_to_async(cls.get_index)()
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._index = None
+            cls._loaded_path = None
+
+    @staticmethod
+    def _load(path: str) -> Optional[BoundaryIndex]:
+        try:
+            index = BoundaryIndex.from_file(
+                path,
+                levels=location_setting("BOUNDARY_LEVELS"),
+                cell_size_deg=location_setting("BOUNDARY_INDEX_CELL_DEG"),
+            )
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            logger.error(f"Boundaries not loaded from {path}: {e}")
+            return None
+
+        logger.info(f"Boundaries loaded from {path}: {len(index)}")
+        return index
+
+    @classmethod
+    async def resolve(cls, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """Nuqta uchun mahalla/shahar_tuman/viloyat yoki None (resolver o'chiq/hudud topilmadi)"""
+        index = await cls.aget_index()
+        if index is None:
+            return None
+        return index.resolve(lat, lon)
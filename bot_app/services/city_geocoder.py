@@ -0,0 +1,88 @@
+# services/city_geocoder.py
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..models import City
+from ..utils.location_settings import location_setting
+from ..utils.rate_limiter import PRIORITY_BACKGROUND, request_priority
+from .city_locator import CityLocator
+from .location_service import GlobalLocationService
+
+logger = logging.getLogger(__name__)
+
+# progress(bajarilgan, jami, shahar nomi, koordinatalar yoki None)
+ProgressCallback = Callable[[int, int, str, Optional[Tuple[float, float]]], None]
+
+
+class CityGeocoder:
+    """
+    City koordinatalarini nom bo'yicha ommaviy to'ldirish.
+
+    Nomlar parallel (CITY_GEOCODE_CONCURRENCY) geocode qilinadi, Nominatim ga
+    so'rovlar umumiy rate limiter orqali fon ustuvorligida o'tadi. Natijalar bitta
+    bulk_update bilan yoziladi. refresh=True (qayta geocode) geocode cache ni chetlab
+    o'tadi va undagi yozuvlarni yangi natija bilan almashtiradi.
+    """
+
+    @staticmethod
+    async def geocode_titles(
+            titles: List[str],
+            progress: Optional[ProgressCallback] = None,
+            refresh: bool = False
+    ) -> Dict[str, Optional[Tuple[float, float]]]:
+        semaphore = asyncio.Semaphore(location_setting("CITY_GEOCODE_CONCURRENCY"))
+
+        async def geocode(title):
+            async with semaphore:
+                try:
+                    return title, await GlobalLocationService.lookup_city_coordinates(title, refresh=refresh)
+                except Exception as e:
+                    logger.warning(f"City geocoding failed for {title}: {e}")
+                    return title, None
+
+        results = {}
+        for done, future in enumerate(asyncio.as_completed([geocode(title) for title in titles]), start=1):
+            title, coords = await future
+            results[title] = coords
+            if progress:
+                progress(done, len(titles), title, coords)
+        return results
+
+    @staticmethod
+    def geocode(
+            cities: List[City],
+            progress: Optional[ProgressCallback] = None,
+            refresh: bool = False
+    ) -> Dict[str, Any]:
+        """Shaharlarni geocode qilish: {"total", "updated": [id], "unchanged", "failed": [title]}"""
+        titles = list(dict.fromkeys(city.title for city in cities))
+        # Interaktiv so'rovlar navbatda bu backfill dan oldin o'tadi
+        with request_priority(PRIORITY_BACKGROUND):
+            coordinates = asyncio.run(CityGeocoder.geocode_titles(titles, progress, refresh))
+
+        updated, failed = [], []
+        for city in cities:
+            coords = coordinates.get(city.title)
+            if not coords:
+                failed.append(city.title)
+            elif (city.latitude, city.longitude) != coords:
+                city.latitude, city.longitude = coords
+                updated.append(city)
+
+        if updated:
+            City.objects.bulk_update(updated, ["latitude", "longitude"])
+            # bulk_update signal yubormaydi
+            CityLocator.invalidate()
+
+        result = {
+            "total": len(cities),
+            "updated": [city.pk for city in updated],
+            "unchanged": len(cities) - len(updated) - len(failed),
+            "failed": sorted(set(failed)),
+        }
+        logger.info(
+            f"City geocoding: {len(updated)} updated, {result['unchanged']} unchanged, "
+            f"{len(failed)} failed of {len(cities)}"
+        )
+        return result
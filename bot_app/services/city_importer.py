@@ -0,0 +1,202 @@
+# services/city_importer.py
+import logging
+from collections import defaultdict
+from itertools import islice
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import City
+from ..utils.geonames import ADMIN_FEATURES, GeoNamesPlace, iter_places, load_alternate_names
+from ..utils.name_index import normalize_name
+from .city_locator import CityLocator, city_names
+from .reference_data import ReferenceData
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURE_CODES = ("ADM1", "ADM2", "PPLC", "PPLA", "PPLA2", "PPLA3", "PPL")
+# Qo'lda kiritilgan shahar nom bo'yicha faqat shu turdagi aholi punktlariga bog'lanadi
+# (hududlar - ADM1/ADM2 - va qishloqlar emas)
+LINKABLE_FEATURES = ("PPLC", "PPLA", "PPLA2")
+
+BULK_UPDATE_BATCH_SIZE = 200
+
+
+class CityImporter:
+    """
+    GeoNames dump faylidan City larni import qilish (tarmoqsiz).
+
+    Fayl qatorma-qator o'qiladi: avval ADM1/ADM2 hududlar, keyin joylar (subcategory -
+    eng yaqin ota hudud). Har bir batch uchun bitta SELECT, bulk_create va bulk_update.
+    Mavjud qatorlar geonames_id, bo'lmasa yagona nom mosligi (tur so'zlari bilan, faqat
+    LINKABLE_FEATURES) bo'yicha topiladi; qo'lda kiritilgan title, translate qiymatlari,
+    is_allowed va mavjud koordinatalar o'zgartirilmaydi - GeoNames koordinatalari faqat bo'sh qatorga yoziladi.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            feature_codes: Collection[str] = DEFAULT_FEATURE_CODES,
+            min_population: int = 0,
+            alternate_names: Optional[str] = None,
+            languages: Collection[str] = ("uz", "ru", "en"),
+            allow_new: bool = False,
+            batch_size: int = 1000,
+            progress: Optional[Callable[[Dict[str, int]], None]] = None,
+    ):
+        self.path = path
+        self.feature_codes = set(feature_codes) | set(ADMIN_FEATURES)
+        self.min_population = min_population
+        self.alternate_names = alternate_names
+        self.languages = tuple(languages)
+        self.allow_new = allow_new
+        self.batch_size = batch_size
+        self.progress = progress
+
+        self.stats = {"created": 0, "updated": 0, "unchanged": 0, "linked": 0, "processed": 0}
+        # hudud kaliti -> City pk
+        self._parents: Dict[Tuple[str, ...], int] = {}
+        self._names: Dict[int, Dict[str, str]] = {}
+        # geonames_id siz mavjud shaharlar: normallashgan nom (tur so'zlari bilan) -> pk lar
+        self._unlinked: Dict[int, City] = {}
+        self._unlinked_by_name: Dict[str, Set[int]] = defaultdict(set)
+
+    def _places(self) -> Iterable[GeoNamesPlace]:
+        return iter_places(self.path, self.feature_codes, self.min_population)
+
+    def run(self) -> Dict[str, int]:
+        if self.alternate_names:
+            geoname_ids = {place.geoname_id for place in self._places()}
+            self._names = load_alternate_names(self.alternate_names, self.languages, geoname_ids)
+
+        for city in City.objects.filter(geonames_id__isnull=True):
+            self._unlinked[city.pk] = city
+            for name in city_names(city):
+                self._unlinked_by_name[normalize_name(name, drop_stop_words=False)].add(city.pk)
+
+        # Ota hududlar pk si joylardan oldin ma'lum bo'lishi kerak (ADM2 lar soni kichik - xotirada)
+        districts: List[GeoNamesPlace] = []
+
+        def regions():
+            for place in self._places():
+                if place.feature_code == "ADM1":
+                    yield place
+                elif place.feature_code == "ADM2":
+                    districts.append(place)
+
+        with transaction.atomic():
+            self._import(regions())
+            self._import(districts)
+            self._import(place for place in self._places() if place.feature_code not in ADMIN_FEATURES)
+
+        # bulk operatsiyalar signal yubormaydi
+        CityLocator.invalidate()
+        ReferenceData.invalidate()
+        logger.info(f"GeoNames import finished: {self.stats}")
+        return self.stats
+
+    def _import(self, places: Iterable[GeoNamesPlace]):
+        places = iter(places)
+        while True:
+            batch = list(islice(places, self.batch_size))
+            if not batch:
+                return
+            self._import_batch(batch)
+            if self.progress:
+                self.progress(self.stats)
+
+    def _import_batch(self, batch: List[GeoNamesPlace]):
+        existing = {
+            city.geonames_id: city
+            for city in City.objects.filter(geonames_id__in=[place.geoname_id for place in batch])
+        }
+        to_create, to_update, moved = [], [], []
+        update_fields = set()
+        # (place, city) - yangi qatorlar pk si bulk_create dan keyin ma'lum bo'ladi
+        imported: List[Tuple[GeoNamesPlace, City]] = []
+
+        for place in batch:
+            names = self._names.get(place.geoname_id, {})
+            parent_id = next((self._parents[key] for key in place.parent_keys if key in self._parents), None)
+
+            city = existing.get(place.geoname_id)
+            if city is None:
+                city = self._link_by_name(place, names)
+                if city is not None:
+                    self.stats["linked"] += 1
+
+            if city is None:
+                title = names.get(self.languages[0]) if self.languages else None
+                city = City(
+                    title=title or place.name,
+                    geonames_id=place.geoname_id,
+                    subcategory_id=parent_id,
+                    latitude=place.latitude,
+                    longitude=place.longitude,
+                    translate=names or None,
+                    is_allowed=self.allow_new,
+                )
+                to_create.append(city)
+            else:
+                fields = self._apply(city, place, names, parent_id)
+                if fields:
+                    to_update.append(city)
+                    update_fields |= fields
+                    if "latitude" in fields or "longitude" in fields:
+                        moved.append(city.pk)
+            imported.append((place, city))
+
+        if to_create:
+            City.objects.bulk_create(to_create, batch_size=self.batch_size)
+        if to_update:
+            # bulk_update narxi qator x maydon (CASE) - faqat o'zgargan maydonlar, kichikroq bo'laklarda;
+            # hamma qator uchun bir xil qiymatlar bitta UPDATE bilan
+            City.objects.bulk_update(to_update, sorted(update_fields), batch_size=BULK_UPDATE_BATCH_SIZE)
+            City.objects.filter(pk__in=[city.pk for city in to_update]).update(updated_at=timezone.now())
+        if moved:
+            # Markaz o'zgardi - admin_area qayta hisoblanadi (backfill_city_admin_area)
+            City.objects.filter(pk__in=moved).update(admin_area=None, admin_area_updated_at=None)
+
+        for place, city in imported:
+            if place.admin_key is not None:
+                self._parents[place.admin_key] = city.pk
+
+        self.stats["created"] += len(to_create)
+        self.stats["updated"] += len(to_update)
+        self.stats["unchanged"] += len(batch) - len(to_create) - len(to_update)
+        self.stats["processed"] += len(batch)
+
+    @staticmethod
+    def _apply(city: City, place: GeoNamesPlace, names: Dict[str, str], parent_id: Optional[int]) -> Set[str]:
+        """Mavjud qatorni yangilash, o'zgargan maydonlar (qayta import da odatda bo'sh - UPDATE yo'q)"""
+        # Qo'lda kiritilgan (nom bo'yicha bog'langan) koordinatalar saqlanadi
+        has_coordinates = city.latitude is not None and city.longitude is not None
+        values = {
+            "geonames_id": place.geoname_id,
+            "latitude": city.latitude if has_coordinates else place.latitude,
+            "longitude": city.longitude if has_coordinates else place.longitude,
+            "subcategory_id": city.subcategory_id or parent_id,
+            "translate": {**names, **(city.translate or {})} if names else city.translate,
+        }
+        changed = {field for field, value in values.items() if getattr(city, field) != value}
+        for field in changed:
+            setattr(city, field, values[field])
+        # bulk_update maydon nomini kutadi
+        return {"subcategory" if field == "subcategory_id" else field for field in changed}
+
+    def _link_by_name(self, place: GeoNamesPlace, names: Dict[str, str]) -> Optional[City]:
+        """geonames_id siz mavjud shahar - faqat nom bo'yicha bitta nomzod bo'lsa"""
+        if place.feature_class != "P" or place.feature_code not in LINKABLE_FEATURES:
+            return None
+        candidates = set()
+        for name in [place.name, *names.values()]:
+            candidates |= self._unlinked_by_name.get(normalize_name(name, drop_stop_words=False), set())
+        if len(candidates) != 1:
+            return None
+
+        city = self._unlinked.pop(candidates.pop())
+        for name in city_names(city):
+            self._unlinked_by_name[normalize_name(name, drop_stop_words=False)].discard(city.pk)
+        return city
+
@@ -0,0 +1,148 @@
+# services/city_locator.py
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from ..models import City
+from ..utils.location_settings import location_setting
+from ..utils.name_index import NameIndex
+from ..utils.spatial_index import GeoGridIndex
+
+logger = logging.getLogger(__name__)
+
+CITY_SNAPSHOT_VERSION_KEY = "city_snapshot_version"
+CITY_BACKFILL_LOCK_KEY = "city_coords_backfill_scheduled"
+CITY_BACKFILL_LOCK_TIME = 300  # 5 minutes
+
+
+def city_names(city: City) -> List[str]:
+    """Shaharning barcha nomlari: title va translate qiymatlari"""
+    names = [city.title]
+    if isinstance(city.translate, dict):
+        names.extend(value for value in city.translate.values() if isinstance(value, str))
+    return names
+
+
+class CitySnapshot:
+    """Ruxsat etilgan shaharlarning DB koordinatalari bo'yicha xotiradagi nusxasi"""
+
+    def __init__(self, cities: List[City], version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.points: List[Tuple[City, Tuple[float, float]]] = []
+        self.missing: List[City] = []
+        self._by_title: Dict[str, Tuple[City, Tuple[float, float]]] = {}
+        self._by_id: Dict[int, Tuple[City, Tuple[float, float]]] = {}
+
+        for city in cities:
+            if city.latitude is None or city.longitude is None:
+                self.missing.append(city)
+                continue
+            point = (city, (city.latitude, city.longitude))
+            self.points.append(point)
+            self._by_title.setdefault(city.title.strip().lower(), point)
+            self._by_id[city.pk] = point
+
+        # title va translate dagi barcha nomlar (lotin/kirill, uz/ru/en) bo'yicha
+        self.name_index = NameIndex((city, city_names(city)) for city in cities)
+
+        # Har bir element: (city, (lat, lon))
+        self.index = GeoGridIndex(
+            ((point, point[1][0], point[1][1]) for point in self.points),
+            cell_size_deg=location_setting("CITY_INDEX_CELL_DEG"),
+        )
+
+    def find_by_title(self, title: str) -> Optional[Tuple[City, Tuple[float, float]]]:
+        """Shahar nomi bo'yicha qidirish (katta-kichik harf, yozuv va tarjimalardan qat'i nazar)"""
+        point = self._by_title.get((title or "").strip().lower())
+        if point:
+            return point
+        for _, city in self.name_index.search(title, limit=5, min_score=1.0):
+            if city.pk in self._by_id:
+                return self._by_id[city.pk]
+        return None
+
+    def nearby(self, lat: float, lon: float, max_distance_km: float,
+               limit: Optional[int] = None) -> List[Tuple[float, City, Tuple[float, float]]]:
+        """Radius ichidagi shaharlar masofa bo'yicha: [(distance_km, city, coords)]"""
+        if limit is None:
+            found = self.index.within(lat, lon, max_distance_km)
+        else:
+            found = self.index.nearest(lat, lon, k=limit, max_distance_km=max_distance_km)
+        return [(distance, city, coords) for distance, (city, coords) in found]
+
+    def is_fresh(self, version) -> bool:
+        return (
+            self.version == version
+            and time.monotonic() - self.loaded_at < location_setting("CITY_SNAPSHOT_MAX_AGE")
+        )
+
+
+class CityLocator:
+    """Process ichidagi shaharlar snapshotini boshqarish"""
+
+    _snapshot: Optional[CitySnapshot] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_snapshot(cls) -> CitySnapshot:
+        """Sync: joriy snapshot (kerak bo'lsa DB dan qayta yuklanadi)"""
+        version = cache.get(CITY_SNAPSHOT_VERSION_KEY, 0)
+        snapshot = cls._snapshot
+        if snapshot is not None and snapshot.is_fresh(version):
+            return snapshot
+
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is None or not snapshot.is_fresh(version):
+                snapshot = cls._load(version)
+                cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    async def aget_snapshot(cls) -> CitySnapshot:
+        """Async: snapshot yangi bo'lsa ORM ga umuman murojaat qilinmaydi"""
+        version = await cache.aget(CITY_SNAPSHOT_VERSION_KEY, 0)
+        snapshot = cls._snapshot
+        if snapshot is not None and snapshot.is_fresh(version):
+            return snapshot
+        return await sync_to_async(cls.get_snapshot)()
+
+    @classmethod
+    def invalidate(cls):
+        """
+        City o'zgarganda snapshotni eskirgan deb belgilash. Versiya kaliti process lokal cache da
+        bo'lsa (CACHES sozlanmagan) faqat shu process darhol yangilanadi, boshqa processlar
+        o'zgarishni CITY_SNAPSHOT_MAX_AGE dan keyin ko'radi.
+        """
+        cache.set(CITY_SNAPSHOT_VERSION_KEY, time.time_ns(), None)
+        cls._snapshot = None
+
+    @classmethod
+    def _load(cls, version) -> CitySnapshot:
+        cities = list(City.objects.filter(is_allowed=True).order_by("id"))
+        snapshot = CitySnapshot(cities, version)
+        logger.debug(
+            f"City snapshot loaded: {len(snapshot.points)} with coordinates, "
+            f"{len(snapshot.missing)} missing"
+        )
+        if snapshot.missing:
+            cls._schedule_backfill([city.pk for city in snapshot.missing])
+        return snapshot
+
+    @staticmethod
+    def _schedule_backfill(city_ids: List[int]):
+        """Koordinatasi yo'q shaharlarni fon rejimida Nominatim orqali to'ldirish"""
+        if not cache.add(CITY_BACKFILL_LOCK_KEY, 1, CITY_BACKFILL_LOCK_TIME):
+            return
+
+        from ..tasks.city_tasks import backfill_city_coordinates
+
+        try:
+            backfill_city_coordinates.apply_async(args=(city_ids,), retry=False)
+        except Exception as e:
+            logger.warning(f"City coordinates backfill not scheduled: {e}")
@@ -0,0 +1,158 @@
+# services/geocode_cache.py
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import GeocodeCache
+from ..utils.location_settings import location_setting
+from ..utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_REFRESH_LOCK_TIME = 300  # bitta kalit uchun fon yangilash oralig'i (sekund)
+
+_TTL_SETTINGS = {
+    GeocodeCache.Kind.FORWARD: "GEOCODE_FORWARD_TTL",
+    GeocodeCache.Kind.REVERSE: "GEOCODE_REVERSE_TTL",
+}
+
+
+class GeocodeCacheService:
+    """
+    Geocoding natijalari uchun ikki darajali cache.
+
+    Avval process ichidagi django cache, keyin DB (GeocodeCache) tekshiriladi,
+    shuning uchun deploy dan keyingi birinchi so'rovlar Nominatim ni kutmaydi.
+    Muddati o'tgan yozuv darhol qaytariladi va celery orqali fon rejimida
+    yangilanadi (stale-while-revalidate).
+    """
+
+    # Cache kaliti bo'yicha parallel so'rovlarni birlashtirish
+    flight = SingleFlight("geocode")
+
+    # Muddati o'tgan yozuv process cache da shuncha sekund turadi (yangilanish kutilayotganda)
+    STALE_LOCAL_CACHE_TIME = 60
+
+    # Process bo'yicha hisoblagichlar: local, db, stale, fetch (benchmark/monitoring uchun)
+    stats = Counter()
+
+    @staticmethod
+    def is_cacheable(value: Any) -> bool:
+        """Bo'sh va xato/fallback javoblar cache ga yozilmaydi"""
+        if not value:
+            return False
+        return not (isinstance(value, dict) and value.get("source") in ("error", "local"))
+
+    @staticmethod
+    async def get_or_fetch(
+            key: str,
+            kind: str,
+            query: Dict[str, Any],
+            fetch: Callable[[], Awaitable[Any]],
+            local_ttl: int
+    ) -> Any:
+        """Kalit bo'yicha natija: process cache -> DB -> Nominatim (fetch)"""
+        cached = cache.get(key)
+        if cached:
+            GeocodeCacheService.stats["local"] += 1
+            return cached
+
+        async def lookup() -> Any:
+            entry = await GeocodeCacheService.aload(key)
+            if entry is not None and entry.payload:
+                GeocodeCacheService.stats["db"] += 1
+                if entry.is_expired:
+                    GeocodeCacheService.stats["stale"] += 1
+                    # cache.add va broker ga ulanish sync - event loop ni to'xtatmasligi uchun thread da
+                    await sync_to_async(GeocodeCacheService._schedule_refresh, thread_sensitive=False)(key)
+                    cache.set(key, entry.payload, GeocodeCacheService.STALE_LOCAL_CACHE_TIME)
+                else:
+                    remaining = (entry.expires_at - timezone.now()).total_seconds()
+                    cache.set(key, entry.payload, min(local_ttl, max(int(remaining), 1)))
+                return entry.payload
+
+            return await GeocodeCacheService.refresh(key, kind, query, fetch, local_ttl)
+
+        # Bir xil kalit uchun parallel so'rovlar bitta DB/Nominatim chaqiruvini kutadi
+        return await GeocodeCacheService.flight.do(key, lookup)
+
+    @staticmethod
+    async def refresh(
+            key: str,
+            kind: str,
+            query: Dict[str, Any],
+            fetch: Callable[[], Awaitable[Any]],
+            local_ttl: int
+    ) -> Any:
+        """Cache ni tekshirmasdan fetch() natijasi, ikkala cache ga yoziladi (xato bo'lsa eski yozuv qoladi)"""
+        GeocodeCacheService.stats["fetch"] += 1
+        value = await fetch()
+        if GeocodeCacheService.is_cacheable(value):
+            cache.set(key, value, local_ttl)
+            await GeocodeCacheService.astore(key, kind, query, value)
+        return value
+
+    @staticmethod
+    async def aload(key: str) -> Optional[GeocodeCache]:
+        """DB dagi yozuv (hit counter oshiriladi)"""
+        try:
+            entry = await GeocodeCache.objects.filter(key=key).afirst()
+            if entry is not None:
+                await GeocodeCache.objects.filter(pk=entry.pk).aupdate(
+                    hit_count=F("hit_count") + 1, last_hit_at=timezone.now()
+                )
+            return entry
+        except DatabaseError as e:
+            logger.warning(f"Geocode cache read failed for {key}: {e}")
+            return None
+
+    @staticmethod
+    def _defaults(kind: str, query: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        expires_at = timezone.now() + timedelta(seconds=location_setting(_TTL_SETTINGS[kind]))
+        return {"kind": kind, "query": query, "payload": value, "expires_at": expires_at}
+
+    @staticmethod
+    def store(key: str, kind: str, query: Dict[str, Any], value: Any):
+        """Natijani DB ga yozish (yangi muddat bilan)"""
+        try:
+            GeocodeCache.objects.update_or_create(
+                key=key, defaults=GeocodeCacheService._defaults(kind, query, value)
+            )
+        except DatabaseError as e:
+            logger.warning(f"Geocode cache write failed for {key}: {e}")
+
+    @staticmethod
+    async def astore(key: str, kind: str, query: Dict[str, Any], value: Any):
+        try:
+            await GeocodeCache.objects.aupdate_or_create(
+                key=key, defaults=GeocodeCacheService._defaults(kind, query, value)
+            )
+        except DatabaseError as e:
+            logger.warning(f"Geocode cache write failed for {key}: {e}")
+
+    @staticmethod
+    def prune(max_stale_days: int) -> int:
+        """Muddati max_stale_days dan ko'proq o'tgan yozuvlarni o'chirish"""
+        cutoff = timezone.now() - timedelta(days=max_stale_days)
+        deleted, _ = GeocodeCache.objects.filter(expires_at__lt=cutoff).delete()
+        return deleted
+
+    @staticmethod
+    def _schedule_refresh(key: str):
+        """Muddati o'tgan yozuvni fon rejimida yangilash"""
+        if not cache.add(f"geocode_refresh_{key}", 1, GEOCODE_REFRESH_LOCK_TIME):
+            return
+
+        from ..tasks.geocode_tasks import refresh_geocode_entry
+
+        try:
+            refresh_geocode_entry.apply_async(args=(key,), retry=False)
+        except Exception as e:
+            logger.warning(f"Geocode cache refresh not scheduled for {key}: {e}")
@@ -0,0 +1,116 @@
+# services/geocode_warmer.py
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import City, GeocodeCache
+from ..utils.location_settings import location_setting
+from .geocode_cache import GeocodeCacheService
+from .location_service import GlobalLocationService
+
+logger = logging.getLogger(__name__)
+
+# (cache kaliti, tur, Nominatim so'rovi)
+WarmJob = Tuple[str, str, Dict[str, Any]]
+
+
+class GeocodeWarmer:
+    """
+    Ruxsat etilgan shaharlar uchun geocode cache ni oldindan to'ldirish.
+
+    Har bir shahar uchun forward (nom -> koordinata) va shahar markazi uchun reverse
+    (koordinata -> joy) yozuvlari tekshiriladi; DB da yo'q yoki GEOCODE_WARM_AHEAD
+    sekund ichida muddati tugaydiganlari Nominatim dan qayta olinadi.
+    """
+
+    @staticmethod
+    def city_jobs(cities: List[City]) -> List[WarmJob]:
+        jobs = []
+        for city in cities:
+            key, query = GlobalLocationService.city_coordinates_cache_entry(city.title)
+            jobs.append((key, GeocodeCache.Kind.FORWARD, query))
+            if city.latitude is not None and city.longitude is not None:
+                key, query = GlobalLocationService.place_info_cache_entry(city.latitude, city.longitude)
+                jobs.append((key, GeocodeCache.Kind.REVERSE, query))
+
+        # Bir xil nomli / bitta katakdagi shaharlar bitta yozuvni ishlatadi
+        return list({key: (key, kind, query) for key, kind, query in jobs}.values())
+
+    @staticmethod
+    def allowed_city_jobs() -> Tuple[int, List[WarmJob]]:
+        cities = list(City.objects.filter(is_allowed=True).only("id", "title", "latitude", "longitude"))
+        return len(cities), GeocodeWarmer.city_jobs(cities)
+
+    @staticmethod
+    def due_jobs(jobs: List[WarmJob], ahead_seconds: int) -> Tuple[List[WarmJob], int]:
+        """Yangilanishi kerak bo'lgan yozuvlar (yo'qlari birinchi) va hali yangi yozuvlar soni"""
+        expires = dict(
+            GeocodeCache.objects.filter(key__in=[key for key, _, _ in jobs]).values_list("key", "expires_at")
+        )
+        horizon = timezone.now() + timedelta(seconds=ahead_seconds)
+
+        due = [job for job in jobs if job[0] not in expires or expires[job[0]] <= horizon]
+        due.sort(key=lambda job: (job[0] in expires, expires.get(job[0])))
+        return due, len(jobs) - len(due)
+
+    @staticmethod
+    async def fetch_all(jobs: List[WarmJob], chunk_size: int) -> List[Any]:
+        """Nominatim so'rovlari bo'laklab (rate limiter navbatida deadline oshmasligi uchun)"""
+        results = []
+        for start in range(0, len(jobs), chunk_size):
+            chunk = jobs[start:start + chunk_size]
+            results += await asyncio.gather(*[
+                GlobalLocationService.fetch_geocode(kind, query) for _, kind, query in chunk
+            ])
+        return results
+
+    @staticmethod
+    def warm(ahead_seconds: Optional[int] = None, max_jobs: Optional[int] = None) -> Dict[str, Any]:
+        """Cache ni to'ldirish (sync, celery task ichida)"""
+        if ahead_seconds is None:
+            ahead_seconds = location_setting("GEOCODE_WARM_AHEAD")
+        if max_jobs is None:
+            max_jobs = location_setting("GEOCODE_WARM_MAX_PER_RUN")
+
+        cities, jobs = GeocodeWarmer.allowed_city_jobs()
+        due, fresh = GeocodeWarmer.due_jobs(jobs, ahead_seconds)
+        batch = due[:max_jobs]
+
+        values = asyncio.run(GeocodeWarmer.fetch_all(batch, location_setting("GEOCODE_WARM_CHUNK_SIZE")))
+
+        refreshed = 0
+        for (key, kind, query), value in zip(batch, values):
+            if GeocodeCacheService.is_cacheable(value):
+                GeocodeCacheService.store(key, kind, query, value)
+                refreshed += 1
+
+        result = {
+            "cities": cities,
+            "entries": len(jobs),
+            "fresh": fresh,
+            "refreshed": refreshed,
+            "failed": len(batch) - refreshed,
+            "deferred": len(due) - len(batch),
+        }
+        logger.info(f"Geocode cache warmed: {result}")
+        return result
+
+    @staticmethod
+    def status() -> Dict[str, Any]:
+        """Ruxsat etilgan shaharlar bo'yicha qamrov (muddati o'tmagan yozuvlar ulushi) va oxirgi yangilanish"""
+        cities, jobs = GeocodeWarmer.allowed_city_jobs()
+        entries = GeocodeCache.objects.filter(key__in=[key for key, _, _ in jobs])
+        stats = entries.aggregate(last_refresh=Max("updated_at"))
+        fresh = entries.filter(expires_at__gt=timezone.now()).count()
+
+        return {
+            "cities": cities,
+            "entries": len(jobs),
+            "fresh": fresh,
+            "coverage": round(fresh / len(jobs), 3) if jobs else 1.0,
+            "last_refresh": stats["last_refresh"],
+        }
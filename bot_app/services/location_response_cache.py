@@ -0,0 +1,67 @@
+# services/location_response_cache.py
+from collections import Counter
+from typing import Any, Awaitable, Callable
+
+from django.core.cache import cache
+
+from ..utils.geo_utils import haversine_km
+from ..utils.geohash import geohash_bounds, geohash_encode
+from ..utils.location_settings import location_setting
+from .city_locator import CITY_SNAPSHOT_VERSION_KEY
+
+
+class LocationResponseCache:
+    """
+    check-location / nearby-cities uchun katak bo'yicha hisoblangan qism (manzil, nomzod shaharlar) ni cache lash.
+
+    Kalit: tur, shaharlar versiyasi (CITY_SNAPSHOT_VERSION_KEY), geohash katagi
+    (LOCATION_RESPONSE_GEOHASH_PRECISION) va max_distance_km. City o'zgarganda versiya
+    yangilanadi, eski javoblar esa o'z TTL i bilan o'chib ketadi. Versiya kaliti process lokal
+    cache da bo'lsa (CACHES sozlanmagan) faqat o'zgarish bo'lgan process da yangilanadi - boshqa
+    workerlar eski kataklarni LOCATION_RESPONSE_CACHE_TIME gacha (CITY_SNAPSHOT_MAX_AGE bilan
+    bir xil) berishi mumkin. Nuqtaga bog'liq qiymatlar (masofa, shahar ichidami) cache dan
+    olingan koordinatalar bo'yicha har so'rovda hisoblanadi.
+    """
+
+    # Process bo'yicha hisoblagichlar: hit, miss
+    stats = Counter()
+
+    @staticmethod
+    async def key(kind: str, lat: float, lon: float, max_distance_km: float) -> str:
+        version = await cache.aget(CITY_SNAPSHOT_VERSION_KEY, 0)
+        cell = geohash_encode(lat, lon, location_setting("LOCATION_RESPONSE_GEOHASH_PRECISION"))
+        return f"location_response_{kind}_{version}_{cell}_{max_distance_km:g}"
+
+    @staticmethod
+    def cell_margin_km(lat: float, lon: float) -> float:
+        """Katak diagonali: katakdagi istalgan nuqta so'ralgan nuqtadan shu masofadan uzoq emas"""
+        min_lat, max_lat, min_lon, max_lon = geohash_bounds(
+            geohash_encode(lat, lon, location_setting("LOCATION_RESPONSE_GEOHASH_PRECISION"))
+        )
+        return haversine_km(min_lat, min_lon, max_lat, max_lon)
+
+    @staticmethod
+    async def get_or_build(
+            kind: str,
+            lat: float,
+            lon: float,
+            max_distance_km: float,
+            build: Callable[[], Awaitable[Any]],
+            cacheable: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """Katak uchun saqlangan javob, bo'lmasa build() natijasi (cacheable bo'lsa saqlanadi)"""
+        timeout = location_setting("LOCATION_RESPONSE_CACHE_TIME")
+        if not timeout:
+            return await build()
+
+        key = await LocationResponseCache.key(kind, lat, lon, max_distance_km)
+        value = await cache.aget(key)
+        if value is not None:
+            LocationResponseCache.stats["hit"] += 1
+            return value
+
+        LocationResponseCache.stats["miss"] += 1
+        value = await build()
+        if cacheable(value):
+            await cache.aset(key, value, timeout)
+        return value
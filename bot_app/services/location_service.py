@@ -1,11 +1,21 @@
 # services/location_service.py
-import math
 import asyncio
 from typing import Dict, Any, List, Optional, Tuple
 from asgiref.sync import sync_to_async
-from ..models import City
+from ..models import City, GeocodeCache
+from ..utils.geo_utils import haversine_km, haversine_many
+from ..utils.geocode_result import PlaceInfo
+from ..utils.geohash import geohash_decode, geohash_encode
+from ..utils.location_settings import location_setting
+from ..utils.name_index import NameIndex
 from ..utils.nominatim_utils import aget_coords_from_place, aget_place_from_coords
-from django.core.cache import cache
+from .boundary_resolver import BoundaryResolver
+from .city_locator import CityLocator, city_names
+from .geocode_cache import GeocodeCacheService
+
+
+# City.admin_area da saqlanadigan maydonlar (parse_address natijasidan)
+ADMIN_AREA_FIELDS = ("source", "mahalla", "shahar_tuman", "viloyat", "full_address")
 
 
 class GlobalLocationService:
@@ -16,60 +26,213 @@ class GlobalLocationService:
     @staticmethod
     def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Haversine formula bilan masofani hisoblash (km)"""
-        R = 6371  # Earth radius in kilometers
+        return haversine_km(lat1, lon1, lat2, lon2)
 
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
+    @staticmethod
+    async def get_city_coordinates(city_name: str = "", country: str = "uz") -> Optional[Tuple[float, float]]:
+        """Shahar nomi bo'yicha koordinatalarni Nominatim orqali olish (cached)"""
+        coords = await GlobalLocationService.lookup_city_coordinates(city_name, country)
+        if coords:
+            return coords
 
-        a = (math.sin(delta_lat / 2) ** 2 +
-             math.cos(lat1_rad) * math.cos(lat2_rad) *
-             math.sin(delta_lon / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        # Nominatim ishlamayapti (yoki circuit ochiq) - DB dagi shahar koordinatalari
+        snapshot = await CityLocator.aget_snapshot()
+        point = snapshot.find_by_title(city_name)
+        return point[1] if point else None
 
-        return R * c
+    @staticmethod
+    async def lookup_city_coordinates(
+            city_name: str,
+            country: str = "uz",
+            refresh: bool = False
+    ) -> Optional[Tuple[float, float]]:
+        """Geocode cache / Nominatim natijasi (DB dagi City koordinatalariga qaytmasdan; refresh - cache siz, qayta yoziladi)"""
+        cache_key, query = GlobalLocationService.city_coordinates_cache_entry(city_name, country)
+
+        lookup = GeocodeCacheService.refresh if refresh else GeocodeCacheService.get_or_fetch
+        coords = await lookup(
+            cache_key,
+            GeocodeCache.Kind.FORWARD,
+            query,
+            lambda: GlobalLocationService.fetch_city_coordinates(city_name, country),
+            GlobalLocationService.COORDINATES_CACHE_TIME,
+        )
+        # DB (JSON) dan list bo'lib qaytadi
+        return tuple(coords) if coords else None
 
     @staticmethod
-    async def get_city_coordinates(city_name: str = "", country: str = "uz") -> Optional[Tuple[float, float]]:
-        """Shahar nomi bo'yicha koordinatalarni Nominatim orqali olish (cached)"""
-        cache_key = f"city_coords_{city_name.lower()}_{country}"
+    def city_coordinates_cache_entry(city_name: str, country: str = "uz") -> Tuple[str, Dict[str, Any]]:
+        """get_city_coordinates uchun (cache kaliti, Nominatim so'rovi)"""
+        return f"city_coords_{city_name.lower()}_{country}", {"city_name": city_name, "country": country}
 
-        # Cache dan tekshirish
-        cached_coords = cache.get(cache_key)
-        if cached_coords:
-            return cached_coords
+    @staticmethod
+    def place_info_cache_entry(lat: float, lon: float) -> Tuple[str, Dict[str, Any]]:
+        """get_place_info uchun (cache kaliti, Nominatim so'rovi) - geohash katagi markazi"""
+        cell = geohash_encode(lat, lon, location_setting("PLACE_GEOHASH_PRECISION"))
+        cell_lat, cell_lon = geohash_decode(cell)
+        return f"place_info_{cell}", {"lat": cell_lat, "lon": cell_lon}
 
+    @staticmethod
+    async def fetch_city_coordinates(city_name: str, country: str = "uz") -> Optional[Tuple[float, float]]:
+        """Koordinatalarni to'g'ridan-to'g'ri Nominatim dan olish (cache siz)"""
         try:
             results = await aget_coords_from_place(city_name, country_code=country, limit=1)
             if results and results[0].get('lat') and results[0].get('lon'):
-                coords = (float(results[0]['lat']), float(results[0]['lon']))
-                # Cache ga saqlash
-                cache.set(cache_key, coords, GlobalLocationService.COORDINATES_CACHE_TIME)
-                return coords
+                return float(results[0]['lat']), float(results[0]['lon'])
         except Exception:
             pass
-
         return None
 
+    @staticmethod
+    def use_city_snapshot() -> bool:
+        """Shahar koordinatalari DB snapshotidan olinadimi (Nominatim emas)"""
+        return location_setting("CITY_LOCATOR") == "snapshot"
+
+    @staticmethod
+    async def get_cities_with_coordinates() -> List[Tuple[City, Tuple[float, float]]]:
+        """Ruxsat etilgan shaharlar va ularning koordinatalari"""
+        if GlobalLocationService.use_city_snapshot():
+            snapshot = await CityLocator.aget_snapshot()
+            return snapshot.points
+
+        @sync_to_async
+        def get_allowed_cities():
+            return list(City.objects.filter(is_allowed=True))
+
+        cities = await get_allowed_cities()
+
+        # Shahar koordinatalarini parallel olish
+        city_coords_tasks = [GlobalLocationService.get_city_coordinates(city.title) for city in cities]
+        cities_coords = await asyncio.gather(*city_coords_tasks)
+
+        return [(city, coords) for city, coords in zip(cities, cities_coords) if coords]
+
+    @staticmethod
+    async def get_nearby_cities(
+            lat: float,
+            lon: float,
+            max_distance_km: float,
+            limit: Optional[int] = None
+    ) -> List[Tuple[float, City, Tuple[float, float]]]:
+        """Radius ichidagi shaharlar, masofa bo'yicha saralangan: [(distance_km, city, coords)]"""
+        if GlobalLocationService.use_city_snapshot():
+            snapshot = await CityLocator.aget_snapshot()
+            return snapshot.nearby(lat, lon, max_distance_km, limit)
+
+        cities_with_coords = await GlobalLocationService.get_cities_with_coordinates()
+        if not cities_with_coords:
+            return []
+
+        # Barcha shaharlargacha masofalar bitta vektorlashgan hisobda
+        distances = haversine_many(
+            lat, lon,
+            [coords[0] for _, coords in cities_with_coords],
+            [coords[1] for _, coords in cities_with_coords],
+        ).tolist()
+
+        results = [
+            (distance, city, city_coords)
+            for distance, (city, city_coords) in zip(distances, cities_with_coords)
+            if distance <= max_distance_km
+        ]
+        results.sort(key=lambda x: x[0])
+        return results[:limit] if limit else results
+
+    @staticmethod
+    async def get_coordinates_for_city(city: City) -> Optional[Tuple[float, float]]:
+        """Bitta shahar koordinatalari (snapshot rejimida faqat DB dan)"""
+        if GlobalLocationService.use_city_snapshot():
+            if city.latitude is None or city.longitude is None:
+                return None
+            return city.latitude, city.longitude
+        return await GlobalLocationService.get_city_coordinates(city.title)
+
+    @staticmethod
+    async def find_city_by_name(city_name: str) -> Tuple[Optional[City], Optional[Tuple[float, float]]]:
+        """Shahar nomi bo'yicha (city, koordinatalar): avval snapshot, keyin Nominatim (city=None)"""
+        if GlobalLocationService.use_city_snapshot():
+            snapshot = await CityLocator.aget_snapshot()
+            point = snapshot.find_by_title(city_name)
+            if point:
+                return point
+        return None, await GlobalLocationService.get_city_coordinates(city_name)
+
+    @staticmethod
+    async def get_city_admin_area(city: Optional[City], coords: Tuple[float, float]) -> Dict[str, Any]:
+        """Shahar markazining ma'muriy hududi: oldindan hisoblangan City.admin_area, bo'lmasa reverse geocoding"""
+        if city is not None and city.admin_area:
+            return city.admin_area
+        return await GlobalLocationService.get_place_info(coords[0], coords[1])
+
+    @staticmethod
+    async def fetch_admin_area(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """City.admin_area uchun yozuv (xato bo'lsa None)"""
+        address_info = await GlobalLocationService.get_place_info(lat, lon)
+        if not GeocodeCacheService.is_cacheable(address_info):
+            return None
+        return {field: address_info.get(field) for field in ADMIN_AREA_FIELDS}
+
     @staticmethod
     async def get_place_info(lat: float, lon: float) -> Dict[str, Any]:
-        """Koordinatalar bo'yicha joy ma'lumotlarini olish (cached)"""
-        cache_key = f"place_info_{lat:.4f}_{lon:.4f}"
+        """
+        Koordinatalar bo'yicha joy ma'lumotlarini olish (cached).
 
-        # Cache dan tekshirish
-        cached_info = cache.get(cache_key)
-        if cached_info:
-            return cached_info
+        Chegaralar fayli sozlangan bo'lsa, natija offline (point-in-polygon) olinadi.
+        Aks holda Nominatim: cache geohash katagi bo'yicha (PLACE_GEOHASH_PRECISION),
+        katak ichidagi barcha nuqtalar katak markazi uchun olingan shahar_tuman/viloyat ni ishlatadi.
+        """
+        offline_info = await BoundaryResolver.resolve(lat, lon)
+        if offline_info and offline_info.get("shahar_tuman"):
+            return {**offline_info, "lat": lat, "lon": lon}
+
+        cache_key, query = GlobalLocationService.place_info_cache_entry(lat, lon)
+
+        address_info = await GeocodeCacheService.get_or_fetch(
+            cache_key,
+            GeocodeCache.Kind.REVERSE,
+            query,
+            lambda: GlobalLocationService.fetch_place_info(query["lat"], query["lon"]),
+            GlobalLocationService.PLACE_CACHE_TIME,
+        )
+        if not GeocodeCacheService.is_cacheable(address_info):
+            # Nominatim xatosi/timeout yoki circuit ochiq - lokal javob (bo'lsa)
+            address_info = await GlobalLocationService.local_place_info(lat, lon) or address_info
+        if not address_info:
+            return address_info
+        # Katak natijasi, lekin so'ralgan nuqta koordinatalari bilan (eski yozuvlar ham ixcham sxemaga)
+        place = PlaceInfo.from_dict(address_info)
+        place.lat, place.lon = lat, lon
+        return place.to_dict()
 
+    @staticmethod
+    async def local_place_info(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """Nominatim siz taxminiy joy: eng yaqin shaharning ma'muriy hududi (DB koordinatalari bo'yicha)"""
+        snapshot = await CityLocator.aget_snapshot()
+        nearest = snapshot.nearby(lat, lon, location_setting("LOCAL_FALLBACK_RADIUS_KM"), limit=1)
+        if not nearest:
+            return None
+
+        _, city, _ = nearest[0]
+        admin_area = city.admin_area or {}
+        shahar_tuman = admin_area.get("shahar_tuman") or city.title
+        viloyat = admin_area.get("viloyat")
+        return PlaceInfo.from_parts("local", shahar_tuman=shahar_tuman, viloyat=viloyat).to_dict()
+
+    @staticmethod
+    async def fetch_place_info(lat: float, lon: float) -> Dict[str, Any]:
+        """Joy ma'lumotlarini to'g'ridan-to'g'ri Nominatim dan olish (cache siz)"""
         try:
-            address_info = await aget_place_from_coords(lat, lon)
-            # Cache ga saqlash
-            cache.set(cache_key, address_info, GlobalLocationService.PLACE_CACHE_TIME)
-            return address_info
+            return await aget_place_from_coords(lat, lon)
         except Exception:
             return {}
 
+    @staticmethod
+    async def fetch_geocode(kind: str, query: Dict[str, Any]) -> Any:
+        """GeocodeCache yozuvini yangilash uchun saqlangan so'rovni qayta bajarish"""
+        if kind == GeocodeCache.Kind.FORWARD:
+            return await GlobalLocationService.fetch_city_coordinates(query["city_name"], query["country"])
+        return await GlobalLocationService.fetch_place_info(query["lat"], query["lon"])
+
     @staticmethod
     async def is_location_in_city_area(
             lat: float,
@@ -81,7 +244,7 @@ class GlobalLocationService:
         Koordinata shahar hududida ekanligini tekshirish (optimized)
         """
         # Parallel ravishda ma'lumotlarni olish
-        city_coords_task = GlobalLocationService.get_city_coordinates(city.title)
+        city_coords_task = GlobalLocationService.get_coordinates_for_city(city)
         address_info_task = GlobalLocationService.get_place_info(lat, lon)
 
         city_coords, address_info = await asyncio.gather(city_coords_task, address_info_task)
@@ -94,7 +257,7 @@ class GlobalLocationService:
 
         # Shahar ma'lumotlarini olish (faqat kerak bo'lsa)
         if distance <= max_distance_km * 2:  # Optimizatsiya: faqat yaqin bo'lsa olish
-            city_address_info = await GlobalLocationService.get_place_info(city_lat, city_lon)
+            city_address_info = await GlobalLocationService.get_city_admin_area(city, city_coords)
         else:
             city_address_info = {}
 
@@ -117,50 +280,50 @@ class GlobalLocationService:
         """
         # Joy ma'lumotlarini olish
         address_info = await GlobalLocationService.get_place_info(lat, lon)
-        location_city_name = address_info.get('shahar_tuman', "")
+        location_city_name = address_info.get('shahar_tuman') or ""
 
         if not location_city_name:
             return None, 0, address_info
 
-        # Barcha ruxsat etilgan shaharlarni bir martta olish
-        @sync_to_async
-        def get_allowed_cities():
-            return list(City.objects.filter(is_allowed=True))
+        # Radius ichidagi shaharlar (eng yaqini birinchi)
+        nearby_cities = await GlobalLocationService.get_nearby_cities(lat, lon, max_distance_km)
 
-        cities = await get_allowed_cities()
+        # Nomi mos kelgan eng yaqin shahar
+        matched = await GlobalLocationService.match_city_names(
+            location_city_name, [city for _, city, _ in nearby_cities]
+        )
+        for distance, city, _ in nearby_cities:
+            if city.pk in matched:
+                return city, distance, address_info
 
-        # Shahar koordinatalarini parallel olish
-        cities_with_coords = []
-        for city in cities:
-            city_coords = await GlobalLocationService.get_city_coordinates(city.title)
-            if city_coords:
-                cities_with_coords.append((city, city_coords))
-
-        best_match = None
-        min_distance = float('inf')
-        location_city_name_lower = location_city_name.lower()
-
-        for city, city_coords in cities_with_coords:
-            # Nomlar mos kelishini tekshirish (tezroq)
-            city_title_lower = city.title.lower()
-
-            # Nom mos kelishini tekshirish
-            name_match = (city_title_lower in location_city_name_lower or
-                          location_city_name_lower in city_title_lower)
-
-            if name_match:
-                distance = GlobalLocationService.calculate_distance(
-                    lat, lon, city_coords[0], city_coords[1]
-                )
-
-                if distance <= max_distance_km and distance < min_distance:
-                    min_distance = distance
-                    best_match = city
-                    # Agar juda yaqin bo'lsa, keyingilarini tekshirishni to'xtatish
-                    if distance < 1.0:  # 1 km dan kam
-                        break
-
-        return best_match, min_distance, address_info
+        return None, float('inf'), address_info
+
+    @staticmethod
+    async def match_city_names(name: str, cities: List[City]) -> Dict[int, float]:
+        """
+        Joy nomiga (masalan, Nominatim shahar_tuman) mos shaharlar: {city.pk: score}.
+        Lotin/kirill yozuvi va translate dagi uz/ru/en nomlari hisobga olinadi.
+        """
+        if not name or not cities:
+            return {}
+
+        min_score = location_setting("CITY_NAME_MATCH_MIN_SCORE")
+        if GlobalLocationService.use_city_snapshot():
+            index = (await CityLocator.aget_snapshot()).name_index
+        else:
+            index = NameIndex((city, city_names(city)) for city in cities)
+
+        return {city.pk: score for score, city in index.search(name, limit=None, min_score=min_score)}
+
+    @staticmethod
+    async def search_cities_by_name(name: str) -> List[Tuple[float, City]]:
+        """Nom bo'yicha shaharlar (o'xshashlik bo'yicha tartiblangan): [(score, city)]"""
+        snapshot = await CityLocator.aget_snapshot()
+        return snapshot.name_index.search(
+            name,
+            limit=location_setting("CITY_NAME_SEARCH_LIMIT"),
+            min_score=location_setting("CITY_NAME_SEARCH_MIN_SCORE"),
+        )
 
     @staticmethod
     async def validate_city_location(
@@ -173,10 +336,10 @@ class GlobalLocationService:
         Shahar nomi va koordinatalar mos kelishini tekshirish (optimized)
         """
         # Parallel ravishda ma'lumotlarni olish
-        city_coords_task = GlobalLocationService.get_city_coordinates(city_name)
+        city_task = GlobalLocationService.find_city_by_name(city_name)
         user_address_task = GlobalLocationService.get_place_info(lat, lon)
 
-        city_coords, user_address = await asyncio.gather(city_coords_task, user_address_task)
+        (city, city_coords), user_address = await asyncio.gather(city_task, user_address_task)
 
         if not city_coords:
             return {
@@ -191,7 +354,7 @@ class GlobalLocationService:
         # Faqat kerak bo'lganda shahar ma'lumotlarini olish
         city_address = {}
         if distance <= max_distance_km * 1.5:  # Optimizatsiya
-            city_address = await GlobalLocationService.get_place_info(city_coords[0], city_coords[1])
+            city_address = await GlobalLocationService.get_city_admin_area(city, city_coords)
 
         is_valid = distance <= max_distance_km
 
@@ -205,6 +368,25 @@ class GlobalLocationService:
             "message": f"Koordinatalar {city_name} shahar hududida {'bor' if is_valid else 'yoq'}. Masofa: {distance:.1f} km"
         }
 
+    @staticmethod
+    async def location_candidates(
+            lat: float,
+            lon: float,
+            max_distance_km: float
+    ) -> Tuple[Dict[str, Any], List[Tuple[float, City, Tuple[float, float], bool]]]:
+        """
+        Joy ma'lumoti va radius ichidagi shaharlar (eng yaqini birinchi):
+        (address_info, [(distance_km, city, coords, name_match)]). name_match - shahar_tuman nomiga mosligi.
+        """
+        address_info = await GlobalLocationService.get_place_info(lat, lon)
+        nearby_cities = await GlobalLocationService.get_nearby_cities(lat, lon, max_distance_km)
+        matched = await GlobalLocationService.match_city_names(
+            address_info.get('shahar_tuman') or "", [city for _, city, _ in nearby_cities]
+        )
+        return address_info, [
+            (distance, city, city_coords, city.pk in matched) for distance, city, city_coords in nearby_cities
+        ]
+
     @staticmethod
     async def search_cities_by_location(
             lat: float,
@@ -216,55 +398,43 @@ class GlobalLocationService:
         """
         # Joy ma'lumotlarini olish
         address_info = await GlobalLocationService.get_place_info(lat, lon)
-        location_city_name = address_info.get('shahar_tuman', '')
-
-        # Barcha ruxsat etilgan shaharlarni olish
-        @sync_to_async
-        def get_allowed_cities():
-            return list(City.objects.filter(is_allowed=True))
+        location_city_name = address_info.get('shahar_tuman') or ''
 
-        cities = await get_allowed_cities()
+        # Faqat eng yaqin 10 ta shahar (masofa bo'yicha saralangan)
+        nearby_cities = await GlobalLocationService.get_nearby_cities(lat, lon, max_distance_km, limit=10)
 
-        # Parallel ravishda koordinatalarni olish
-        city_coords_tasks = [GlobalLocationService.get_city_coordinates(city.title) for city in cities]
-        cities_coords = await asyncio.gather(*city_coords_tasks)
+        matched = await GlobalLocationService.match_city_names(
+            location_city_name, [city for _, city, _ in nearby_cities]
+        )
 
         results = []
-        location_city_name_lower = location_city_name.lower()
-
-        for city, city_coords in zip(cities, cities_coords):
-            if not city_coords:
-                continue
-
-            distance = GlobalLocationService.calculate_distance(
-                lat, lon, city_coords[0], city_coords[1]
-            )
+        for distance, city, city_coords in nearby_cities:
+            match_type = "name" if city.pk in matched else "distance"
 
-            if distance <= max_distance_km:
-                match_type = "distance"
+            results.append({
+                "city": city,
+                "distance_km": round(distance, 2),
+                "coordinates": {"latitude": city_coords[0], "longitude": city_coords[1]},
+                "match_type": match_type
+            })
 
-                # Nom bo'yicha tekshirish
-                if location_city_name:
-                    city_title_lower = city.title.lower()
-                    if (city_title_lower in location_city_name_lower or
-                            location_city_name_lower in city_title_lower):
-                        match_type = "name"
+        return results
 
-                results.append({
-                    "city": city,
-                    "distance_km": round(distance, 2),
-                    "coordinates": {"latitude": city_coords[0], "longitude": city_coords[1]},
-                    "match_type": match_type
-                })
+    @staticmethod
+    async def batch_fetch_admin_areas(points: List[Tuple[float, float]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Bir nechta koordinata uchun ma'muriy hududlar (ADMIN_AREA_FETCH_CONCURRENCY tadan parallel).
 
-        # Masofa bo'yicha saralash
-        results.sort(key=lambda x: x["distance_km"])
+        Rate limiter navbatida bir vaqtda oz so'rov turadi, shuning uchun katta ro'yxatda ham
+        so'rovlar NOMINATIM_BACKGROUND_WAIT_DEADLINE dan oshib None bo'lib qolmaydi.
+        """
+        semaphore = asyncio.Semaphore(location_setting("ADMIN_AREA_FETCH_CONCURRENCY"))
 
-        # Faqat eng yaqin 10 ta shaharni qaytarish (agar ko'p bo'lsa)
-        if len(results) > 10:
-            results = results[:10]
+        async def fetch(lat, lon):
+            async with semaphore:
+                return await GlobalLocationService.fetch_admin_area(lat, lon)
 
-        return results
+        return await asyncio.gather(*[fetch(lat, lon) for lat, lon in points])
 
     @staticmethod
     async def batch_get_city_coordinates(city_names: List[str]) -> Dict[str, Optional[Tuple[float, float]]]:
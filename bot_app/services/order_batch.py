@@ -0,0 +1,40 @@
+# services/order_batch.py
+from typing import Dict, List, Optional
+
+from django.db.models import Prefetch, prefetch_related_objects
+
+from ..models import BotClient, Car, Order, Route
+
+# Journey (travel/post, view da select_related bo'lmasa) va driver (yo'nalishi, rasmi, mashinalari) - har bir daraja bitta so'rov.
+# Narx va tariflar ReferenceData snapshotidan olinadi
+ORDER_LIST_PREFETCH = (
+    "travel",
+    "post",
+    Prefetch("driver__route_id", queryset=Route.objects.select_related("from_city", "to_city")),
+    "driver__drivergallery",
+    Prefetch("driver__driver", queryset=Car.objects.select_related("tariff")),
+)
+
+
+class OrderBatch:
+    """
+    Orderlar sahifasi uchun bog'liq obyektlar - qatorlar soniga bog'liq bo'lmagan so'rovlar bilan.
+
+    load() journey va driver larni prefetch_related_objects bilan order larga
+    biriktiradi, yaratuvchilar (BotClient) esa lug'at sifatida saqlanadi.
+    """
+
+    def __init__(self, creators: Dict[int, BotClient]):
+        self.creators = creators
+
+    @classmethod
+    def load(cls, orders: List[Order]) -> "OrderBatch":
+        prefetch_related_objects(orders, *ORDER_LIST_PREFETCH)
+
+        users = {order.user for order in orders}
+        creators = {client.telegram_id: client for client in BotClient.objects.filter(telegram_id__in=users)} \
+            if users else {}
+        return cls(creators)
+
+    def creator(self, telegram_id: int) -> Optional[BotClient]:
+        return self.creators.get(telegram_id)
@@ -0,0 +1,59 @@
+# services/order_journey.py
+from typing import Any, Dict
+
+from ..models import CityPrice, Journey, Order, PassengerTravel, Route
+
+
+class OrderJourney:
+    """
+    Order dagi travel/post, route/tariff/from_city/to_city/price ustunlari - content object (Journey) dan nusxa.
+
+    Shaharlar yo'nalishdan, narx CityPrice dan buyurtma yozilayotgan paytdagi qiymat sifatida
+    to'g'ridan-to'g'ri DB dan olinadi (ReferenceData snapshoti eskirgan bo'lishi mumkin - faqat o'qish uchun).
+    """
+
+    @staticmethod
+    def fields(journey: Journey) -> Dict[str, Any]:
+        route = None
+        if journey.route_id is not None:
+            route = Route.objects.filter(pk=journey.route_id).values("from_city_id", "to_city_id").first()
+        price = None
+        if journey.route_id is not None and journey.tariff_id is not None:
+            # Snapshot dagi kabi birinchi yozuv
+            price = CityPrice.objects.filter(route_id=journey.route_id, tariff_id=journey.tariff_id) \
+                .order_by("pk").values_list("price", flat=True).first()
+        is_travel = isinstance(journey, PassengerTravel)
+        return {
+            "travel_id": journey.pk if is_travel else None,
+            "post_id": None if is_travel else journey.pk,
+            "route_id": journey.route_id,
+            "tariff_id": journey.tariff_id,
+            "from_city_id": route["from_city_id"] if route else None,
+            "to_city_id": route["to_city_id"] if route else None,
+            "price": price,
+        }
+
+    @staticmethod
+    def orders(journey: Journey):
+        """Journey ga bog'langan orderlar (tiplangan FK bo'yicha)"""
+        field = "travel" if isinstance(journey, PassengerTravel) else "post"
+        return Order.objects.filter(**{field: journey})
+
+    @staticmethod
+    def remember(journey: Journey):
+        """Orderlarga yozilgan qiymatlar - keyingi sync() da taqqoslash uchun"""
+        journey._order_state = journey.order_state()
+
+    @staticmethod
+    def sync(journey: Journey) -> int:
+        """Journey yo'nalishi/tarifi o'zgargan bo'lsa unga bog'langan orderlarni yangilash (bitta UPDATE)"""
+        # DB dan o'qilgan (yoki oxirgi sync dagi) qiymatlar bilan bir xil - so'rov yo'q
+        if getattr(journey, "_order_state", None) == journey.order_state():
+            return 0
+
+        updated = OrderJourney.orders(journey).exclude(
+            route_id=journey.route_id,
+            tariff_id=journey.tariff_id,
+        ).update(**OrderJourney.fields(journey))
+        OrderJourney.remember(journey)
+        return updated
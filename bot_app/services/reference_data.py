@@ -0,0 +1,95 @@
+# services/reference_data.py
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from ..models import CityPrice, Route, RouteCashback, Tariff
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_SNAPSHOT_VERSION_KEY = "reference_snapshot_version"
+# Versiya kaliti process lokal cache da bo'lsa boshqa processlar o'zgarishni shu vaqtdan keyin ko'radi
+REFERENCE_SNAPSHOT_MAX_AGE = 60
+
+
+class ReferenceSnapshot:
+    """Tariflar, yo'nalishlar (shaharlari bilan), route x tariff narxlari va keshbeklar nusxasi"""
+
+    def __init__(self, tariffs: List[Tariff], routes: List[Route], prices: List[CityPrice],
+                 cashbacks: List[RouteCashback], version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.tariffs: Dict[int, Tariff] = {tariff.pk: tariff for tariff in tariffs}
+        self.routes: Dict[int, Route] = {route.pk: route for route in routes}
+        self.prices: Dict[Tuple[Optional[int], Optional[int]], int] = {}
+        self.route_prices: Dict[int, List[CityPrice]] = defaultdict(list)
+        self.cashbacks: Dict[int, float] = {}
+
+        # pk bo'yicha tartiblangan - avvalgi .first() kabi birinchi yozuv olinadi
+        for city_price in prices:
+            if city_price.tariff_id in self.tariffs:
+                city_price.tariff = self.tariffs[city_price.tariff_id]
+            self.prices.setdefault((city_price.route_id, city_price.tariff_id), city_price.price)
+            if city_price.route_id is not None:
+                self.route_prices[city_price.route_id].append(city_price)
+        for route_cashback in cashbacks:
+            if route_cashback.route_id is not None:
+                self.cashbacks.setdefault(route_cashback.route_id, route_cashback.order_cashback)
+
+    def price(self, route_id: Optional[int], tariff_id: Optional[int]) -> Optional[int]:
+        return self.prices.get((route_id, tariff_id))
+
+    def prices_for_route(self, route_id: int) -> List[CityPrice]:
+        return self.route_prices.get(route_id, [])
+
+    def cashback(self, route_id: int) -> float:
+        return self.cashbacks.get(route_id, 0)
+
+    def is_fresh(self, version) -> bool:
+        return self.version == version and time.monotonic() - self.loaded_at < REFERENCE_SNAPSHOT_MAX_AGE
+
+
+class ReferenceData:
+    """Process ichidagi narx/tarif/yo'nalish snapshotini boshqarish (CityLocator kabi)"""
+
+    _snapshot: Optional[ReferenceSnapshot] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_snapshot(cls) -> ReferenceSnapshot:
+        version = cache.get(REFERENCE_SNAPSHOT_VERSION_KEY, 0)
+        snapshot = cls._snapshot
+        if snapshot is not None and snapshot.is_fresh(version):
+            return snapshot
+
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is None or not snapshot.is_fresh(version):
+                snapshot = cls._load(version)
+                cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    def invalidate(cls):
+        """Route, Tariff, CityPrice, RouteCashback yoki City o'zgarganda"""
+        cache.set(REFERENCE_SNAPSHOT_VERSION_KEY, time.time_ns(), None)
+        cls._snapshot = None
+
+    @classmethod
+    def _load(cls, version) -> ReferenceSnapshot:
+        snapshot = ReferenceSnapshot(
+            tariffs=list(Tariff.objects.all()),
+            routes=list(Route.objects.select_related("from_city", "to_city")),
+            prices=list(CityPrice.objects.order_by("pk")),
+            cashbacks=list(RouteCashback.objects.order_by("pk")),
+            version=version,
+        )
+        logger.debug(
+            f"Reference snapshot loaded: {len(snapshot.tariffs)} tariffs, {len(snapshot.routes)} routes, "
+            f"{len(snapshot.prices)} prices"
+        )
+        return snapshot
@@ -0,0 +1,61 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from ..models import City
+from ..services.city_locator import CityLocator
+
+logger = logging.getLogger(__name__)
+
+ADMIN_AREA_SOURCE_FIELDS = City.ADMIN_AREA_SOURCE_FIELDS
+
+
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_city_snapshot(sender, instance, **kwargs):
+    CityLocator.invalidate()
+
+
+@receiver(pre_save, sender=City)
+def mark_city_admin_area_stale(sender, instance: City, update_fields=None, **kwargs):
+    """title/koordinatalar o'zgarsa eski admin_area ishlatilmaydi va qayta hisoblanadi"""
+    # Masalan save(update_fields=["is_allowed"]) - manba maydonlar yozilmaydi
+    if update_fields is not None and not set(update_fields) & set(ADMIN_AREA_SOURCE_FIELDS):
+        instance._admin_area_stale = False
+        return
+
+    if instance._state.adding or not instance.pk:
+        changed = True
+    else:
+        old = getattr(instance, "_admin_area_source", None)
+        if old is None:
+            # DB dan o'qilmagan (yoki maydonlari deferred) obyekt
+            values = City.objects.filter(pk=instance.pk).values_list(*ADMIN_AREA_SOURCE_FIELDS).first()
+            old = tuple(values) if values else None
+        changed = old != instance.admin_area_source()
+
+    if changed:
+        instance.admin_area = None
+        instance.admin_area_updated_at = None
+    instance._admin_area_stale = changed
+    instance._admin_area_source = instance.admin_area_source()
+
+
+@receiver(post_save, sender=City)
+def schedule_city_admin_area_refresh(sender, instance: City, **kwargs):
+    if not getattr(instance, "_admin_area_stale", False):
+        return
+    if instance.latitude is None or instance.longitude is None:
+        return
+
+    from ..tasks.city_tasks import refresh_city_admin_area
+
+    def schedule():
+        try:
+            refresh_city_admin_area.apply_async(args=([instance.pk],), retry=False)
+        except Exception as e:
+            logger.warning(f"City admin area refresh not scheduled for {instance.pk}: {e}")
+
+    transaction.on_commit(schedule)
@@ -14,12 +14,14 @@ def update_order(sender, instance: Order, **kwargs):
     if instance.driver and (instance.status == TravelStatus.CREATED or instance.status == TravelStatus.ASSIGNED):
 
         instance.status = TravelStatus.ASSIGNED
-        try:
-            driver = Driver.objects.get(pk=instance.driver.pk)
-            driver.amount -= instance.content_object.price * 0.05
-            driver.save()
-        except Exception as e:
-            print(e)
+        # Buyurtma narxi (Order.price) yo'q bo'lsa haydovchidan komissiya olinmaydi
+        if instance.price is not None:
+            try:
+                driver = Driver.objects.get(pk=instance.driver.pk)
+                driver.amount -= instance.price * 0.05
+                driver.save()
+            except Exception:
+                logger.exception(f"Driver fee not deducted for order {instance.pk}")
 
         notify_passenger_bot.delay(instance.pk)
 
@@ -29,13 +31,13 @@ def update_order(sender, instance: Order, **kwargs):
     if instance.driver and instance.status == TravelStatus.ENDED:
         try:
             user = Cashback.objects.filter(telegram_id=instance.user).first()
-            if instance.content_object.cashback > 0:
-                user.amount -= instance.content_object.cashback
+            if instance.journey.cashback > 0:
+                user.amount -= instance.journey.cashback
                 user.save()
             else:
                 user.amount += (
-                        CityPrice.objects.filter(Q(route=instance.content_object.route) & Q(tariff=instance.content_object.tariff)).first() *
-                        RouteCashback.objects.filter(tariff=instance.content_object.tariff).first()).order_cashback
+                        CityPrice.objects.filter(Q(route=instance.journey.route) & Q(tariff=instance.journey.tariff)).first() *
+                        RouteCashback.objects.filter(tariff=instance.journey.tariff).first()).order_cashback
                 user.save()
 
         except Exception as ex:
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import City, CityPrice, Route, RouteCashback, Tariff
+from ..services.reference_data import ReferenceData
+
+
+@receiver(post_save, sender=Tariff)
+@receiver(post_delete, sender=Tariff)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=CityPrice)
+@receiver(post_delete, sender=CityPrice)
+@receiver(post_save, sender=RouteCashback)
+@receiver(post_delete, sender=RouteCashback)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_reference_snapshot(sender, instance, **kwargs):
+    # City - yo'nalishlar shahar nomlari bilan saqlanadi
+    ReferenceData.invalidate()
@@ -1,12 +1,12 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 import logging
 from telebot import TeleBot
 
 from configuration import env
 from ..models import PassengerTravel, OrderType, PassengerPost, Order, Route
+from ..services.order_journey import OrderJourney
 from ..tasks.travel_tasks import notify_driver_bot
 
 logger = logging.getLogger(__name__)
@@ -72,12 +72,11 @@ def send_message_view(order_pk):
 @receiver(post_save, sender=PassengerPost)
 def create_order(sender, instance, created, **kwargs):
     if not created:
+        OrderJourney.sync(instance)
         return
 
     order_type = OrderType.TRAVEL if isinstance(instance, PassengerTravel) else OrderType.DELIVERY
-    content_type = ContentType.objects.get_for_model(sender)
-
-    if Order.objects.filter(content_type=content_type, object_id=instance.pk).exists():
+    if OrderJourney.orders(instance).exists():
         logger.warning(f"Order already exists for {sender.__name__} {instance.pk}")
         return
     try:
@@ -86,7 +85,9 @@ def create_order(sender, instance, created, **kwargs):
             order_type=order_type,
             content_object=instance,
             object_id=instance.pk,
+            **OrderJourney.fields(instance),
         )
+        OrderJourney.remember(instance)
 
 
         # Celery task ishga tushishi
@@ -1 +1,3 @@
 from .deactivate_drivers_tasks import deactivate_old_online_drivers  # noqa
+from .city_tasks import backfill_city_coordinates, refresh_city_admin_area  # noqa
+from .geocode_tasks import refresh_geocode_entry, prune_geocode_cache, warm_city_geocode_cache  # noqa
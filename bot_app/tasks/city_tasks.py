@@ -0,0 +1,75 @@
+# tasks/city_tasks.py
+import asyncio
+import logging
+from typing import List
+
+from celery import shared_task
+from django.db.models import Q
+from django.utils import timezone
+
+from bot_app.models import City
+from bot_app.services.city_geocoder import CityGeocoder
+from bot_app.services.city_locator import CityLocator
+from bot_app.services.location_service import GlobalLocationService
+from bot_app.utils.location_settings import location_setting
+from bot_app.utils.rate_limiter import PRIORITY_BACKGROUND, request_priority
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def backfill_city_coordinates(city_ids: List[int], overwrite: bool = False):
+    """Koordinatasi yo'q (overwrite=True bo'lsa barcha tanlangan) shaharlarni Nominatim orqali to'ldirish"""
+    cities = City.objects.filter(id__in=city_ids)
+    if not overwrite:
+        cities = cities.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True))
+    cities = list(cities)
+    if not cities:
+        return 0
+
+    # Qayta geocode: cache dagi (noto'g'ri bo'lishi mumkin) natija qayta yozilmasligi uchun
+    result = CityGeocoder.geocode(cities, refresh=overwrite)
+    refresh_city_admin_area_in_batches(result["updated"])
+    if result["failed"]:
+        logger.warning(f"City coordinates not found: {', '.join(result['failed'])}")
+    return len(result["updated"])
+
+
+@shared_task
+def refresh_city_admin_area(city_ids: List[int]):
+    """Shahar markazi koordinatalarining ma'muriy hududini (City.admin_area) hisoblash"""
+    cities = list(City.objects.filter(
+        id__in=city_ids,
+        latitude__isnull=False,
+        longitude__isnull=False
+    ))
+    if not cities:
+        return 0
+
+    points = [(city.latitude, city.longitude) for city in cities]
+    with request_priority(PRIORITY_BACKGROUND):
+        areas = asyncio.run(GlobalLocationService.batch_fetch_admin_areas(points))
+
+    now = timezone.now()
+    updated = []
+    for city, area in zip(cities, areas):
+        if area:
+            city.admin_area = area
+            city.admin_area_updated_at = now
+            updated.append(city)
+
+    if updated:
+        City.objects.bulk_update(updated, ["admin_area", "admin_area_updated_at"])
+        CityLocator.invalidate()
+
+    logger.info(f"City admin areas refreshed: {len(updated)}/{len(cities)}")
+    return len(updated)
+
+
+def refresh_city_admin_area_in_batches(city_ids: List[int]) -> int:
+    """refresh_city_admin_area ni ADMIN_AREA_BATCH_SIZE lik bo'laklarda (har biri alohida saqlanadi)"""
+    batch_size = location_setting("ADMIN_AREA_BATCH_SIZE")
+    return sum(
+        refresh_city_admin_area(city_ids[offset:offset + batch_size])
+        for offset in range(0, len(city_ids), batch_size)
+    )
@@ -0,0 +1,48 @@
+# tasks/geocode_tasks.py
+import asyncio
+import logging
+
+from celery import shared_task
+
+from bot_app.models import GeocodeCache
+from bot_app.services.geocode_cache import GeocodeCacheService
+from bot_app.services.geocode_warmer import GeocodeWarmer
+from bot_app.services.location_service import GlobalLocationService
+from bot_app.utils.location_settings import location_setting
+from bot_app.utils.rate_limiter import PRIORITY_BACKGROUND, request_priority
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_geocode_entry(key: str):
+    """Muddati o'tgan geocode cache yozuvini Nominatim orqali yangilash"""
+    entry = GeocodeCache.objects.filter(key=key).first()
+    if entry is None or not entry.is_expired:
+        return False
+
+    with request_priority(PRIORITY_BACKGROUND):
+        value = asyncio.run(GlobalLocationService.fetch_geocode(entry.kind, entry.query))
+
+    if not GeocodeCacheService.is_cacheable(value):
+        # Eski qiymat saqlanib qoladi, keyingi so'rovda yana urinib ko'riladi
+        logger.info(f"Geocode cache refresh failed for {key}")
+        return False
+
+    GeocodeCacheService.store(key, entry.kind, entry.query, value)
+    return True
+
+
+@shared_task
+def prune_geocode_cache():
+    """Uzoq vaqt yangilanmagan geocode cache yozuvlarini o'chirish"""
+    deleted = GeocodeCacheService.prune(location_setting("GEOCODE_MAX_STALE_DAYS"))
+    logger.info(f"Geocode cache pruned: {deleted}")
+    return deleted
+
+
+@shared_task
+def warm_city_geocode_cache():
+    """Ruxsat etilgan shaharlarning geocode yozuvlarini muddati tugashidan oldin yangilash"""
+    with request_priority(PRIORITY_BACKGROUND):
+        return GeocodeWarmer.warm()
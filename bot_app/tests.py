@@ -1,6 +1,45 @@
+import asyncio
+import json
+from importlib import import_module
+import os
+import tempfile
+import random
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
-from .models import Order, Driver
+from django.db import IntegrityError, connection, transaction
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import (
+    BotClient, Car, City, CityPrice, Driver, GeocodeCache, Order, PassengerPost, PassengerTravel, Route,
+    RouteCashback, Tariff,
+)
+from .services.boundary_resolver import BoundaryResolver
+from .services.city_geocoder import CityGeocoder
+from .services.city_importer import CityImporter
+from .services.city_locator import CityLocator
+from .services.geocode_warmer import GeocodeWarmer
+from .services.location_service import GlobalLocationService
+from .services.order_journey import OrderJourney
+from .services.reference_data import ReferenceData
+from .utils.boundary_index import BoundaryIndex
+from .utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from .utils.geo_utils import haversine_km, haversine_many
+from .utils.geocode_result import PlaceInfo
+from .utils.geohash import geohash_encode
+from .utils.fake_nominatim import FakeNominatim
+from .utils import nominatim_utils
+from .utils.nominatim_utils import aget_coords_from_place, aget_place_from_coords, parse_address
+from .utils.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, TokenBucketLimiter
+from .utils.spatial_index import GeoGridIndex
+from .views.city_views import CityViewSet
 
 
 class OrderDriverAssignmentTest(TestCase):
@@ -27,4 +66,847 @@ class OrderDriverAssignmentTest(TestCase):
 
         # Order hali ham eski driverga biriktirilgan bo'lishi kerak
         refreshed_order = Order.objects.get(pk=self.order.pk)
-        self.assertEqual(refreshed_order.driver, self.driver1)
\ No newline at end of file
+        self.assertEqual(refreshed_order.driver, self.driver1)
+
+@patch("bot_app.signals.order_signals.notify_passenger_bot")
+class OrderDriverFeeTest(TestCase):
+    def test_fee_deducted_from_order_price(self, notify_mock):
+        driver = Driver.objects.create(telegram_id=1)
+        priced = Order.objects.create(user=1, price=120000)
+        unpriced = Order.objects.create(user=2)
+
+        priced.driver = driver
+        priced.save()
+        driver.refresh_from_db()
+        self.assertEqual(driver.amount, 150000 - 6000)
+
+        unpriced.driver = driver
+        unpriced.save()
+        driver.refresh_from_db()
+        self.assertEqual(driver.amount, 150000 - 6000)
+        self.assertEqual(notify_mock.delay.call_count, 2)
+
+
+class OrderListQueriesTest(TestCase):
+    def setUp(self):
+        tashkent = City.objects.create(title="Toshkent", latitude=41.3111, longitude=69.2797)
+        kokand = City.objects.create(title="Qo'qon", latitude=40.5286, longitude=70.9425)
+        self.route = Route.objects.create(from_city=tashkent, to_city=kokand)
+        self.tariff = Tariff.objects.create(title="Econom")
+        CityPrice.objects.create(route=self.route, tariff=self.tariff, price=120000)
+        BotClient.objects.create(telegram_id=100, full_name="Yo'lovchi")
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("bot", password="x"))
+
+    def add_orders(self, count):
+        for i in range(count):
+            driver = Driver.objects.create(telegram_id=Driver.objects.count() + 1, route_id=self.route)
+            Car.objects.create(driver=driver, car_number=f"01A{driver.pk:03}AA", car_model="Cobalt", car_color="oq",
+                               tariff=self.tariff)
+            model = PassengerTravel if i % 2 else PassengerPost
+            # Journey post_save signali Order yaratadi; driver signal larsiz biriktiriladi
+            journey = model.objects.create(user=100, route=self.route, tariff=self.tariff, start_time=timezone.now())
+            OrderJourney.orders(journey).update(driver=driver)
+
+    def test_query_count_does_not_grow_with_page(self):
+        self.add_orders(2)
+        ReferenceData.get_snapshot()
+        # Sahifa raqamli javob - COUNT bilan
+        with self.assertNumQueries(6):
+            response = self.client.get("/api/v1/orders/")
+        self.assertEqual(response.json()["results"][0]["content_object"]["price"], 120000)
+
+        self.add_orders(10)
+        with self.assertNumQueries(6):
+            response = self.client.get("/api/v1/orders/")
+        self.assertEqual(len(response.json()["results"]), 12)
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/v1/orders/user/100/")
+
+        order = response.json()[0]
+        self.assertEqual(order["creator"]["telegram_id"], 100)
+        self.assertEqual(order["driver_details"]["cars"][0]["tariff"]["title"], "Econom")
+        self.assertEqual(order["driver_details"]["route_id"]["to_city"]["title"], "Qo'qon")
+
+
+class OrderJourneyFieldsTest(TestCase):
+    def setUp(self):
+        self.tashkent = City.objects.create(title="Toshkent")
+        kokand = City.objects.create(title="Qo'qon")
+        andijan = City.objects.create(title="Andijon")
+        self.route = Route.objects.create(from_city=self.tashkent, to_city=kokand)
+        self.other_route = Route.objects.create(from_city=andijan, to_city=kokand)
+        self.econom = Tariff.objects.create(title="Econom")
+        CityPrice.objects.create(route=self.route, tariff=self.econom, price=120000)
+        CityPrice.objects.create(route=self.other_route, tariff=self.econom, price=90000)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("bot", password="x"))
+
+    def order_ids(self, query):
+        return [order["id"] for order in self.client.get(f"/api/v1/orders/?{query}").json()["results"]]
+
+    def test_filters_use_order_columns(self):
+        travel = PassengerTravel.objects.create(user=1, route=self.route, tariff=self.econom, start_time=timezone.now())
+        post = PassengerPost.objects.create(user=1, route=self.other_route, tariff=self.econom,
+                                            start_time=timezone.now())
+        travel_order = travel.orders.get()
+        post_order = post.orders.get()
+        self.assertEqual((travel_order.journey, post_order.journey), (travel, post))
+        self.assertEqual((travel_order.from_city, travel_order.price), (self.tashkent, 120000))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Order.objects.filter(pk=travel_order.pk).update(post=post)
+
+        self.assertEqual(self.order_ids("from_city=toshkent"), [travel_order.pk])
+        self.assertEqual(self.order_ids(f"to_city={self.route.to_city_id}&min_price=100000"), [travel_order.pk])
+        self.assertEqual(self.order_ids("max_price=100000&travel_class=econom"), [post_order.pk])
+
+        # Journey yo'nalishi o'zgarsa order ustunlari ham yangilanadi
+        travel.route = self.other_route
+        travel.save()
+        self.assertEqual(sorted(self.order_ids("from_city=Andijon")), sorted([travel_order.pk, post_order.pk]))
+
+    def test_price_read_from_db_and_unchanged_journey_not_synced(self):
+        ReferenceData.invalidate()
+        self.addCleanup(ReferenceData.invalidate)
+        self.assertEqual(ReferenceData.get_snapshot().price(self.route.pk, self.econom.pk), 120000)
+        # Signal siz o'zgarish - snapshot eskirgan
+        CityPrice.objects.filter(route=self.route).update(price=130000)
+
+        travel = PassengerTravel.objects.create(user=1, route=self.route, tariff=self.econom, start_time=timezone.now())
+        self.assertEqual(travel.orders.get().price, 130000)
+
+        travel = PassengerTravel.objects.get(pk=travel.pk)
+        travel.comment = "izoh"
+        # Faqat journey UPDATE i - yo'nalish/tarif o'zgarmagan
+        with self.assertNumQueries(1):
+            travel.save()
+
+        travel.tariff = Tariff.objects.create(title="Comfort")
+        travel.save()
+        self.assertEqual((travel.orders.get().tariff_id, travel.orders.get().price), (travel.tariff_id, None))
+
+
+class OrderJourneyLinkTest(TestCase):
+    def setUp(self):
+        self.travel = PassengerTravel.objects.create(user=1, start_time=timezone.now())
+        self.post = PassengerPost.objects.create(user=1, start_time=timezone.now())
+        self.travel_order = self.travel.orders.get()
+        self.post_order = self.post.orders.get()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("bot", password="x"))
+
+    def order_ids(self, content_type):
+        response = self.client.get(f"/api/v1/orders/?content_type={content_type}")
+        return [order["id"] for order in response.json()["results"]]
+
+    def test_order_cannot_point_to_travel_and_post(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Order.objects.create(user=1, travel=self.travel, post=self.post)
+
+    def test_backfill_migration_fills_fks_used_by_filter(self):
+        # Migratsiyadan oldingi holat: faqat content_type/object_id
+        Order.objects.update(travel=None, post=None)
+        self.assertEqual(self.order_ids("passengertravel"), [])
+
+        backfill = import_module("bot_app.migrations.0021_backfill_order_journey_fks").backfill_order_journey_fks
+        backfill(apps, None)
+
+        self.travel_order.refresh_from_db()
+        self.post_order.refresh_from_db()
+        self.assertEqual((self.travel_order.travel, self.travel_order.post), (self.travel, None))
+        self.assertEqual((self.post_order.travel, self.post_order.post), (None, self.post))
+
+        self.assertEqual(self.order_ids("passengertravel"), [self.travel_order.pk])
+        self.assertEqual(self.order_ids("PassengerPost"), [self.post_order.pk])
+        self.assertEqual(self.order_ids("driver"), [])
+
+
+class CreatedAtCursorPaginationTest(TestCase):
+    def setUp(self):
+        # Bir xil created_at - tartib id bo'yicha davom etadi
+        self.created_at = timezone.now()
+        self.orders = [Order.objects.create(user=i) for i in range(5)]
+        Order.objects.update(created_at=self.created_at)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("bot", password="x"))
+
+    def test_pages_are_stable_under_inserts(self):
+        first = self.client.get("/api/v1/orders/?cursor=&page_size=2&with_count=1").json()
+        self.assertEqual([o["id"] for o in first["results"]], [self.orders[4].pk, self.orders[3].pk])
+        self.assertEqual((first["previous"], first["approximate_count"]), (None, 5))
+
+        # Yangi order keyingi sahifalarni siljitmaydi
+        Order.objects.create(user=99)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(first["next"]).json()
+        self.assertFalse([q for q in queries if "COUNT(" in q["sql"] or "OFFSET" in q["sql"]])
+        self.assertEqual([o["id"] for o in second["results"]], [self.orders[2].pk, self.orders[1].pk])
+        last = self.client.get(second["next"]).json()
+        self.assertEqual(([o["id"] for o in last["results"]], last["next"]), ([self.orders[0].pk], None))
+
+        previous = self.client.get(last["previous"]).json()
+        self.assertEqual(previous["results"], second["results"])
+        self.assertEqual(self.client.get("/api/v1/orders/?cursor=xyz").status_code, 404)
+
+    def test_page_number_is_default_format(self):
+        for query in ("", "?page=1", "?ordering=created_at&cursor="):
+            response = self.client.get(f"/api/v1/orders/{query}").json()
+            self.assertEqual(list(response), ["count", "next", "previous", "results"])
+            self.assertEqual(response["count"], 5)
+
+
+class ReferenceDataTest(TestCase):
+    def setUp(self):
+        tashkent = City.objects.create(title="Toshkent")
+        self.kokand = City.objects.create(title="Qo'qon")
+        self.route = Route.objects.create(from_city=tashkent, to_city=self.kokand)
+        self.tariff = Tariff.objects.create(title="Econom")
+        self.price = CityPrice.objects.create(route=self.route, tariff=self.tariff, price=120000)
+
+    def test_snapshot_reloaded_after_change(self):
+        snapshot = ReferenceData.get_snapshot()
+        self.assertEqual(snapshot.price(self.route.pk, self.tariff.pk), 120000)
+        self.assertEqual(snapshot.cashback(self.route.pk), 0)
+        with self.assertNumQueries(0):
+            self.assertIs(ReferenceData.get_snapshot(), snapshot)
+
+        self.price.price = 130000
+        self.price.save()
+        RouteCashback.objects.create(route=self.route, order_cashback=0.02)
+        self.kokand.title = "Qo'qon shahri"
+        self.kokand.save()
+
+        snapshot = ReferenceData.get_snapshot()
+        self.assertEqual(snapshot.price(self.route.pk, self.tariff.pk), 130000)
+        self.assertEqual(snapshot.cashback(self.route.pk), 0.02)
+        self.assertEqual(snapshot.routes[self.route.pk].to_city.title, "Qo'qon shahri")
+
+
+class CityLocatorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tashkent = City.objects.create(title="Toshkent", latitude=41.3111, longitude=69.2797)
+        self.kokand = City.objects.create(title="Qo'qon", latitude=40.5286, longitude=70.9425)
+
+    @patch("bot_app.services.location_service.aget_coords_from_place", new_callable=AsyncMock)
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_find_city_uses_db_coordinates(self, reverse_mock, search_mock):
+        """Snapshot rejimida shaharlar uchun Nominatim search chaqirilmaydi"""
+        reverse_mock.return_value = {"shahar_tuman": "Toshkent"}
+
+        city, distance, _ = async_to_sync(GlobalLocationService.find_city_for_location)(41.31, 69.28)
+
+        self.assertEqual(city, self.tashkent)
+        self.assertLess(distance, 1)
+        search_mock.assert_not_called()
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_city_matched_across_scripts(self, reverse_mock):
+        reverse_mock.return_value = {"shahar_tuman": "Коканд"}
+        City.objects.filter(pk=self.kokand.pk).update(translate={"uz": "Qo‘qon", "ru": "Коканд", "en": "Kokand"})
+        CityLocator.invalidate()
+
+        city, _, _ = async_to_sync(GlobalLocationService.find_city_for_location)(40.53, 70.94)
+
+        self.assertEqual(city, self.kokand)
+
+    def test_search_by_name_is_fuzzy(self):
+        matches = async_to_sync(GlobalLocationService.search_cities_by_name)("Ташкент")
+        self.assertEqual(matches[0][1], self.tashkent)
+
+        matches = async_to_sync(GlobalLocationService.search_cities_by_name)("qoqon shahri")
+        self.assertEqual([city for _, city in matches], [self.kokand])
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_local_answer_when_nominatim_fails(self, reverse_mock):
+        reverse_mock.return_value = {"source": "error", "shahar_tuman": None}
+
+        city, _, address_info = async_to_sync(GlobalLocationService.find_city_for_location)(41.32, 69.29)
+
+        self.assertEqual(city, self.tashkent)
+        self.assertEqual(address_info["source"], "local")
+        self.assertFalse(GeocodeCache.objects.exists())
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_validation_uses_precomputed_admin_area(self, reverse_mock):
+        reverse_mock.return_value = {"shahar_tuman": "Toshkent"}
+        City.objects.filter(pk=self.tashkent.pk).update(admin_area={"shahar_tuman": "Toshkent"})
+        CityLocator.invalidate()
+
+        result = async_to_sync(GlobalLocationService.validate_city_location)("Toshkent", 41.31, 69.28)
+
+        self.assertTrue(result["valid"])
+        # Faqat foydalanuvchi nuqtasi geocode qilinadi
+        self.assertEqual(reverse_mock.await_count, 1)
+
+    @patch("bot_app.tasks.city_tasks.refresh_city_admin_area.apply_async")
+    def test_admin_area_refreshed_when_city_moves(self, apply_async_mock):
+        City.objects.filter(pk=self.kokand.pk).update(admin_area={"shahar_tuman": "Qo'qon"})
+        self.kokand.refresh_from_db()
+
+        # O'zgarishsiz saqlash - faqat UPDATE, eski qiymatlar uchun SELECT yo'q
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            self.kokand.save()
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            self.kokand.save(update_fields=["is_allowed"])
+        apply_async_mock.assert_not_called()
+
+        self.kokand.latitude = 40.54
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kokand.save()
+
+        self.kokand.refresh_from_db()
+        self.assertIsNone(self.kokand.admin_area)
+        apply_async_mock.assert_called_once_with(args=([self.kokand.pk],), retry=False)
+
+    def test_snapshot_reloaded_after_city_change(self):
+        snapshot = CityLocator.get_snapshot()
+        self.assertEqual(len(snapshot.points), 2)
+
+        City.objects.create(title="Andijon", latitude=40.7821, longitude=72.3442)
+
+        self.assertIsNotNone(CityLocator.get_snapshot().find_by_title("andijon"))
+
+
+class LocationCheckBatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tashkent = City.objects.create(title="Toshkent", latitude=41.3111, longitude=69.2797)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("bot", password="x"))
+        self.locations = [
+            {"latitude": 41.3110, "longitude": 69.2750},
+            {"latitude": 10.0, "longitude": 10.0},
+            {"latitude": 41.3110, "longitude": 69.2750},
+        ]
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_results_in_input_order(self, reverse_mock):
+        reverse_mock.return_value = {"shahar_tuman": "Toshkent"}
+
+        response = self.client.post("/api/v1/cities/check-location-batch/", {"locations": self.locations}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["match_type"] for r in results], ["exact", "none", "exact"])
+        # Takrorlangan nuqta qayta geocode qilinmaydi
+        self.assertEqual(reverse_mock.await_count, 2)
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_streamed_as_ndjson(self, reverse_mock):
+        reverse_mock.return_value = {"shahar_tuman": "Toshkent"}
+
+        response = self.client.post("/api/v1/cities/check-location-batch/?stream=1", self.locations, format="json")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(response).decode().splitlines()]
+        self.assertEqual([line["index"] for line in lines], [0, 1, 2])
+        self.assertEqual(lines[0]["city"]["id"], self.tashkent.pk)
+
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_check_location_response_memoized_until_city_changes(self, reverse_mock):
+        reverse_mock.return_value = {"source": "nominatim", "shahar_tuman": "Toshkent"}
+        find_mock = AsyncMock(wraps=GlobalLocationService.location_candidates)
+
+        with patch.object(GlobalLocationService, "location_candidates", find_mock):
+            first = self.client.post("/api/v1/cities/check-location/", self.locations[0], format="json").json()
+            # Bir necha metr nariroqdagi nuqta - o'sha katak
+            second = self.client.post(
+                "/api/v1/cities/check-location/", {"latitude": 41.31102, "longitude": 69.27503}, format="json"
+            ).json()
+            self.assertEqual(find_mock.await_count, 1)
+            self.assertEqual(second["city"], first["city"])
+            self.assertEqual(second["address_info"]["lat"], 41.31102)
+
+            self.tashkent.title = "Tashkent"
+            self.tashkent.save()
+            third = self.client.post("/api/v1/cities/check-location/", self.locations[0], format="json").json()
+
+        self.assertEqual(find_mock.await_count, 2)
+        self.assertEqual(third["city"]["title"], "Tashkent")
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_distance_recomputed_within_cell(self, reverse_mock):
+        reverse_mock.return_value = {"source": "nominatim", "shahar_tuman": "Toshkent"}
+        find_mock = AsyncMock(wraps=GlobalLocationService.location_candidates)
+        url = "/api/v1/cities/check-location/"
+
+        prepare_mock = patch.object(
+            CityViewSet, "_prepare_city_response", autospec=True, side_effect=CityViewSet._prepare_city_response
+        )
+
+        # Ikkala nuqta bitta geohash katagida (tx3706p), shahardan 0.94 va 1.09 km
+        with patch.object(GlobalLocationService, "location_candidates", find_mock), prepare_mock as prepare:
+            inside = self.client.post(url, {"latitude": 41.31959, "longitude": 69.2797, "max_distance_km": 1}, format="json").json()
+            outside = self.client.post(url, {"latitude": 41.32093, "longitude": 69.2797, "max_distance_km": 1}, format="json").json()
+            nearby = self.client.post(
+                "/api/v1/cities/nearby-cities/", {"latitude": 41.32093, "longitude": 69.2797, "max_distance_km": 1.2}, format="json"
+            ).json()
+
+        self.assertEqual((inside["is_in_city"], inside["distance_km"]), (True, 0.94))
+        self.assertEqual((outside["is_in_city"], outside["match_type"]), (False, "none"))
+        self.assertEqual(find_mock.await_count, 2)
+        self.assertEqual([(r["city"]["id"], r["distance_km"], r["match_type"]) for r in nearby], [(self.tashkent.pk, 1.09, "name")])
+        # Cache lanadigan shahar ma'lumoti so'rov kontekstisiz
+        self.assertEqual({call.args[2] for call in prepare.call_args_list}, {None})
+
+class AsyncCityViewTest(TestCase):
+    """CityViewSet ASGI orqali (AsyncViewSetMixin.dispatch event loop da)"""
+
+    def setUp(self):
+        cache.clear()
+        self.tashkent = City.objects.create(title="Toshkent", latitude=41.3111, longitude=69.2797)
+        self.user = get_user_model().objects.create_user("bot", password="x")
+        self.client = AsyncClient()
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    async def test_check_location(self, reverse_mock):
+        reverse_mock.return_value = {"source": "nominatim", "shahar_tuman": "Toshkent"}
+        await self.client.aforce_login(self.user)
+
+        response = await self.client.post(
+            "/api/v1/cities/check-location/", {"latitude": 41.3110, "longitude": 69.2750}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["is_in_city"], data["match_type"]), (True, "exact"))
+        self.assertEqual(data["city"]["id"], self.tashkent.pk)
+
+    async def test_errors(self):
+        url = "/api/v1/cities/check-location/"
+        payload = {"latitude": 41.3110, "longitude": 69.2750}
+
+        # Autentifikatsiya (sync_to_async dagi initial) xatosi handle_exception orqali
+        response = await self.client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+
+        await self.client.aforce_login(self.user)
+        with patch.object(GlobalLocationService, "location_candidates", AsyncMock(side_effect=RuntimeError("down"))):
+            response = await self.client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {"error": "Internal server error", "details": "down"})
+
+
+class GeoGridIndexTest(SimpleTestCase):
+    def setUp(self):
+        rnd = random.Random(42)
+        self.points = [(i, rnd.uniform(37, 46), rnd.uniform(56, 73)) for i in range(2000)]
+        self.index = GeoGridIndex(self.points, cell_size_deg=0.25)
+
+    def _brute_force(self, lat, lon):
+        return sorted((haversine_km(lat, lon, p_lat, p_lon), i) for i, p_lat, p_lon in self.points)
+
+    def test_within_matches_linear_scan(self):
+        expected = [i for d, i in self._brute_force(41.3, 69.2) if d <= 50]
+        self.assertEqual([i for _, i in self.index.within(41.3, 69.2, 50)], expected)
+
+    def test_haversine_many_matches_scalar(self):
+        lats = [lat for _, lat, _ in self.points]
+        lons = [lon for _, _, lon in self.points]
+        distances = haversine_many(41.3, 69.2, lats, lons)
+        for distance, lat, lon in zip(distances, lats, lons):
+            self.assertAlmostEqual(distance, haversine_km(41.3, 69.2, lat, lon), places=6)
+
+    def test_nearest_matches_linear_scan(self):
+        expected = [i for _, i in self._brute_force(40.5, 71.0)[:5]]
+        self.assertEqual([i for _, i in self.index.nearest(40.5, 71.0, k=5)], expected)
+
+
+class GeocodeSingleFlightTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_concurrent_lookups_share_one_call(self, reverse_mock):
+        async def slow_lookup(lat, lon):
+            await asyncio.sleep(0.05)
+            return {"shahar_tuman": "Toshkent"}
+
+        reverse_mock.side_effect = slow_lookup
+
+        async def burst():
+            return await asyncio.gather(*[GlobalLocationService.get_place_info(41.3111, 69.2797) for _ in range(20)])
+
+        results = async_to_sync(burst)()
+
+        self.assertEqual(reverse_mock.await_count, 1)
+        self.assertTrue(all(result["shahar_tuman"] == "Toshkent" for result in results))
+
+
+
+@patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+class GeocodeCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_result_survives_local_cache_loss(self, reverse_mock):
+        reverse_mock.return_value = {"shahar_tuman": "Toshkent"}
+        async_to_sync(GlobalLocationService.get_place_info)(41.3111, 69.2797)
+
+        cache.clear()  # deploy / boshqa process
+        result = async_to_sync(GlobalLocationService.get_place_info)(41.3111, 69.2797)
+
+        self.assertEqual(result["shahar_tuman"], "Toshkent")
+        self.assertEqual(reverse_mock.await_count, 1)
+        self.assertEqual(GeocodeCache.objects.get().hit_count, 1)
+
+    def test_nearby_points_share_geohash_cell(self, reverse_mock):
+        reverse_mock.return_value = {"shahar_tuman": "Toshkent", "viloyat": "Toshkent"}
+
+        # GPS "titrashi": bir necha metr farq qiladigan nuqtalar
+        first = async_to_sync(GlobalLocationService.get_place_info)(41.31110, 69.27500)
+        second = async_to_sync(GlobalLocationService.get_place_info)(41.31125, 69.27521)
+
+        self.assertEqual(reverse_mock.await_count, 1)
+        self.assertEqual(first["shahar_tuman"], second["shahar_tuman"])
+        self.assertEqual((second["lat"], second["lon"]), (41.31125, 69.27521))
+
+    @patch("bot_app.services.geocode_cache.GeocodeCacheService._schedule_refresh")
+    def test_expired_entry_served_and_refreshed_in_background(self, refresh_mock, reverse_mock):
+        GeocodeCache.objects.create(
+            key=f"place_info_{geohash_encode(41.3111, 69.2797, 6)}",
+            kind=GeocodeCache.Kind.REVERSE,
+            query={"lat": 41.3111, "lon": 69.2797},
+            payload={"shahar_tuman": "Toshkent"},
+            expires_at=timezone.now() - timedelta(days=1),
+        )
+        # Broker ga ulanish event loop dan tashqarida (thread da) bo'lishi kerak
+        on_event_loop = []
+
+        def running_loop(key):
+            try:
+                on_event_loop.append(asyncio.get_running_loop() is not None)
+            except RuntimeError:
+                on_event_loop.append(False)
+        refresh_mock.side_effect = running_loop
+
+        result = async_to_sync(GlobalLocationService.get_place_info)(41.3111, 69.2797)
+
+        self.assertEqual(result["shahar_tuman"], "Toshkent")
+        reverse_mock.assert_not_awaited()
+        refresh_mock.assert_called_once_with(f"place_info_{geohash_encode(41.3111, 69.2797, 6)}")
+        self.assertEqual(on_event_loop, [False])
+
+
+    def test_legacy_raw_payload_is_compacted(self, reverse_mock):
+        GeocodeCache.objects.create(
+            key=f"place_info_{geohash_encode(41.3111, 69.2797, 6)}",
+            kind=GeocodeCache.Kind.REVERSE,
+            query={"lat": 41.3111, "lon": 69.2797},
+            payload={"source": "nominatim", "shahar_tuman": "Toshkent", "raw": {"osm_id": 1}},
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+
+        result = async_to_sync(GlobalLocationService.get_place_info)(41.3111, 69.2797)
+
+        self.assertEqual(set(result), set(PlaceInfo.FIELDS))
+        self.assertEqual(result["shahar_tuman"], "Toshkent")
+
+    def test_raw_payload_only_with_debug_flag(self, reverse_mock):
+        data = {"display_name": "Yunusobod, Toshkent", "address": {"city": "Toshkent"}}
+
+        self.assertNotIn("raw", parse_address(data))
+        with patch.dict("django.conf.settings.LOCATION_SERVICE", {"GEOCODE_DEBUG_RAW": True}):
+            self.assertEqual(parse_address(data)["raw"], data)
+
+@patch("bot_app.services.location_service.aget_coords_from_place", new_callable=AsyncMock)
+@patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+class GeocodeWarmerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        City.objects.create(title="Toshkent", latitude=41.3111, longitude=69.2797)
+        City.objects.create(title="Yopiq", latitude=40.5286, longitude=70.9425, is_allowed=False)
+
+    def test_warms_forward_and_reverse_entries_once(self, reverse_mock, search_mock):
+        reverse_mock.return_value = {"source": "nominatim", "shahar_tuman": "Toshkent"}
+        search_mock.return_value = [{"lat": 41.3, "lon": 69.28}]
+
+        first = GeocodeWarmer.warm()
+        second = GeocodeWarmer.warm()
+
+        self.assertEqual((first["refreshed"], second["refreshed"], second["fresh"]), (2, 0, 2))
+        self.assertEqual(reverse_mock.await_count + search_mock.await_count, 2)
+        self.assertEqual(GeocodeWarmer.status()["coverage"], 1.0)
+
+        # Warmer yozgan yozuv foydalanuvchi so'roviga Nominatim siz javob beradi
+        coords = async_to_sync(GlobalLocationService.get_city_coordinates)("Toshkent")
+        self.assertEqual(coords, (41.3, 69.28))
+        self.assertEqual(search_mock.await_count, 1)
+
+@patch("bot_app.services.city_locator.CityLocator._schedule_backfill")
+@patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+@patch("bot_app.services.location_service.aget_coords_from_place", new_callable=AsyncMock)
+class CityGeocoderTest(TestCase):
+    def test_missing_cities_geocoded_in_one_pass(self, search_mock, reverse_mock, backfill_mock):
+        found = City.objects.create(title="Andijon")
+        missing = City.objects.create(title="Noma'lum")
+        search_mock.side_effect = lambda name, **kwargs: [{"lat": 40.78, "lon": 72.34}] if name == "Andijon" else []
+        reverse_mock.return_value = {"source": "nominatim", "shahar_tuman": "Andijon", "viloyat": "Andijon"}
+
+        progress = []
+        result = CityGeocoder.geocode(
+            [found, missing], progress=lambda done, total, title, coords: progress.append((done, total))
+        )
+
+        self.assertEqual((result["updated"], result["failed"]), ([found.pk], ["Noma'lum"]))
+        self.assertEqual(sorted(progress), [(1, 2), (2, 2)])
+        found.refresh_from_db()
+        self.assertEqual((found.latitude, found.longitude), (40.78, 72.34))
+        self.assertIsNotNone(CityLocator.get_snapshot().find_by_title("andijon"))
+
+    def test_regeocode_bypasses_cached_result(self, search_mock, reverse_mock, backfill_mock):
+        cache.clear()
+        city = City.objects.create(title="Andijon", latitude=1.0, longitude=1.0)
+        key, _ = GlobalLocationService.city_coordinates_cache_entry("Andijon")
+        # Noto'g'ri natija cache da
+        cache.set(key, [1.0, 1.0], 300)
+        search_mock.return_value = [{"lat": 40.78, "lon": 72.34}]
+
+        self.assertEqual(CityGeocoder.geocode([city])["updated"], [])
+        search_mock.assert_not_awaited()
+
+        result = CityGeocoder.geocode([city], refresh=True)
+
+        self.assertEqual(result["updated"], [city.pk])
+        self.assertEqual(search_mock.await_count, 1)
+        self.assertEqual(tuple(cache.get(key)), (40.78, 72.34))
+
+    @patch.dict("django.conf.settings.LOCATION_SERVICE", {"ADMIN_AREA_FETCH_CONCURRENCY": 3})
+    def test_admin_areas_fetched_with_bounded_concurrency(self, search_mock, reverse_mock, backfill_mock):
+        running, peak = 0, 0
+
+        async def fetch_admin_area(lat, lon):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            return {"shahar_tuman": f"{lat}"}
+
+        points = [(40.0 + i, 70.0) for i in range(20)]
+        with patch.object(GlobalLocationService, "fetch_admin_area", fetch_admin_area):
+            areas = async_to_sync(GlobalLocationService.batch_fetch_admin_areas)(points)
+
+        self.assertEqual(peak, 3)
+        self.assertEqual([area["shahar_tuman"] for area in areas], [f"{lat}" for lat, _ in points])
+
+class CityImporterTest(TestCase):
+    PLACES = [
+        # geonameid, name, ..., feature class/code, country, admin1, admin2, population
+        ("1484841", "Andijan Region", "40.75", "72.33", "A", "ADM1", "UZ", "01", "", "3000000"),
+        ("1538000", "Asaka District", "40.63", "72.23", "A", "ADM2", "UZ", "01", "1707", "0"),
+        ("1514588", "Andijan", "40.78", "72.34", "P", "PPLA", "UZ", "01", "", "400000"),
+        ("1514000", "Asaka", "40.64", "72.24", "P", "PPL", "UZ", "01", "1707", "50000"),
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "UZ.txt")
+        self._write_places(self.PLACES)
+        self.alternate_path = os.path.join(self.directory.name, "alternate.txt")
+        with open(self.alternate_path, "w", encoding="utf-8") as f:
+            f.write("\t".join(["1", "1514588", "uz", "Andijon", "1", "", "", ""]) + "\n")
+            f.write("\t".join(["2", "1514588", "ru", "Андижан", "", "", "", ""]) + "\n")
+        self.andijon = City.objects.create(title="Andijon")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write_places(self, places):
+        with open(self.path, "w", encoding="utf-8") as f:
+            for gid, name, lat, lon, fclass, fcode, country, admin1, admin2, population in places:
+                columns = [gid, name, name, "", lat, lon, fclass, fcode, country, "", admin1, admin2, "", "",
+                           population, "", "", "Asia/Tashkent", "2024-01-01"]
+                f.write("\t".join(columns) + "\n")
+
+    def test_region_not_linked_to_city_with_same_name(self):
+        self._write_places([
+            ("1114927", "Samarqand Viloyati", "39.75", "66.5", "A", "ADM1", "UZ", "10", "", "3000000"),
+            ("1216265", "Samarqand", "39.65417", "66.95972", "P", "PPLA", "UZ", "10", "", "500000"),
+        ])
+        admin_area = {"shahar_tuman": "Samarqand", "viloyat": "Samarqand viloyati"}
+        samarqand = City.objects.create(title="Samarqand", latitude=39.6542, longitude=66.9597, is_allowed=True)
+        City.objects.filter(pk=samarqand.pk).update(admin_area=admin_area)
+
+        stats = CityImporter(self.path).run()
+
+        self.assertEqual((stats["created"], stats["linked"]), (1, 1))
+        samarqand.refresh_from_db()
+        self.assertEqual(samarqand.geonames_id, 1216265)
+        self.assertEqual((samarqand.latitude, samarqand.longitude), (39.6542, 66.9597))
+        self.assertEqual(samarqand.admin_area, admin_area)
+        self.assertEqual(samarqand.subcategory.title, "Samarqand Viloyati")
+        self.assertEqual(City.objects.filter(title="Samarqand").count(), 1)
+
+    def test_import_builds_hierarchy_and_is_idempotent(self):
+        importer = CityImporter(self.path, alternate_names=self.alternate_path)
+        stats = importer.run()
+
+        self.assertEqual((stats["created"], stats["linked"]), (3, 1))
+        self.andijon.refresh_from_db()
+        self.assertEqual(self.andijon.geonames_id, 1514588)
+        self.assertEqual(self.andijon.translate, {"uz": "Andijon", "ru": "Андижан"})
+        self.assertEqual(self.andijon.subcategory.title, "Andijan Region")
+        asaka = City.objects.get(geonames_id=1514000)
+        self.assertEqual(asaka.subcategory.title, "Asaka District")
+        self.assertFalse(asaka.is_allowed)
+
+        stats = CityImporter(self.path, alternate_names=self.alternate_path).run()
+        self.assertEqual((stats["created"], stats["updated"], stats["unchanged"]), (0, 0, 4))
+        self.assertEqual(City.objects.count(), 4)
+
+@patch("bot_app.utils.rate_limiter.get_redis", return_value=None)
+class FakeNominatimTest(SimpleTestCase):
+    def setUp(self):
+        self.fake = FakeNominatim([("Toshkent", "Toshkent", 41.3111, 69.2797), ("Andijon", "Andijon", 40.78, 72.34)])
+        self.url = self.fake.start()
+        self.addCleanup(self.fake.stop)
+
+    def test_reverse_geocoding_through_configured_url(self, redis_mock):
+        with patch.dict("django.conf.settings.LOCATION_SERVICE", {"NOMINATIM_URL": self.url}):
+            result = async_to_sync(aget_place_from_coords)(40.80, 72.30)
+
+        self.assertEqual((result["source"], result["shahar_tuman"]), ("nominatim", "Andijon"))
+        self.assertEqual(self.fake.counts["reverse"], 1)
+
+    @patch.dict("django.conf.settings.LOCATION_SERVICE", {"NOMINATIM_RATE_LIMIT": 100.0})
+    def test_session_reused_and_recreated_after_close(self, redis_mock):
+        with patch.dict("django.conf.settings.LOCATION_SERVICE", {"NOMINATIM_URL": self.url}):
+            async_to_sync(aget_place_from_coords)(41.30, 69.28)
+            session = nominatim_utils._session
+            async_to_sync(aget_place_from_coords)(40.80, 72.30)
+            self.assertIs(nominatim_utils._session, session)
+
+            loop = nominatim_utils._get_io_loop()
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result(5)
+            result = async_to_sync(aget_place_from_coords)(40.80, 72.30)
+
+        self.assertEqual(result["source"], "nominatim")
+        self.assertIsNot(nominatim_utils._session, session)
+        self.assertFalse(nominatim_utils._session.closed)
+        self.assertEqual(self.fake.counts["reverse"], 3)
+
+    def test_search_error_uses_place_info_schema(self, redis_mock):
+        self.fake.error_rate = 1.0
+        self.addCleanup(nominatim_utils.breaker.reset)
+        with patch.dict("django.conf.settings.LOCATION_SERVICE", {"NOMINATIM_URL": self.url}):
+            results = async_to_sync(aget_coords_from_place)("Andijon", "uz")
+
+        self.assertEqual(results, [PlaceInfo("error", display_name="Andijon", full_address="Andijon",
+                                             error=results[0]["error"]).to_dict()])
+        self.assertTrue(results[0]["error"])
+
+@patch("bot_app.utils.rate_limiter.get_redis", return_value=None)
+class TokenBucketLimiterTest(SimpleTestCase):
+    @patch.dict("django.conf.settings.LOCATION_SERVICE", {"NOMINATIM_RATE_LIMIT": 20.0})
+    def test_interactive_requests_go_before_background(self, _):
+        limiter = TokenBucketLimiter("test")
+        order = []
+
+        async def worker(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        async def run():
+            await limiter.acquire(PRIORITY_INTERACTIVE)  # bucket bo'shatiladi
+            background = [asyncio.create_task(worker("bg", PRIORITY_BACKGROUND)) for _ in range(2)]
+            await asyncio.sleep(0)
+            interactive = [asyncio.create_task(worker("ui", PRIORITY_INTERACTIVE)) for _ in range(2)]
+            await asyncio.gather(*background, *interactive)
+
+        async_to_sync(run)()
+
+        self.assertEqual(order, ["ui", "ui", "bg", "bg"])
+
+
+
+def _square(min_lon, min_lat, max_lon, max_lat):
+    return [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+
+
+BOUNDARIES = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"admin_level": "4", "name": "Toshkent viloyati"},
+            "geometry": {"type": "Polygon", "coordinates": [_square(68.0, 40.0, 71.0, 42.0)]},
+        },
+        {
+            # Teshikli tuman: teshik ichi boshqa tuman
+            "type": "Feature",
+            "properties": {"admin_level": "6", "name": "Zangiota tumani"},
+            "geometry": {"type": "Polygon", "coordinates": [
+                _square(69.0, 41.0, 69.5, 41.5), _square(69.2, 41.2, 69.35, 41.35),
+            ]},
+        },
+        {
+            "type": "Feature",
+            "properties": {"admin_level": "6", "name:uz": "Toshkent", "name": "Tashkent"},
+            "geometry": {"type": "MultiPolygon", "coordinates": [[_square(69.2, 41.2, 69.35, 41.35)]]},
+        },
+    ],
+}
+
+
+class BoundaryIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = BoundaryIndex.from_geojson(BOUNDARIES)
+
+    def test_resolve_respects_holes(self):
+        self.assertEqual(self.index.resolve(41.3, 69.28)["shahar_tuman"], "Toshkent")
+        self.assertEqual(self.index.resolve(41.1, 69.1)["shahar_tuman"], "Zangiota tumani")
+
+        result = self.index.resolve(40.5, 68.5)
+        self.assertIsNone(result["shahar_tuman"])
+        self.assertEqual(result["viloyat"], "Toshkent viloyati")
+        self.assertIsNone(self.index.resolve(10.0, 10.0))
+
+    @patch("bot_app.services.location_service.aget_place_from_coords", new_callable=AsyncMock)
+    def test_place_info_resolved_offline(self, reverse_mock):
+        with tempfile.NamedTemporaryFile("w", suffix=".geojson", delete=False) as f:
+            json.dump(BOUNDARIES, f)
+        self.addCleanup(os.unlink, f.name)
+
+        BoundaryResolver.reset()
+        self.addCleanup(BoundaryResolver.reset)
+        with patch.dict("django.conf.settings.LOCATION_SERVICE", {"BOUNDARIES_GEOJSON": f.name}):
+            result = async_to_sync(GlobalLocationService.get_place_info)(41.3, 69.28)
+
+        reverse_mock.assert_not_awaited()
+        self.assertEqual(result["source"], "boundaries")
+        self.assertEqual((result["shahar_tuman"], result["viloyat"]), ("Toshkent", "Toshkent viloyati"))
+
+
+@patch.dict("django.conf.settings.LOCATION_SERVICE", {
+    "NOMINATIM_BREAKER_MIN_CALLS": 2,
+    "NOMINATIM_BREAKER_OPEN_SECONDS": 0.05,
+})
+class CircuitBreakerTest(SimpleTestCase):
+    def test_opens_on_errors_and_recovers_after_probe(self):
+        breaker = CircuitBreaker("test", "NOMINATIM_BREAKER")
+
+        async def call(fail):
+            async with breaker.guard():
+                if fail:
+                    raise ConnectionError("down")
+
+        async def scenario():
+            for _ in range(2):
+                with self.assertRaises(ConnectionError):
+                    await call(True)
+            self.assertEqual(breaker.state, "open")
+            with self.assertRaises(CircuitOpenError):
+                breaker.check()
+
+            await asyncio.sleep(0.06)
+            self.assertEqual(breaker.state, "half_open")
+            await call(False)
+            self.assertEqual(breaker.state, "closed")
+
+        async_to_sync(scenario)()
+
+        totals = breaker.snapshot()["totals"]
+        self.assertEqual((totals["opened"], totals["rejected"]), (1, 1))
@@ -0,0 +1,166 @@
+# utils/boundary_index.py
+import json
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .geocode_result import PlaceInfo
+
+Cell = Tuple[int, int]
+BBox = Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+
+# OSM admin_level -> parse_address maydoni
+DEFAULT_LEVELS = {
+    "4": "viloyat",
+    "5": "shahar_tuman",
+    "6": "shahar_tuman",
+    "7": "shahar_tuman",
+    "8": "mahalla",
+    "9": "mahalla",
+    "10": "mahalla",
+}
+DEFAULT_NAME_PROPERTIES = ("name:uz", "name")
+
+
+class _Ring:
+    """Polygon halqasi: qirralar numpy massivlarida (lon = x, lat = y)"""
+
+    __slots__ = ("x1", "y1", "x2", "y2")
+
+    def __init__(self, coords: List[List[float]]):
+        points = np.asarray(coords, dtype=np.float64)[:, :2]
+        self.x1, self.y1 = points[:, 0], points[:, 1]
+        self.x2, self.y2 = np.roll(self.x1, -1), np.roll(self.y1, -1)
+
+    def contains(self, lon: float, lat: float) -> bool:
+        # Ray casting: o'ngga chiqqan nur qirralarni necha marta kesadi
+        crosses = (self.y1 > lat) != (self.y2 > lat)
+        if not crosses.any():
+            return False
+        x1, y1, x2, y2 = self.x1[crosses], self.y1[crosses], self.x2[crosses], self.y2[crosses]
+        x_at_lat = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+        return bool(np.count_nonzero(lon < x_at_lat) % 2)
+
+
+class Boundary:
+    """Bitta ma'muriy hudud (Polygon yoki MultiPolygon)"""
+
+    def __init__(self, field: str, name: str, polygons: List[List[List[List[float]]]], properties: Dict[str, Any]):
+        self.field = field
+        self.name = name
+        self.properties = properties
+        # Har bir qism: (bbox, outer ring, holes)
+        self.parts: List[Tuple[BBox, _Ring, List[_Ring]]] = []
+        for rings in polygons:
+            if not rings:
+                continue
+            outer = np.asarray(rings[0], dtype=np.float64)
+            bbox = (outer[:, 0].min(), outer[:, 1].min(), outer[:, 0].max(), outer[:, 1].max())
+            self.parts.append((bbox, _Ring(rings[0]), [_Ring(hole) for hole in rings[1:]]))
+
+        self.bbox: BBox = (
+            min(part[0][0] for part in self.parts),
+            min(part[0][1] for part in self.parts),
+            max(part[0][2] for part in self.parts),
+            max(part[0][3] for part in self.parts),
+        )
+        # Bir nechta hudud mos kelsa, eng kichigi (aniqrog'i) tanlanadi
+        self.bbox_area = (self.bbox[2] - self.bbox[0]) * (self.bbox[3] - self.bbox[1])
+
+    def contains(self, lat: float, lon: float) -> bool:
+        for (min_lon, min_lat, max_lon, max_lat), outer, holes in self.parts:
+            if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+                continue
+            if outer.contains(lon, lat) and not any(hole.contains(lon, lat) for hole in holes):
+                return True
+        return False
+
+
+class BoundaryIndex:
+    """
+    Ma'muriy chegaralar (GeoJSON) uchun offline point-in-polygon indeks.
+
+    Hududlar bbox bo'yicha grid kataklariga joylanadi, so'rovda faqat nuqta katagidagi
+    va bbox i nuqtani o'z ichiga olgan hududlar polygon bo'yicha tekshiriladi.
+    Natija parse_address bilan bir xil ko'rinishda (mahalla/shahar_tuman/viloyat).
+    """
+
+    def __init__(self, boundaries: Iterable[Boundary], cell_size_deg: float = 0.1):
+        self.cell_size = cell_size_deg
+        self.boundaries: List[Boundary] = list(boundaries)
+        self._cells: Dict[Cell, List[Boundary]] = defaultdict(list)
+
+        for boundary in self.boundaries:
+            min_lon, min_lat, max_lon, max_lat = boundary.bbox
+            min_row, min_col = self._cell(min_lat, min_lon)
+            max_row, max_col = self._cell(max_lat, max_lon)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    self._cells[(row, col)].append(boundary)
+
+    def __len__(self):
+        return len(self.boundaries)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    @classmethod
+    def from_geojson(
+            cls,
+            data: Dict[str, Any],
+            levels: Optional[Dict[str, str]] = None,
+            name_properties: Iterable[str] = DEFAULT_NAME_PROPERTIES,
+            level_property: str = "admin_level",
+            cell_size_deg: float = 0.1
+    ) -> "BoundaryIndex":
+        """FeatureCollection dan indeks (faqat levels da bor admin_level lar olinadi)"""
+        levels = levels or DEFAULT_LEVELS
+        boundaries = []
+
+        for feature in data.get("features", []):
+            properties = feature.get("properties") or {}
+            geometry = feature.get("geometry") or {}
+            field = levels.get(str(properties.get(level_property)))
+            name = next((properties[key] for key in name_properties if properties.get(key)), None)
+            if not field or not name:
+                continue
+
+            if geometry.get("type") == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                continue
+            if any(rings for rings in polygons):
+                boundaries.append(Boundary(field, name, polygons, properties))
+
+        return cls(boundaries, cell_size_deg)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "BoundaryIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_geojson(json.load(f), **kwargs)
+
+    def lookup(self, lat: float, lon: float) -> Dict[str, Boundary]:
+        """Nuqtani o'z ichiga olgan eng kichik hudud, har bir maydon uchun"""
+        found: Dict[str, Boundary] = {}
+        for boundary in self._cells.get(self._cell(lat, lon), ()):
+            current = found.get(boundary.field)
+            if current is not None and current.bbox_area <= boundary.bbox_area:
+                continue
+            if boundary.contains(lat, lon):
+                found[boundary.field] = boundary
+        return found
+
+    def resolve(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """parse_address ko'rinishidagi natija yoki None (nuqta hech bir hududda emas)"""
+        found = self.lookup(lat, lon)
+        if not found:
+            return None
+
+        mahalla = found["mahalla"].name if "mahalla" in found else None
+        shahar_tuman = found["shahar_tuman"].name if "shahar_tuman" in found else None
+        viloyat = found["viloyat"].name if "viloyat" in found else None
+        return PlaceInfo.from_parts("boundaries", mahalla, shahar_tuman, viloyat).to_dict()
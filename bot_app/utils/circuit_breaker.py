@@ -0,0 +1,188 @@
+# utils/circuit_breaker.py
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+from .location_settings import location_setting
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Circuit ochiq - tashqi xizmatga so'rov yuborilmaydi, chaqiruvchi lokal javob qaytaradi"""
+
+
+class CircuitBreaker:
+    """
+    Tashqi xizmat uchun circuit breaker (process ichida).
+
+    Oxirgi WINDOW sekunddagi chaqiruvlar bo'yicha xato va sekin chaqiruvlar ulushi
+    kuzatiladi; chegara oshsa circuit OPEN_SECONDS ga ochiladi va so'rovlar darhol
+    CircuitOpenError bilan rad etiladi. Keyin half-open: HALF_OPEN_PROBES ta sinov
+    so'rovi o'tkaziladi, muvaffaqiyatli bo'lsa yopiladi, aks holda yana ochiladi.
+    Sozlamalar: {settings_prefix}_WINDOW, _MIN_CALLS, _ERROR_RATE, _SLOW_CALL,
+    _SLOW_RATE, _OPEN_SECONDS, _HALF_OPEN_PROBES (location_settings).
+    """
+
+    def __init__(self, name: str, settings_prefix: str):
+        self.name = name
+        self.settings_prefix = settings_prefix
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # (tugagan vaqt, muvaffaqiyatli, latency)
+        self._calls = deque()
+        self._counters = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    def _setting(self, name: str):
+        return location_setting(f"{self.settings_prefix}_{name}")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == STATE_OPEN and now - self._opened_at >= self._setting("OPEN_SECONDS"):
+            self._state = STATE_HALF_OPEN
+            self._probes = 0
+            logger.info(f"Circuit {self.name}: half-open")
+        return self._state
+
+    def _admit(self, take_probe: bool) -> bool:
+        """So'rovga ruxsat (aks holda CircuitOpenError); half-open da sinov so'rovimi"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == STATE_OPEN or (
+                    state == STATE_HALF_OPEN and self._probes >= self._setting("HALF_OPEN_PROBES")
+            ):
+                self._counters["rejected"] += 1
+                raise CircuitOpenError(f"{self.name}: circuit {state}")
+
+            probe = state == STATE_HALF_OPEN
+            if probe and take_probe:
+                self._probes += 1
+            return probe
+
+    def check(self):
+        """Circuit ochiq bo'lsa CircuitOpenError (sinov joyini band qilmaydi)"""
+        self._admit(take_probe=False)
+
+    @asynccontextmanager
+    async def guard(self):
+        """Tashqi chaqiruvni o'rash: natija va latency hisobga olinadi"""
+        probe = self._admit(take_probe=True)
+
+        started = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            # Natijasiz tugadi - sinov joyi bo'shatiladi
+            if probe:
+                with self._lock:
+                    self._probes = max(self._probes - 1, 0)
+            raise
+        except Exception:
+            self._record(False, time.monotonic() - started)
+            raise
+        else:
+            self._record(True, time.monotonic() - started)
+
+    def _record(self, ok: bool, latency: float):
+        slow = latency >= self._setting("SLOW_CALL")
+        with self._lock:
+            now = time.monotonic()
+            self._counters["calls"] += 1
+            self._counters["failures"] += not ok
+            self._counters["slow_calls"] += slow
+
+            self._calls.append((now, ok, latency))
+            self._prune(now)
+
+            state = self._current_state(now)
+            if state == STATE_HALF_OPEN:
+                if ok and not slow:
+                    self._state = STATE_CLOSED
+                    self._calls.clear()
+                    logger.info(f"Circuit {self.name}: closed")
+                else:
+                    self._open(now)
+            elif state == STATE_CLOSED and self._should_open():
+                self._open(now)
+
+    def _prune(self, now: float):
+        window = self._setting("WINDOW")
+        while self._calls and now - self._calls[0][0] > window:
+            self._calls.popleft()
+
+    def _rates(self):
+        total = len(self._calls)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        slow_call = self._setting("SLOW_CALL")
+        slow = sum(1 for _, _, latency in self._calls if latency >= slow_call)
+        return failures / total, slow / total
+
+    def _should_open(self) -> bool:
+        if len(self._calls) < self._setting("MIN_CALLS"):
+            return False
+        error_rate, slow_rate = self._rates()
+        return error_rate >= self._setting("ERROR_RATE") or slow_rate >= self._setting("SLOW_RATE")
+
+    def _open(self, now: float):
+        self._state = STATE_OPEN
+        self._opened_at = now
+        self._counters["opened"] += 1
+        error_rate, slow_rate = self._rates()
+        logger.warning(
+            f"Circuit {self.name}: open for {self._setting('OPEN_SECONDS')}s "
+            f"(error rate {error_rate:.2f}, slow rate {slow_rate:.2f})"
+        )
+
+    def reset(self):
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._probes = 0
+            self._calls.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Holat va metrikalar (monitoring uchun)"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            state = self._current_state(now)
+            error_rate, slow_rate = self._rates()
+            latencies = sorted(latency for _, _, latency in self._calls)
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 1)
+
+            retry_in = None
+            if state == STATE_OPEN:
+                retry_in = round(max(self._setting("OPEN_SECONDS") - (now - self._opened_at), 0), 1)
+
+            return {
+                "name": self.name,
+                "state": state,
+                "retry_in_seconds": retry_in,
+                "window": {
+                    "calls": len(self._calls),
+                    "error_rate": round(error_rate, 3),
+                    "slow_rate": round(slow_rate, 3),
+                    "latency_p50_ms": percentile(0.5),
+                    "latency_p95_ms": percentile(0.95),
+                },
+                "totals": dict(self._counters),
+            }
@@ -0,0 +1,129 @@
+# utils/fake_nominatim.py
+import asyncio
+import random
+import threading
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from aiohttp import web
+
+from .geo_utils import haversine_many
+from .name_index import normalize_name
+
+# (nom, viloyat, lat, lon)
+FakePlace = Tuple[str, Optional[str], float, float]
+
+
+class FakeNominatim:
+    """
+    Benchmark/test uchun lokal Nominatim (/reverse va /search, jsonv2).
+
+    Javoblar berilgan joylar ro'yxatidan: reverse - eng yaqin joy, search - nom bo'yicha.
+    latency_ms (+ jitter_ms) kechikish, error_rate ulushida HTTP 500 va timeout_rate
+    ulushida javobsiz osilib qolish (klient timeout i ishlaydi). counts - so'rovlar soni.
+    """
+
+    def __init__(
+            self,
+            places: List[FakePlace],
+            latency_ms: float = 0,
+            jitter_ms: float = 0,
+            error_rate: float = 0.0,
+            timeout_rate: float = 0.0,
+            seed: int = 42,
+    ):
+        self.places = places
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.counts = Counter()
+        self._random = random.Random(seed)
+        self._by_name = {normalize_name(place[0]): place for place in places}
+        self._lats = [place[2] for place in places]
+        self._lons = [place[3] for place in places]
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    @classmethod
+    def from_cities(cls, cities, **kwargs) -> "FakeNominatim":
+        """City qatorlaridan (koordinatasi borlari), viloyat - admin_area dan"""
+        places = [
+            (city.title, (city.admin_area or {}).get("viloyat"), city.latitude, city.longitude)
+            for city in cities
+            if city.latitude is not None and city.longitude is not None
+        ]
+        return cls(places, **kwargs)
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/reverse", self._reverse)
+        app.router.add_get("/search", self._search)
+        return app
+
+    async def _simulate(self, endpoint: str):
+        """Kechikish va xatolar (javob qaytarilmasa HTTPException)"""
+        self.counts[endpoint] += 1
+        delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        roll = self._random.random()
+        if roll < self.timeout_rate:
+            self.counts["timeouts"] += 1
+            await asyncio.sleep(3600)
+        if roll < self.timeout_rate + self.error_rate:
+            self.counts["errors"] += 1
+            raise web.HTTPInternalServerError()
+
+    @staticmethod
+    def _address(place: FakePlace) -> dict:
+        name, region, lat, lon = place
+        return {
+            "lat": str(lat),
+            "lon": str(lon),
+            "display_name": ", ".join(p for p in [name, region, "O'zbekiston"] if p),
+            "address": {"city": name, "state": region, "country_code": "uz"},
+            "importance": 0.5,
+            "type": "city",
+            "category": "place",
+        }
+
+    async def _reverse(self, request: web.Request) -> web.Response:
+        await self._simulate("reverse")
+        lat, lon = float(request.query["lat"]), float(request.query["lon"])
+        if not self.places:
+            return web.json_response({"error": "Unable to geocode"})
+        distances = haversine_many(lat, lon, self._lats, self._lons)
+        return web.json_response(self._address(self.places[int(distances.argmin())]))
+
+    async def _search(self, request: web.Request) -> web.Response:
+        await self._simulate("search")
+        place = self._by_name.get(normalize_name(request.query.get("q", "")))
+        return web.json_response([self._address(place)] if place else [])
+
+    async def _start(self, host: str, port: int) -> str:
+        self._runner = web.AppRunner(self._app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        return f"http://{bound_host}:{bound_port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Alohida thread dagi event loop da ishga tushirish, server manzilini qaytaradi"""
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="fake-nominatim", daemon=True).start()
+        self.url = asyncio.run_coroutine_threadsafe(self._start(host, port), self._loop).result()
+        return self.url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    def reset_counts(self):
+        self.counts.clear()
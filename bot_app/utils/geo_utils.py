@@ -0,0 +1,49 @@
+# utils/geo_utils.py
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371  # Earth radius in kilometers
+KM_PER_DEGREE = 111.32  # 1 gradus kenglik ~ 111 km
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Haversine formula bilan masofani hisoblash (km)"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = (math.sin(delta_lat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) *
+         math.sin(delta_lon / 2) ** 2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_many(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """Bitta nuqtadan N ta nuqtagacha masofalar (km), bitta vektorlashgan hisob"""
+    lats_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lons_rad = np.radians(np.asarray(lons, dtype=np.float64))
+    lat_rad = math.radians(lat)
+
+    a = (np.sin((lats_rad - lat_rad) / 2) ** 2 +
+         math.cos(lat_rad) * np.cos(lats_rad) *
+         np.sin((lons_rad - math.radians(lon)) / 2) ** 2)
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(lats1, lons1, lats2, lons2) -> np.ndarray:
+    """M ta nuqtadan N ta nuqtagacha masofalar matritsasi (M x N, km)"""
+    lats1_rad = np.radians(np.asarray(lats1, dtype=np.float64))[:, np.newaxis]
+    lons1_rad = np.radians(np.asarray(lons1, dtype=np.float64))[:, np.newaxis]
+    lats2_rad = np.radians(np.asarray(lats2, dtype=np.float64))[np.newaxis, :]
+    lons2_rad = np.radians(np.asarray(lons2, dtype=np.float64))[np.newaxis, :]
+
+    a = (np.sin((lats2_rad - lats1_rad) / 2) ** 2 +
+         np.cos(lats1_rad) * np.cos(lats2_rad) *
+         np.sin((lons2_rad - lons1_rad) / 2) ** 2)
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,69 @@
+# utils/geocode_result.py
+from typing import Any, Dict, Optional
+
+from .location_settings import location_setting
+
+
+class PlaceInfo:
+    """
+    Reverse geocoding natijasi - faqat ishlatiladigan maydonlar.
+
+    to_dict() doimo bir xil kichik sxema qaytaradi (cache, DB va API javobi uchun).
+    Nominatim ning to'liq javobi (raw) faqat GEOCODE_DEBUG_RAW yoqilganda saqlanadi.
+    """
+
+    __slots__ = (
+        "source", "display_name", "mahalla", "shahar_tuman", "viloyat",
+        "full_address", "lat", "lon", "error", "raw",
+    )
+    FIELDS = __slots__[:-1]
+
+    def __init__(
+            self,
+            source: str,
+            display_name: str = "",
+            mahalla: Optional[str] = None,
+            shahar_tuman: Optional[str] = None,
+            viloyat: Optional[str] = None,
+            full_address: str = "",
+            lat: Optional[float] = None,
+            lon: Optional[float] = None,
+            error: Optional[str] = None,
+            raw: Optional[Dict[str, Any]] = None,
+    ):
+        self.source = source
+        self.display_name = display_name
+        self.mahalla = mahalla
+        self.shahar_tuman = shahar_tuman
+        self.viloyat = viloyat
+        self.full_address = full_address
+        self.lat = lat
+        self.lon = lon
+        self.error = error
+        self.raw = raw
+
+    @classmethod
+    def from_parts(cls, source: str, mahalla=None, shahar_tuman=None, viloyat=None, **kwargs) -> "PlaceInfo":
+        """Hudud nomlaridan (full_address/display_name avtomatik)"""
+        full_address = ", ".join(p for p in [mahalla, shahar_tuman, viloyat] if p)
+        kwargs.setdefault("display_name", full_address)
+        kwargs.setdefault("full_address", full_address)
+        return cls(source, mahalla=mahalla, shahar_tuman=shahar_tuman, viloyat=viloyat, **kwargs)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PlaceInfo":
+        """Cache/DB dagi yozuvdan (eski yozuvlardagi ortiqcha kalitlar tashlanadi)"""
+        values = {field: data[field] for field in cls.__slots__ if field in data}
+        values.setdefault("source", "")
+        return cls(**values)
+
+    def to_dict(self, include_raw: Optional[bool] = None) -> Dict[str, Any]:
+        if include_raw is None:
+            include_raw = location_setting("GEOCODE_DEBUG_RAW")
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        if include_raw and self.raw:
+            data["raw"] = self.raw
+        return data
+
+    def __repr__(self):
+        return f"PlaceInfo({self.source}: {self.full_address!r})"
@@ -0,0 +1,62 @@
+# utils/geohash.py
+from typing import Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE_MAP = {char: i for i, char in enumerate(_BASE32)}
+
+# Taxminiy katak o'lchami (km, ekvatorda): 5 ~ 4.9 x 4.9, 6 ~ 1.2 x 0.6, 7 ~ 0.15 x 0.15
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 6) -> str:
+    """Koordinatani berilgan uzunlikdagi geohash katagiga aylantirish"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # juft bitlar - longitude
+
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_bounds(code: str) -> Tuple[float, float, float, float]:
+    """Katak chegaralari: (min_lat, max_lat, min_lon, max_lon)"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in code:
+        value = _DECODE_MAP[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_decode(code: str) -> Tuple[float, float]:
+    """Katak markazi: (lat, lon)"""
+    min_lat, max_lat, min_lon, max_lon = geohash_bounds(code)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
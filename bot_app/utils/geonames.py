@@ -0,0 +1,120 @@
+# utils/geonames.py
+import io
+import zipfile
+from contextlib import contextmanager
+from typing import Collection, Dict, Iterator, NamedTuple, Optional, Tuple
+
+# GeoNames dump ustunlari (readme.txt, "geoname" jadvali)
+_GEONAME_COLUMNS = 19
+# alternateNamesV2 ustunlari
+_ALTERNATE_COLUMNS = 8
+
+ADMIN_FEATURES = ("ADM1", "ADM2")
+
+
+class GeoNamesPlace(NamedTuple):
+    geoname_id: int
+    name: str
+    latitude: float
+    longitude: float
+    feature_class: str
+    feature_code: str
+    country_code: str
+    admin1: str
+    admin2: str
+    population: int
+
+    @property
+    def admin_key(self) -> Optional[Tuple[str, ...]]:
+        """ADM1/ADM2 hudud kaliti (joylar o'z hududini shu kalit bilan topadi)"""
+        if self.feature_code == "ADM1":
+            return self.country_code, self.admin1
+        if self.feature_code == "ADM2":
+            return self.country_code, self.admin1, self.admin2
+        return None
+
+    @property
+    def parent_keys(self) -> Tuple[Tuple[str, ...], ...]:
+        """Ota hudud kalitlari, eng yaqinidan boshlab"""
+        if self.feature_code == "ADM1":
+            return ()
+        keys = []
+        if self.feature_code != "ADM2" and self.admin2:
+            keys.append((self.country_code, self.admin1, self.admin2))
+        if self.admin1:
+            keys.append((self.country_code, self.admin1))
+        return tuple(keys)
+
+
+@contextmanager
+def open_text(path: str):
+    """Oddiy yoki .zip fayl (GeoNames yuklamalari) - qatorma-qator o'qish uchun"""
+    if not path.endswith(".zip"):
+        with open(path, encoding="utf-8") as f:
+            yield f
+        return
+
+    with zipfile.ZipFile(path) as archive:
+        member = next(name for name in archive.namelist() if name.endswith(".txt") and "readme" not in name.lower())
+        with archive.open(member) as raw:
+            yield io.TextIOWrapper(raw, encoding="utf-8")
+
+
+def iter_places(path: str, feature_codes: Optional[Collection[str]] = None,
+                min_population: int = 0) -> Iterator[GeoNamesPlace]:
+    """GeoNames dump faylidagi joylar (xotira fayl hajmiga bog'liq emas)"""
+    with open_text(path) as f:
+        for line in f:
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) < _GEONAME_COLUMNS:
+                continue
+            feature_code = columns[7]
+            if feature_codes is not None and feature_code not in feature_codes:
+                continue
+            try:
+                place = GeoNamesPlace(
+                    geoname_id=int(columns[0]),
+                    name=columns[1],
+                    latitude=float(columns[4]),
+                    longitude=float(columns[5]),
+                    feature_class=columns[6],
+                    feature_code=feature_code,
+                    country_code=columns[8],
+                    admin1=columns[10],
+                    admin2=columns[11],
+                    population=int(columns[14] or 0),
+                )
+            except ValueError:
+                continue
+            if feature_code in ADMIN_FEATURES or place.population >= min_population:
+                yield place
+
+
+def load_alternate_names(path: str, languages: Collection[str],
+                         geoname_ids: Collection[int]) -> Dict[int, Dict[str, str]]:
+    """alternateNamesV2 dan tanlangan joylar nomlari: {geoname_id: {til: nom}} (preferred nom ustun)"""
+    names: Dict[int, Dict[str, str]] = {}
+    preferred = set()
+    with open_text(path) as f:
+        for line in f:
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) < 4 or columns[2] not in languages:
+                continue
+            try:
+                geoname_id = int(columns[1])
+            except ValueError:
+                continue
+            if geoname_id not in geoname_ids:
+                continue
+
+            # tarixiy/so'zlashuv nomlari tashlanadi
+            if len(columns) >= _ALTERNATE_COLUMNS and (columns[6] == "1" or columns[7] == "1"):
+                continue
+            language, name = columns[2], columns[3]
+            is_preferred = len(columns) > 4 and columns[4] == "1"
+            place_names = names.setdefault(geoname_id, {})
+            if language not in place_names or (is_preferred and (geoname_id, language) not in preferred):
+                place_names[language] = name
+                if is_preferred:
+                    preferred.add((geoname_id, language))
+    return names
@@ -0,0 +1,86 @@
+# utils/location_settings.py
+from typing import Any
+
+from django.conf import settings
+
+# settings.LOCATION_SERVICE da berilmagan qiymatlar uchun default lar
+DEFAULTS = {
+    # "snapshot" - shaharlar DB koordinatalaridan, "nominatim" - har bir shahar Nominatim orqali
+    "CITY_LOCATOR": "snapshot",
+    # Snapshot eng ko'pi bilan shuncha sekund ishlatiladi (boshqa processlardagi o'zgarishlar uchun)
+    "CITY_SNAPSHOT_MAX_AGE": 300,
+    # Shaharlar grid indeksi katagi (gradus), 0.25 ~ 28 km
+    "CITY_INDEX_CELL_DEG": 0.25,
+    # Nominatim server manzili (o'z serverimiz yoki benchmark uchun lokal fake server)
+    "NOMINATIM_URL": "https://nominatim.openstreetmap.org",
+    # Nominatim HTTP connection pool
+    "NOMINATIM_POOL_LIMIT": 20,
+    "NOMINATIM_POOL_LIMIT_PER_HOST": 10,
+    "NOMINATIM_DNS_CACHE_TTL": 300,
+    "NOMINATIM_KEEPALIVE_TIMEOUT": 60,
+    "NOMINATIM_TIMEOUT": 10,
+    "NOMINATIM_CONNECT_TIMEOUT": 3,
+    # Parallel geocoding so'rovlarini workerlar orasida ham Redis lock bilan birlashtirish
+    "SINGLE_FLIGHT_REDIS": False,
+    "SINGLE_FLIGHT_LOCK_TTL": 10,
+    "SINGLE_FLIGHT_POLL_INTERVAL": 0.05,
+    # Umumiy Nominatim rate limit (token/sekund, burst) va navbatda kutish muddati (sekund)
+    "NOMINATIM_RATE_LIMIT": 1.0,
+    "NOMINATIM_RATE_BURST": 1,
+    "NOMINATIM_WAIT_DEADLINE": 2.0,
+    "NOMINATIM_BACKGROUND_WAIT_DEADLINE": 60.0,
+    # DB geocode cache muddati (sekund); muddati o'tgan yozuv qaytariladi va fonda yangilanadi
+    "GEOCODE_FORWARD_TTL": 30 * 24 * 3600,
+    "GEOCODE_REVERSE_TTL": 7 * 24 * 3600,
+    # Muddati shuncha kundan ko'proq o'tgan yozuvlar o'chiriladi
+    "GEOCODE_MAX_STALE_DAYS": 30,
+    # Nominatim ning to'liq javobi (raw) natijada saqlanadimi - faqat debug uchun (cache hajmi oshadi)
+    "GEOCODE_DEBUG_RAW": False,
+    # Warmer: shuncha sekund ichida muddati tugaydigan shahar yozuvlari oldindan yangilanadi
+    "GEOCODE_WARM_AHEAD": 24 * 3600,
+    # Bitta ishga tushishda ko'pi bilan shuncha Nominatim so'rovi (qolgani keyingi safar)
+    "GEOCODE_WARM_MAX_PER_RUN": 500,
+    # Bir vaqtda rate limiter navbatiga qo'yiladigan so'rovlar
+    "GEOCODE_WARM_CHUNK_SIZE": 10,
+    # Reverse geocoding cache katagi (geohash uzunligi): 6 ~ 1.2 x 0.6 km, 7 ~ 150 m
+    "PLACE_GEOHASH_PRECISION": 6,
+    # Offline tuman/viloyat chegaralari (GeoJSON fayl yo'li); None - faqat Nominatim
+    "BOUNDARIES_GEOJSON": None,
+    # admin_level -> mahalla/shahar_tuman/viloyat (None - boundary_index.DEFAULT_LEVELS)
+    "BOUNDARY_LEVELS": None,
+    "BOUNDARY_INDEX_CELL_DEG": 0.1,
+    # cities/check-location-batch: maksimal hajm, parallel tekshiruvlar,
+    # shundan katta batch NDJSON bo'lib (CHUNK_SIZE lik bo'laklarda) stream qilinadi
+    "LOCATION_BATCH_MAX_SIZE": 5000,
+    "LOCATION_BATCH_CONCURRENCY": 20,
+    "LOCATION_BATCH_STREAM_THRESHOLD": 200,
+    "LOCATION_BATCH_CHUNK_SIZE": 100,
+    # Shahar nomlari indeksi: Nominatim shahar_tuman ga moslik va search-by-name uchun minimal o'xshashlik
+    "CITY_NAME_MATCH_MIN_SCORE": 0.5,
+    "CITY_NAME_SEARCH_MIN_SCORE": 0.3,
+    "CITY_NAME_SEARCH_LIMIT": 20,
+    # Nominatim circuit breaker: oyna (sekund), minimal chaqiruvlar, xato/sekin ulush chegaralari,
+    # sekin chaqiruv (sekund), ochiq turish vaqti va half-open sinov so'rovlari
+    "NOMINATIM_BREAKER_WINDOW": 30,
+    "NOMINATIM_BREAKER_MIN_CALLS": 5,
+    "NOMINATIM_BREAKER_ERROR_RATE": 0.5,
+    "NOMINATIM_BREAKER_SLOW_CALL": 3.0,
+    "NOMINATIM_BREAKER_SLOW_RATE": 0.5,
+    "NOMINATIM_BREAKER_OPEN_SECONDS": 30,
+    "NOMINATIM_BREAKER_HALF_OPEN_PROBES": 1,
+    # Nominatim ishlamaganda eng yaqin shahar shu radius ichida bo'lsa lokal javob beriladi (km)
+    "LOCAL_FALLBACK_RADIUS_KM": 30,
+    # check-location / nearby-cities javoblari cache i (sekund, 0 - o'chirilgan) va katagi (geohash, 7 ~ 150 m)
+    "LOCATION_RESPONSE_CACHE_TIME": 300,
+    "LOCATION_RESPONSE_GEOHASH_PRECISION": 7,
+    # Shaharlarni ommaviy geocode qilishda bir vaqtdagi so'rovlar (rate limiter umumiy)
+    "CITY_GEOCODE_CONCURRENCY": 10,
+    # City.admin_area ni ommaviy hisoblashda bir vaqtdagi so'rovlar va bitta task dagi shaharlar
+    "ADMIN_AREA_FETCH_CONCURRENCY": 10,
+    "ADMIN_AREA_BATCH_SIZE": 50,
+}
+
+
+def location_setting(name: str) -> Any:
+    """LOCATION_SERVICE sozlamasini default bilan olish"""
+    return getattr(settings, "LOCATION_SERVICE", {}).get(name, DEFAULTS[name])
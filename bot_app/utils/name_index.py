@@ -0,0 +1,112 @@
+# utils/name_index.py
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Kirill -> lotin (o'zbek va rus harflari), natija taqqoslash uchun, o'qish uchun emas
+_CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j", "з": "z",
+    "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh",
+    "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+}
+_TRANSLIT = str.maketrans(_CYRILLIC)
+
+# Tutuq belgisi variantlari (o‘, oʻ, o`, o’) - olib tashlanadi
+_APOSTROPHES = re.compile(r"[‘’ʻʼ`'´]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Joy turini bildiruvchi so'zlar (transliteratsiyadan keyin)
+_STOP_WORDS = {
+    "shahri", "shahar", "tumani", "tuman", "viloyati", "viloyat", "qishlogi", "shaharchasi",
+    "gorod", "rayon", "oblast", "oblasti", "poselok",
+    "city", "district", "region", "province", "town",
+}
+
+
+def normalize_name(text: str, drop_stop_words: bool = True) -> str:
+    """
+    Joy nomini taqqoslash uchun normallashtirish: kichik harf, kirill -> lotin, tutuq/tur so'zlarisiz.
+    drop_stop_words=False - tur so'zlari qoladi ("Samarqand viloyati" != "Samarqand").
+    """
+    text = _APOSTROPHES.sub("", text.lower()).translate(_TRANSLIT)
+    text = text.replace("kh", "x")
+    words = [
+        word for word in _NON_ALNUM.split(text)
+        if word and not (drop_stop_words and word in _STOP_WORDS)
+    ]
+    return " ".join(words)
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Nomlar uchun trigram indeks (har bir element bir nechta nom varianti bilan).
+
+    search() Jaccard o'xshashligi (trigramlar) va qism-satr mosligi bo'yicha
+    tartiblangan nomzodlarni qaytaradi; faqat umumiy trigrami bor variantlar ko'riladi.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Any, Iterable[str]]]):
+        self._items: List[Any] = []
+        # variant: (item indeksi, normallashgan nom, trigramlar soni)
+        self._variants: List[Tuple[int, str, int]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+
+        for item, names in items:
+            item_index = len(self._items)
+            self._items.append(item)
+            seen = set()
+            for name in names:
+                normalized = normalize_name(name) if name else ""
+                if not normalized or normalized in seen:
+                    continue
+                seen.add(normalized)
+
+                variant_index = len(self._variants)
+                grams = _trigrams(normalized)
+                self._variants.append((item_index, normalized, len(grams)))
+                for gram in grams:
+                    self._postings[gram].append(variant_index)
+                self._exact[normalized].append(item_index)
+
+    def __len__(self):
+        return len(self._items)
+
+    def search(self, query: str, limit: Optional[int] = 10, min_score: float = 0.3) -> List[Tuple[float, Any]]:
+        """Eng o'xshash elementlar: [(score, item)], score 0..1 (1 - to'liq mos)"""
+        normalized = normalize_name(query) if query else ""
+        if not normalized:
+            return []
+
+        best: Dict[int, float] = {}
+        for item_index in self._exact.get(normalized, ()):
+            best[item_index] = 1.0
+
+        query_grams = _trigrams(normalized)
+        overlaps: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for variant_index in self._postings.get(gram, ()):
+                overlaps[variant_index] += 1
+
+        for variant_index, overlap in overlaps.items():
+            item_index, variant, variant_size = self._variants[variant_index]
+            score = overlap / (len(query_grams) + variant_size - overlap)
+            # Qism-satr (masalan, "tosh" -> "toshkent", "yunusobod" -> "toshkent yunusobod")
+            shorter, longer = sorted((normalized, variant), key=len)
+            if len(shorter) >= 3 and shorter in longer:
+                score = max(score, 0.6 + 0.4 * len(shorter) / len(longer))
+            if score > best.get(item_index, 0.0):
+                best[item_index] = score
+
+        ranked = sorted(
+            ((score, item_index) for item_index, score in best.items() if score >= min_score),
+            key=lambda x: (-x[0], x[1])
+        )
+        return [(score, self._items[item_index]) for score, item_index in ranked[:limit]]
@@ -1,11 +1,125 @@
 # utils/nominatim_utils.py
-from typing import Dict, Any, List
-from aiohttp import ClientSession
+import atexit
+import logging
+import os
+import threading
+from typing import Dict, Any, List, Optional
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 import asyncio
 
+from .circuit_breaker import CircuitBreaker
+from .geocode_result import PlaceInfo
+from .location_settings import location_setting
+from .rate_limiter import TokenBucketLimiter
+
+logger = logging.getLogger(__name__)
+
 USER_AGENT = "RideNowBot/1.0 (admin@ridenow.uz)"
-NOMINATIM_REVERSE = "https://nominatim.openstreetmap.org/reverse"
-NOMINATIM_SEARCH = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_REVERSE = "reverse"
+NOMINATIM_SEARCH = "search"
+
+# Nominatim so'rovlari uchun process bo'yicha bitta event loop va bitta session.
+# async_to_sync har bir so'rov uchun yangi loop ochadi, shuning uchun session
+# alohida uzoq yashovchi loop da turadi va ulanishlar (keep-alive) qayta ishlatiladi.
+_io_loop: Optional[asyncio.AbstractEventLoop] = None
+_io_loop_pid: Optional[int] = None
+_io_loop_lock = threading.Lock()
+_session: Optional[ClientSession] = None
+
+# Nominatim siyosati: ~1 so'rov/sekund - barcha gunicorn/celery processlari uchun umumiy
+rate_limiter = TokenBucketLimiter("nominatim")
+# Nominatim sekin/ishlamay qolsa so'rovlar timeout ni kutmasdan lokal javob oladi
+breaker = CircuitBreaker("nominatim", "NOMINATIM_BREAKER")
+
+
+def _get_io_loop() -> asyncio.AbstractEventLoop:
+    """Nominatim uchun fon event loop (fork dan keyin qayta yaratiladi)"""
+    global _io_loop, _io_loop_pid, _session
+
+    if _io_loop is not None and _io_loop_pid == os.getpid():
+        return _io_loop
+
+    with _io_loop_lock:
+        if _io_loop is None or _io_loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="nominatim-io", daemon=True).start()
+            _io_loop, _io_loop_pid, _session = loop, os.getpid(), None
+    return _io_loop
+
+
+def _get_session() -> ClientSession:
+    """Faqat fon loop ichida chaqiriladi: connection pool bilan umumiy session"""
+    global _session
+
+    if _session is None or _session.closed:
+        connector = TCPConnector(
+            limit=location_setting("NOMINATIM_POOL_LIMIT"),
+            limit_per_host=location_setting("NOMINATIM_POOL_LIMIT_PER_HOST"),
+            ttl_dns_cache=location_setting("NOMINATIM_DNS_CACHE_TTL"),
+            keepalive_timeout=location_setting("NOMINATIM_KEEPALIVE_TIMEOUT"),
+        )
+        _session = ClientSession(
+            connector=connector,
+            headers={"User-Agent": USER_AGENT},
+            timeout=ClientTimeout(
+                total=location_setting("NOMINATIM_TIMEOUT"),
+                connect=location_setting("NOMINATIM_CONNECT_TIMEOUT"),
+            ),
+        )
+    return _session
+
+
+def nominatim_url(endpoint: str) -> str:
+    """NOMINATIM_URL (o'z serverimiz yoki benchmark uchun lokal server) bo'yicha to'liq manzil"""
+    return f"{location_setting('NOMINATIM_URL').rstrip('/')}/{endpoint}"
+
+
+async def _fetch_json(url: str, params: Dict[str, Any]) -> Any:
+    async with _get_session().get(url, params=params) as resp:
+        resp.raise_for_status()
+        return await resp.json()
+
+
+async def nominatim_get(url: str, params: Dict[str, Any]) -> Any:
+    """Nominatim ga GET so'rov (umumiy session orqali), JSON qaytaradi"""
+    # Circuit ochiq bo'lsa navbat kutmasdan darhol CircuitOpenError
+    breaker.check()
+    # Navbat kutish muddati tugasa RateLimitTimeout - chaqiruvchi fallback qaytaradi
+    await rate_limiter.acquire()
+
+    async with breaker.guard():
+        loop = _get_io_loop()
+        try:
+            if asyncio.get_running_loop() is loop:
+                return await _fetch_json(url, params)
+        except RuntimeError:
+            pass
+        future = asyncio.run_coroutine_threadsafe(_fetch_json(url, params), loop)
+        return await asyncio.wrap_future(future)
+
+
+def close_session(timeout: float = 5):
+    """Sessionni yopish va fon loop ni to'xtatish (process tugashida)"""
+    global _io_loop, _session
+
+    loop = _io_loop
+    if loop is None or _io_loop_pid != os.getpid():
+        return
+
+    async def _close():
+        if _session is not None and not _session.closed:
+            await _session.close()
+
+    try:
+        asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout)
+    except Exception as e:
+        logger.warning(f"Nominatim session close error: {e}")
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        _io_loop, _session = None, None
+
+
+atexit.register(close_session)
 
 
 def parse_address(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -32,15 +146,15 @@ def parse_address(data: Dict[str, Any]) -> Dict[str, Any]:
     parts = [p for p in [mahalla, shahar_tuman, viloyat] if p]
     full_address = ", ".join(parts) or data.get("display_name", "Noma'lum manzil")
 
-    return {
-        "source": "nominatim",
-        "display_name": data.get("display_name", ""),
-        "mahalla": mahalla,
-        "shahar_tuman": shahar_tuman,
-        "viloyat": viloyat,
-        "full_address": full_address,
-        "raw": data,
-    }
+    return PlaceInfo(
+        "nominatim",
+        display_name=data.get("display_name", ""),
+        mahalla=mahalla,
+        shahar_tuman=shahar_tuman,
+        viloyat=viloyat,
+        full_address=full_address,
+        raw=data,
+    ).to_dict()
 
 
 async def aget_place_from_coords(lat: float, lon: float) -> Dict[str, Any]:
@@ -57,31 +171,23 @@ async def aget_place_from_coords(lat: float, lon: float) -> Dict[str, Any]:
         "zoom": 18,
         "accept-language": "uz",
     }
-    headers = {"User-Agent": USER_AGENT}
-
     try:
-        async with ClientSession() as session:
-            async with session.get(NOMINATIM_REVERSE, params=params, headers=headers, timeout=10) as resp:
-                data = await resp.json()
-                result = parse_address(data)
-                result.update({
-                    "lat": lat,
-                    "lon": lon
-                })
-                return result
-    except Exception as e:
-        return {
-            "source": "error",
-            "display_name": f"Location at {lat:.6f}, {lon:.6f}",
-            "mahalla": None,
-            "shahar_tuman": None,
-            "viloyat": None,
-            "full_address": f"Koordinatalar: {lat:.6f}, {lon:.6f}",
+        data = await nominatim_get(nominatim_url(NOMINATIM_REVERSE), params)
+        result = parse_address(data)
+        result.update({
             "lat": lat,
-            "lon": lon,
-            "raw": {},
-            "error": str(e)
-        }
+            "lon": lon
+        })
+        return result
+    except Exception as e:
+        return PlaceInfo(
+            "error",
+            display_name=f"Location at {lat:.6f}, {lon:.6f}",
+            full_address=f"Koordinatalar: {lat:.6f}, {lon:.6f}",
+            lat=lat,
+            lon=lon,
+            error=str(e),
+        ).to_dict()
 
 
 async def aget_coords_from_place(place_name: str, country_code, accept_language: str = "uz", limit: int = 1) -> List[Dict[str, Any]]:
@@ -97,41 +203,32 @@ async def aget_coords_from_place(place_name: str, country_code, accept_language:
         "accept-language": accept_language,
     }
 
-    headers = {"User-Agent": USER_AGENT}
-
     try:
-        async with ClientSession() as session:
-            async with session.get(NOMINATIM_SEARCH, params=params, headers=headers, timeout=10) as resp:
-                data = await resp.json()
-
-                results = []
-                for item in data:
-                    result = parse_address(item)
-                    result.update({
-                        "lat": float(item.get("lat", 0)),
-                        "lon": float(item.get("lon", 0)),
-                        "importance": float(item.get("importance", 0)),
-                        "place_id": item.get("place_id"),
-                        "type": item.get("type"),
-                        "category": item.get("category")
-                    })
-                    results.append(result)
-
-                results.sort(key=lambda x: x.get("importance", 0), reverse=True)
-                return results
+        data = await nominatim_get(nominatim_url(NOMINATIM_SEARCH), params)
+
+        results = []
+        for item in data:
+            result = parse_address(item)
+            result.update({
+                "lat": float(item.get("lat", 0)),
+                "lon": float(item.get("lon", 0)),
+                "importance": float(item.get("importance", 0)),
+                "place_id": item.get("place_id"),
+                "type": item.get("type"),
+                "category": item.get("category")
+            })
+            results.append(result)
+
+        results.sort(key=lambda x: x.get("importance", 0), reverse=True)
+        return results
 
     except Exception as e:
-        return [{
-            "source": "error",
-            "display_name": place_name,
-            "mahalla": None,
-            "shahar_tuman": None,
-            "viloyat": None,
-            "full_address": place_name,
-            "lat": None,
-            "lon": None,
-            "error": str(e)
-        }]
+        return [PlaceInfo(
+            "error",
+            display_name=place_name,
+            full_address=place_name,
+            error=str(e),
+        ).to_dict()]
 
 
 def get_place_from_coords_sync(lat: float, lon: float) -> Dict[str, Any]:
@@ -0,0 +1,197 @@
+# utils/rate_limiter.py
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import redis
+
+from .location_settings import location_setting
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Kichik raqam - yuqori ustuvorlik
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+_priority = contextvars.ContextVar("nominatim_priority", default=PRIORITY_INTERACTIVE)
+
+
+class RateLimitTimeout(Exception):
+    """Ruxsat kutish muddati tugadi - chaqiruvchi fallback qaytarishi kerak"""
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Blok ichidagi Nominatim so'rovlari ustuvorligini belgilash (masalan, backfill uchun)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+# KEYS: bucket hash, queue zset (score = priority * 1e13 + enqueue_ms), expiry zset
+# ARGV: rate (token/s), capacity, now_ms, member, priority, member_ttl_ms
+# Qaytaradi: 0 - ruxsat berildi, aks holda qancha ms kutish tavsiya etiladi
+_ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local member = ARGV[4]
+local priority = tonumber(ARGV[5])
+local member_ttl = tonumber(ARGV[6])
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)
+for _, m in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], m)
+    redis.call('ZREM', KEYS[3], m)
+end
+
+redis.call('ZADD', KEYS[2], 'NX', priority * 1e13 + now, member)
+redis.call('ZADD', KEYS[3], now + member_ttl, member)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+
+local granted = false
+if redis.call('ZRANK', KEYS[2], member) == 0 and tokens >= 1 then
+    tokens = tokens - 1
+    redis.call('ZREM', KEYS[2], member)
+    redis.call('ZREM', KEYS[3], member)
+    granted = true
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 60000)
+redis.call('PEXPIRE', KEYS[2], 60000)
+redis.call('PEXPIRE', KEYS[3], 60000)
+
+if granted then
+    return 0
+end
+return math.max(math.ceil((1 - tokens) * 1000 / rate), 20)
+"""
+
+
+class TokenBucketLimiter:
+    """
+    Barcha processlar uchun umumiy token bucket (Redis) va ustuvorlik navbati.
+
+    Navbat boshidagi (eng ustuvor, eng oldin kelgan) chaqiruvchi token oladi,
+    shuning uchun interaktiv so'rovlar backfill ishlaridan oldin o'tadi.
+    Redis sozlanmagan bo'lsa, process ichidagi bucket ishlatiladi.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._script = None
+        # Process ichidagi fallback holati
+        self._lock = threading.Lock()
+        self._tokens = None
+        self._updated = time.monotonic()
+        self._waiting = {}
+
+    async def acquire(self, priority: int = None):
+        """Token olguncha kutish, muddat tugasa RateLimitTimeout"""
+        if priority is None:
+            priority = _priority.get()
+
+        if priority == PRIORITY_INTERACTIVE:
+            deadline_sec = location_setting("NOMINATIM_WAIT_DEADLINE")
+        else:
+            deadline_sec = location_setting("NOMINATIM_BACKGROUND_WAIT_DEADLINE")
+        deadline = time.monotonic() + deadline_sec
+
+        client = get_redis()
+        if client is not None:
+            try:
+                return await self._acquire_redis(client, priority, deadline)
+            except redis.RedisError as e:
+                logger.warning(f"Rate limiter Redis error, using local bucket: {e}")
+
+        await self._acquire_local(priority, deadline)
+
+    async def _acquire_redis(self, client, priority: int, deadline: float):
+        if self._script is None:
+            self._script = client.register_script(_ACQUIRE_SCRIPT)
+
+        keys = [f"rl:{self.name}:bucket", f"rl:{self.name}:queue", f"rl:{self.name}:expiry"]
+        member = uuid.uuid4().hex
+        member_ttl_ms = 2000
+
+        try:
+            await self._wait_in_queue(client, keys, member, member_ttl_ms, priority, deadline)
+        except asyncio.CancelledError:
+            self._leave_queue(client, keys, member)
+            raise
+
+    async def _wait_in_queue(self, client, keys, member, member_ttl_ms, priority, deadline):
+        while True:
+            wait_ms = await asyncio.to_thread(
+                self._script,
+                keys=keys,
+                args=[
+                    location_setting("NOMINATIM_RATE_LIMIT"),
+                    location_setting("NOMINATIM_RATE_BURST"),
+                    int(time.time() * 1000),
+                    member,
+                    priority,
+                    member_ttl_ms,
+                ],
+            )
+            if wait_ms == 0:
+                return
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                await asyncio.to_thread(self._leave_queue, client, keys, member)
+                raise RateLimitTimeout(f"{self.name}: rate limit wait deadline exceeded")
+
+            # Navbatdagi joy member_ttl dan oldin yangilanishi kerak
+            await asyncio.sleep(min(wait_ms / 1000, remaining, member_ttl_ms / 2000))
+
+    @staticmethod
+    def _leave_queue(client, keys, member):
+        try:
+            client.zrem(keys[1], member)
+            client.zrem(keys[2], member)
+        except redis.RedisError:
+            pass
+
+    async def _acquire_local(self, priority: int, deadline: float):
+        rate = location_setting("NOMINATIM_RATE_LIMIT")
+        capacity = location_setting("NOMINATIM_RATE_BURST")
+
+        with self._lock:
+            self._waiting[priority] = self._waiting.get(priority, 0) + 1
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    if self._tokens is None:
+                        self._tokens = capacity
+                    self._tokens = min(capacity, self._tokens + (now - self._updated) * rate)
+                    self._updated = now
+
+                    higher_waiting = any(
+                        count for p, count in self._waiting.items() if p < priority
+                    )
+                    if self._tokens >= 1 and not higher_waiting:
+                        self._tokens -= 1
+                        return
+                    wait = max((1 - self._tokens) / rate, 0.01)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RateLimitTimeout(f"{self.name}: rate limit wait deadline exceeded")
+                await asyncio.sleep(min(wait, remaining))
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
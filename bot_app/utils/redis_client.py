@@ -0,0 +1,24 @@
+# utils/redis_client.py
+import logging
+from typing import Optional
+
+import redis
+
+from configuration import env
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Umumiy (sync) Redis client, REDIS_PUBLIC_URL bo'sh bo'lsa None"""
+    global _client
+
+    if _client is None and env.REDIS_PUBLIC_URL:
+        _client = redis.Redis.from_url(
+            env.REDIS_PUBLIC_URL,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+        )
+    return _client
@@ -0,0 +1,115 @@
+# utils/single_flight.py
+import asyncio
+import concurrent.futures
+import logging
+import pickle
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+import redis
+
+from .location_settings import location_setting
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Bir xil kalit uchun parallel so'rovlarni bitta so'rovga birlashtirish.
+
+    Process ichida: birinchi chaqiruvchi (leader) so'rovni bajaradi, qolganlari
+    uning natijasini kutadi. Chaqiruvchilar har xil event loop/threadlarda
+    bo'lishi mumkin, shuning uchun concurrent.futures.Future ishlatiladi.
+    SINGLE_FLIGHT_REDIS yoqilgan bo'lsa, workerlar orasida qisqa Redis lock
+    bilan ham birlashtiriladi.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    self._calls[key] = future
+
+            if leader:
+                return await self._lead(key, future, func)
+
+            try:
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                # Leader bekor qilingan bo'lsa - qaytadan urinish
+                if not future.cancelled():
+                    raise
+
+    async def _lead(self, key: str, future: concurrent.futures.Future, func: Callable[[], Awaitable[T]]) -> T:
+        try:
+            result = await self._run_shared(key, func)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+    async def _run_shared(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Workerlar orasida Redis lock orqali birlashtirish (yoqilgan bo'lsa)"""
+        client = get_redis() if location_setting("SINGLE_FLIGHT_REDIS") else None
+        if client is None:
+            return await func()
+
+        lock_ttl = location_setting("SINGLE_FLIGHT_LOCK_TTL")
+        lock_key = f"sf:{self.name}:lock:{key}"
+        result_key = f"sf:{self.name}:result:{key}"
+
+        try:
+            acquired = await asyncio.to_thread(client.set, lock_key, 1, nx=True, ex=lock_ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Single-flight lock error: {e}")
+            return await func()
+
+        if acquired:
+            try:
+                result = await func()
+                try:
+                    await asyncio.to_thread(client.set, result_key, pickle.dumps(result), ex=lock_ttl)
+                except redis.RedisError as e:
+                    logger.warning(f"Single-flight result store error: {e}")
+                return result
+            finally:
+                try:
+                    await asyncio.to_thread(client.delete, lock_key)
+                except redis.RedisError:
+                    pass
+
+        # Boshqa worker bajaryapti - natijani kutish
+        deadline = time.monotonic() + lock_ttl
+        try:
+            while time.monotonic() < deadline:
+                raw = await asyncio.to_thread(client.get, result_key)
+                if raw is not None:
+                    return pickle.loads(raw)
+                if not await asyncio.to_thread(client.exists, lock_key):
+                    break
+                await asyncio.sleep(location_setting("SINGLE_FLIGHT_POLL_INTERVAL"))
+        except redis.RedisError as e:
+            logger.warning(f"Single-flight wait error: {e}")
+
+        return await func()
@@ -0,0 +1,146 @@
+# utils/spatial_index.py
+import heapq
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .geo_utils import KM_PER_DEGREE, haversine_many
+
+Cell = Tuple[int, int]
+
+
+class GeoGridIndex:
+    """
+    Koordinatalar uchun grid indeks (har bir katak cell_size_deg x cell_size_deg).
+
+    Radius va k-nearest so'rovlari faqat atrofdagi kataklarni tekshiradi,
+    shuning uchun ular barcha nuqtalar soniga chiziqli bog'liq emas.
+    Nomzodlargacha masofalar haversine_many bilan bitta vektorlashgan hisobda olinadi.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Any, float, float]], cell_size_deg: float = 0.25):
+        self.cell_size = cell_size_deg
+        buckets: Dict[Cell, List[Tuple[Any, float, float]]] = defaultdict(list)
+        self.size = 0
+
+        for item, lat, lon in items:
+            buckets[self._cell(lat, lon)].append((item, lat, lon))
+            self.size += 1
+
+        # Har bir katak: (items, lats, lons) - masofalar numpy bilan bir martda hisoblanadi
+        self._cells: Dict[Cell, Tuple[List[Any], np.ndarray, np.ndarray]] = {
+            cell: (
+                [item for item, _, _ in bucket],
+                np.array([lat for _, lat, _ in bucket], dtype=np.float64),
+                np.array([lon for _, _, lon in bucket], dtype=np.float64),
+            )
+            for cell, bucket in buckets.items()
+        }
+
+        if self._cells:
+            rows = [row for row, _ in self._cells]
+            cols = [col for _, col in self._cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        else:
+            self._bounds = None
+
+    def __len__(self):
+        return self.size
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def _lon_span_deg(self, lat: float, radius_km: float) -> float:
+        cos_lat = math.cos(math.radians(min(abs(lat) + radius_km / KM_PER_DEGREE, 89.0)))
+        return radius_km / (KM_PER_DEGREE * cos_lat)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, Any]]:
+        """Radius ichidagi elementlar, masofa bo'yicha saralangan: [(distance_km, item)]"""
+        if not self._cells:
+            return []
+
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = self._lon_span_deg(lat, radius_km)
+        min_row, max_row = self._cell(lat - lat_span, 0)[0], self._cell(lat + lat_span, 0)[0]
+        min_col, max_col = self._cell(0, lon - lon_span)[1], self._cell(0, lon + lon_span)[1]
+
+        b_min_row, b_max_row, b_min_col, b_max_col = self._bounds
+        cells = (
+            (row, col)
+            for row in range(max(min_row, b_min_row), min(max_row, b_max_row) + 1)
+            for col in range(max(min_col, b_min_col), min(max_col, b_max_col) + 1)
+        )
+        items, distances = self._distances(lat, lon, cells)
+        if not items:
+            return []
+
+        inside = np.flatnonzero(distances <= radius_km)
+        order = inside[np.argsort(distances[inside], kind="stable")]
+        return [(float(distances[i]), items[i]) for i in order]
+
+    def _distances(self, lat: float, lon: float, cells: Iterable[Cell]) -> Tuple[List[Any], np.ndarray]:
+        """Berilgan kataklardagi barcha elementlar va ulargacha masofalar"""
+        items: List[Any] = []
+        lats, lons = [], []
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket:
+                items.extend(bucket[0])
+                lats.append(bucket[1])
+                lons.append(bucket[2])
+
+        if not items:
+            return items, np.empty(0)
+        return items, haversine_many(lat, lon, np.concatenate(lats), np.concatenate(lons))
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_distance_km: Optional[float] = None) -> List[Tuple[float, Any]]:
+        """Eng yaqin k ta element (kataklarni halqa bo'yicha kengaytirib): [(distance_km, item)]"""
+        if not self._cells or k <= 0:
+            return []
+
+        if max_distance_km is not None:
+            return self.within(lat, lon, max_distance_km)[:k]
+
+        center_row, center_col = self._cell(lat, lon)
+        b_min_row, b_max_row, b_min_col, b_max_col = self._bounds
+        max_ring = max(
+            abs(center_row - b_min_row), abs(center_row - b_max_row),
+            abs(center_col - b_min_col), abs(center_col - b_max_col),
+        )
+
+        # max-heap: (-distance, counter, item)
+        best: List[Tuple[float, int, Any]] = []
+        counter = 0
+        for ring in range(max_ring + 1):
+            items, distances = self._distances(lat, lon, self._ring_cells(center_row, center_col, ring))
+            for item, distance in zip(items, distances.tolist()):
+                counter += 1
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, counter, item))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, counter, item))
+
+            if len(best) == k:
+                # Keyingi halqadagi nuqtalar kamida shuncha uzoqda
+                ring_km = ring * self.cell_size * KM_PER_DEGREE * math.cos(
+                    math.radians(min(abs(lat) + (ring + 1) * self.cell_size, 89.0))
+                )
+                if -best[0][0] <= ring_km:
+                    break
+
+        return sorted(((-neg_distance, item) for neg_distance, _, item in best), key=lambda x: x[0])
+
+    @staticmethod
+    def _ring_cells(center_row: int, center_col: int, ring: int):
+        if ring == 0:
+            yield center_row, center_col
+            return
+        for col in range(center_col - ring, center_col + ring + 1):
+            yield center_row - ring, col
+            yield center_row + ring, col
+        for row in range(center_row - ring + 1, center_row + ring):
+            yield row, center_col - ring
+            yield row, center_col + ring
@@ -0,0 +1,61 @@
+# views/async_mixins.py
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+
+class AsyncViewSetMixin:
+    """
+    DRF ViewSet ni ASGI da native async ishlatish.
+
+    dispatch async: autentifikatsiya/permission/throttle (sync, DB) sync_to_async da,
+    `async def` handler lar to'g'ridan-to'g'ri await qilinadi, qolgan (list, retrieve, ...)
+    sync handler lar sync_to_async orqali ishlaydi. WSGI da Django view ni o'zi o'raydi.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        # Django view ni async deb bilishi uchun (csrf_exempt wrapper coroutine qaytaradi)
+        return markcoroutinefunction(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        """get_object ning async ORM varianti"""
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).afirst()
+        except (TypeError, ValueError, ValidationError):
+            obj = None
+        if obj is None:
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+        await sync_to_async(self.check_object_permissions)(self.request, obj)
+        return obj
@@ -1,9 +1,13 @@
-from asgiref.sync import async_to_sync, sync_to_async
-from django.db.models import Q
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 import logging
@@ -13,17 +17,25 @@ from ..models import City, CityPrice
 from ..serializers.city import (
     CitySerializer,
     LocationCheckSerializer,
+    LocationCheckBatchSerializer,
     LocationCheckResponseSerializer,
     CityValidationSerializer,
     CityValidationResponseSerializer,
     NearbyCitiesResponseSerializer
 )
+from ..services.geocode_cache import GeocodeCacheService
+from ..services.geocode_warmer import GeocodeWarmer
+from ..services.location_response_cache import LocationResponseCache
 from ..services.location_service import GlobalLocationService
+from ..utils.geo_utils import haversine_km
+from ..utils.location_settings import location_setting
+from ..utils.nominatim_utils import breaker as nominatim_breaker
+from .async_mixins import AsyncViewSetMixin
 
 logger = logging.getLogger(__name__)
 
 
-class CityViewSet(viewsets.ModelViewSet):
+class CityViewSet(AsyncViewSetMixin, viewsets.ModelViewSet):
     queryset = City.objects.filter(is_allowed=True)
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -36,11 +48,7 @@ class CityViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         return CitySerializer
 
-    def create(self, request, *args, **kwargs):
-        """Sync wrapper for async create"""
-        return async_to_sync(self._async_create)(request, *args, **kwargs)
-
-    async def _async_create(self, request, *args, **kwargs):
+    async def create(self, request, *args, **kwargs):
         """Async create logic"""
         logger.debug(f"Create request data: {request.data}")
 
@@ -52,13 +60,9 @@ class CityViewSet(viewsets.ModelViewSet):
 
         return Response(response_data, status=status.HTTP_201_CREATED)
 
-    def update(self, request, *args, **kwargs):
-        """Sync wrapper for async update"""
-        return async_to_sync(self._async_update)(request, *args, **kwargs)
-
-    async def _async_update(self, request, *args, **kwargs):
+    async def update(self, request, *args, **kwargs):
         """Async update logic"""
-        instance = await sync_to_async(self.get_object)()
+        instance = await self.aget_object()
 
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -87,6 +91,9 @@ class CityViewSet(viewsets.ModelViewSet):
 
         return Response(response_data)
 
+    async def partial_update(self, request, *args, **kwargs):
+        return await self.update(request, *args, **kwargs)
+
     def _prepare_city_response(self, city, request):
         """Sync method: Prepare city response data"""
         try:
@@ -110,13 +117,13 @@ class CityViewSet(viewsets.ModelViewSet):
         return data
 
     @action(detail=False, methods=['post'], url_path='check-location')
-    def check_location(self, request):
-        """Sync wrapper for async check_location"""
+    async def check_location(self, request):
+        """Check if coordinates are within city area"""
         logger.debug(f"Check location request: {request.data}")
         logger.debug(f"Content type: {request.content_type}")
 
         try:
-            return async_to_sync(self._async_check_location)(request)
+            return await self._check_location(request)
         except Exception as e:
             logger.error(f"Error in check_location: {str(e)}", exc_info=True)
             return Response({
@@ -124,8 +131,7 @@ class CityViewSet(viewsets.ModelViewSet):
                 "details": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    async def _async_check_location(self, request):
-        """Check if coordinates are within city area"""
+    async def _check_location(self, request):
         logger.debug(f"Async check_location called with data: {request.data}")
 
         serializer = LocationCheckSerializer(data=request.data)
@@ -141,58 +147,160 @@ class CityViewSet(viewsets.ModelViewSet):
 
         logger.debug(f"Validated data - lat: {lat}, lon: {lon}, max_distance: {max_distance}")
 
-        city, distance, address_info = await GlobalLocationService.find_city_for_location(
-            lat, lon, max_distance
+        response_data = await self._build_location_check(lat, lon, max_distance)
+
+        logger.debug(f"Response data: {response_data}")
+        return Response(response_data)
+
+    async def _location_cell(self, lat, lon, max_distance, city_data_cache=None):
+        """
+        Katak uchun manzil va nomzod shaharlar (cache lanadi). Nomzodlar radiusi katak diagonaliga
+        kengaytirilgan, shuning uchun katakdagi har bir nuqta uchun masofa va shahar ichidaligi
+        ular koordinatalaridan aniq hisoblanadi (_nearby_candidates).
+        """
+        return await LocationResponseCache.get_or_build(
+            "cell", lat, lon, max_distance,
+            lambda: self._compute_location_cell(lat, lon, max_distance, city_data_cache),
+            # Nominatim xatosi/lokal javob cache lanmaydi
+            cacheable=lambda data: GeocodeCacheService.is_cacheable(data["address_info"]),
         )
 
-        logger.debug(f"Found city: {city}, distance: {distance}")
+    async def _compute_location_cell(self, lat, lon, max_distance, city_data_cache=None):
+        if city_data_cache is None:
+            city_data_cache = {}
+
+        # Barcha so'rovlar uchun umumiy (cache lanadi) - request kontekstisiz
+        async def get_city_data(city):
+            if city.pk not in city_data_cache:
+                city_data_cache[city.pk] = await sync_to_async(self._prepare_city_response)(city, None)
+            return city_data_cache[city.pk]
+
+        radius = max_distance + LocationResponseCache.cell_margin_km(lat, lon)
+        address_info, candidates = await GlobalLocationService.location_candidates(lat, lon, radius)
+
+        return {
+            "address_info": address_info,
+            "candidates": [
+                {"city": await get_city_data(city), "coordinates": city_coords, "name_match": name_match}
+                for _, city, city_coords, name_match in candidates
+            ],
+        }
+
+    @staticmethod
+    def _nearby_candidates(cell, lat, lon, max_distance):
+        """So'ralgan nuqtadan max_distance ichidagi nomzodlar, masofa bo'yicha: [(distance_km, candidate)]"""
+        nearby = [
+            (haversine_km(lat, lon, *candidate["coordinates"]), candidate)
+            for candidate in cell["candidates"]
+        ]
+        nearby = [(distance, candidate) for distance, candidate in nearby if distance <= max_distance]
+        nearby.sort(key=lambda x: x[0])
+        return nearby
+
+    async def _build_location_check(self, lat, lon, max_distance, city_data_cache=None):
+        """Bitta lokatsiya uchun check-location javobi (city_data_cache - batch uchun shahar ma'lumotlari)"""
+        cell = await self._location_cell(lat, lon, max_distance, city_data_cache)
+
+        address_info = cell["address_info"]
+        if address_info:
+            # Katakdagi manzil, so'ralgan nuqta koordinatalari bilan
+            address_info = {**address_info, "lat": lat, "lon": lon}
+
+        nearby_cities = self._nearby_candidates(cell, lat, lon, max_distance)
+        city = next(((d, c) for d, c in nearby_cities if c["name_match"]), None)
+
+        logger.debug(f"Found city: {city}")
 
         if city:
-            city_data = await sync_to_async(self._prepare_city_response)(city, request)
-
+            distance, candidate = city
             response_data = {
                 "is_in_city": True,
-                "city": city_data,
-                "distance_km": round(distance, 2) if distance < float('inf') else None,
+                "city": candidate["city"],
+                "distance_km": round(distance, 2),
                 "address_info": address_info,
-                "message": f"Koordinatalar {city.title} shahar hududida. Masofa: {distance:.1f} km",
+                "message": f"Koordinatalar {candidate['city']['title']} shahar hududida. Masofa: {distance:.1f} km",
                 "match_type": "exact"
             }
+        elif nearby_cities:
+            distance, candidate = nearby_cities[0]
+            distance = round(distance, 2)
+
+            response_data = {
+                "is_in_city": False,
+                "city": candidate["city"],
+                "distance_km": distance,
+                "address_info": address_info,
+                "message": f"Koordinatalar hech qanday shahar hududida emas. Eng yaqin shahar: {candidate['city']['title']} ({distance:.1f} km)",
+                "match_type": "nearest"
+            }
         else:
-            nearby_cities = await GlobalLocationService.search_cities_by_location(lat, lon, max_distance)
-
-            if nearby_cities:
-                nearest_city = nearby_cities[0]
-                nearest_city_data = await sync_to_async(self._prepare_city_response)(
-                    nearest_city["city"], request
-                )
-
-                response_data = {
-                    "is_in_city": False,
-                    "city": nearest_city_data,
-                    "distance_km": round(nearest_city["distance_km"], 2),
-                    "address_info": address_info,
-                    "message": f"Koordinatalar hech qanday shahar hududida emas. Eng yaqin shahar: {nearest_city['city'].title} ({nearest_city['distance_km']:.1f} km)",
-                    "match_type": "nearest"
-                }
-            else:
-                response_data = {
-                    "is_in_city": False,
-                    "address_info": address_info,
-                    "message": "Koordinatalar hech qanday shahar hududida emas va yaqin shaharlar topilmadi",
-                    "match_type": "none"
-                }
+            response_data = {
+                "is_in_city": False,
+                "address_info": address_info,
+                "message": "Koordinatalar hech qanday shahar hududida emas va yaqin shaharlar topilmadi",
+                "match_type": "none"
+            }
 
-        logger.debug(f"Response data: {response_data}")
-        response_serializer = LocationCheckResponseSerializer(response_data)
-        return Response(response_serializer.data)
+        return dict(LocationCheckResponseSerializer(response_data).data)
 
-    @action(detail=False, methods=['post'], url_path='validate-city-location')
-    def validate_city_location(self, request):
-        """Sync wrapper for async validate_city_location"""
-        return async_to_sync(self._async_validate_city_location)(request)
+    @action(detail=False, methods=['post'], url_path='check-location-batch')
+    async def check_location_batch(self, request):
+        """
+        Ko'p lokatsiyani bitta so'rovda tekshirish: {"locations": [{latitude, longitude, max_distance_km}, ...]}.
 
-    async def _async_validate_city_location(self, request):
+        Natijalar kirish tartibida. Katta batch (yoki ?stream=1) NDJSON bo'lib
+        bo'laklarda stream qilinadi: har bir qator {"index": i, ...}.
+        """
+        data = {"locations": request.data} if isinstance(request.data, list) else request.data
+        serializer = LocationCheckBatchSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        locations = serializer.validated_data['locations']
+
+        stream = (
+            request.query_params.get('stream') in ('1', 'true') or
+            len(locations) > location_setting("LOCATION_BATCH_STREAM_THRESHOLD")
+        )
+        if not stream:
+            results = await self._async_check_locations(locations, {})
+            return Response({"count": len(results), "results": results})
+
+        return StreamingHttpResponse(
+            self._stream_location_checks(locations),
+            content_type="application/x-ndjson"
+        )
+
+    async def _stream_location_checks(self, locations):
+        """Batch ni bo'laklarda tekshirib, natijalarni NDJSON qatorlari sifatida berish"""
+        city_data_cache = {}
+        chunk_size = location_setting("LOCATION_BATCH_CHUNK_SIZE")
+
+        for offset in range(0, len(locations), chunk_size):
+            chunk = locations[offset:offset + chunk_size]
+            results = await self._async_check_locations(chunk, city_data_cache)
+            for index, result in enumerate(results, start=offset):
+                yield json.dumps({"index": index, **result}, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+    async def _async_check_locations(self, locations, city_data_cache):
+        """Lokatsiyalarni parallel tekshirish (takrorlanganlari bir marta), natijalar kirish tartibida"""
+        keys = [(loc['latitude'], loc['longitude'], loc['max_distance_km']) for loc in locations]
+        unique_keys = list(dict.fromkeys(keys))
+        semaphore = asyncio.Semaphore(location_setting("LOCATION_BATCH_CONCURRENCY"))
+
+        async def check(key):
+            async with semaphore:
+                try:
+                    return await self._build_location_check(*key, city_data_cache)
+                except Exception as e:
+                    logger.error(f"Error in check_location_batch for {key}: {str(e)}", exc_info=True)
+                    return {"error": "Internal server error", "details": str(e)}
+
+        # Bir xil geohash katagidagi nuqtalar geocoding ni single-flight/cache orqali bo'lishadi
+        unique_results = await asyncio.gather(*[check(key) for key in unique_keys])
+        by_key = dict(zip(unique_keys, unique_results))
+        return [by_key[key] for key in keys]
+
+    @action(detail=False, methods=['post'], url_path='validate-city-location')
+    async def validate_city_location(self, request):
         """Validate if city name matches coordinates"""
         serializer = CityValidationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -207,11 +315,7 @@ class CityViewSet(viewsets.ModelViewSet):
         return Response(response_serializer.data)
 
     @action(detail=False, methods=['post'], url_path='nearby-cities')
-    def nearby_cities(self, request):
-        """Sync wrapper for async nearby_cities"""
-        return async_to_sync(self._async_nearby_cities)(request)
-
-    async def _async_nearby_cities(self, request):
+    async def nearby_cities(self, request):
         """Find cities near given location"""
         serializer = LocationCheckSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -220,34 +324,28 @@ class CityViewSet(viewsets.ModelViewSet):
         lon = serializer.validated_data['longitude']
         max_distance = serializer.validated_data['max_distance_km']
 
-        nearby_cities = await GlobalLocationService.search_cities_by_location(lat, lon, max_distance)
-
-        results = []
-        for city_data in nearby_cities:
-            city_response_data = await sync_to_async(self._prepare_city_response)(
-                city_data["city"], request
-            )
+        cell = await self._location_cell(lat, lon, max_distance)
 
-            results.append({
-                "city": city_response_data,
-                "distance_km": round(city_data["distance_km"], 2),
-                "coordinates": city_data.get("coordinates"),
-                "match_type": city_data["match_type"]
-            })
+        # Faqat eng yaqin 10 ta shahar (masofa bo'yicha saralangan)
+        results = [
+            {
+                "city": candidate["city"],
+                "distance_km": round(distance, 2),
+                "coordinates": {"latitude": candidate["coordinates"][0], "longitude": candidate["coordinates"][1]},
+                "match_type": "name" if candidate["name_match"] else "distance",
+            }
+            for distance, candidate in self._nearby_candidates(cell, lat, lon, max_distance)[:10]
+        ]
 
         response_serializer = NearbyCitiesResponseSerializer(results, many=True)
         return Response(response_serializer.data)
 
     @action(detail=True, methods=['get'], url_path='location-info')
-    def get_city_location_info(self, request, pk=None):
-        """Sync wrapper for async get_city_location_info"""
-        return async_to_sync(self._async_get_city_location_info)(request, pk)
-
-    async def _async_get_city_location_info(self, request, pk=None):
+    async def get_city_location_info(self, request, pk=None):
         """Get location information for a city"""
-        city = await sync_to_async(self.get_object)()
+        city = await self.aget_object()
 
-        city_coords = await GlobalLocationService.get_city_coordinates(city.title)
+        city_coords = await GlobalLocationService.get_coordinates_for_city(city)
         if not city_coords:
             return Response({
                 "error": "Shahar uchun lokatsiya ma'lumotlari topilmadi"
@@ -267,12 +365,16 @@ class CityViewSet(viewsets.ModelViewSet):
             "address_info": address_info
         })
 
-    @action(detail=False, methods=['get'], url_path='search-by-name')
-    def search_cities_by_name(self, request):
-        """Sync wrapper for async search_cities_by_name"""
-        return async_to_sync(self._async_search_cities_by_name)(request)
+    @action(detail=False, methods=['get'], url_path='geocoder-status', permission_classes=[IsAdminUser])
+    async def geocoder_status(self, request):
+        """Nominatim circuit breaker holati (joriy process) va shaharlar geocode cache qamrovi"""
+        return Response({
+            "nominatim": nominatim_breaker.snapshot(),
+            "city_cache": await sync_to_async(GeocodeWarmer.status)(),
+        })
 
-    async def _async_search_cities_by_name(self, request):
+    @action(detail=False, methods=['get'], url_path='search-by-name')
+    async def search_cities_by_name(self, request):
         """Search cities by name and get coordinates"""
         city_name = request.query_params.get('name')
         if not city_name:
@@ -280,19 +382,14 @@ class CityViewSet(viewsets.ModelViewSet):
                 "error": "name parametri talab qilinadi"
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        @sync_to_async
-        def get_cities():
-            return list(City.objects.filter(
-                Q(title__icontains=city_name) | Q(title__iexact=city_name),
-                is_allowed=True
-            ))
-
-        cities = await get_cities()
+        # Shaharlar nomlari indeksi (title + translate, transliteratsiya bilan)
+        matches = await GlobalLocationService.search_cities_by_name(city_name)
+        cities_coords = await asyncio.gather(*[
+            GlobalLocationService.get_coordinates_for_city(city) for _, city in matches
+        ])
 
         results = []
-        for city in cities:
-            city_coords = await GlobalLocationService.get_city_coordinates(city.title)
-
+        for (score, city), city_coords in zip(matches, cities_coords):
             city_data = await sync_to_async(self._prepare_city_response)(city, request)
 
             results.append({
@@ -301,7 +398,8 @@ class CityViewSet(viewsets.ModelViewSet):
                     "latitude": city_coords[0],
                     "longitude": city_coords[1]
                 } if city_coords else None,
-                "has_coordinates": city_coords is not None
+                "has_coordinates": city_coords is not None,
+                "score": round(score, 3)
             })
 
         return Response(results)
\ No newline at end of file
@@ -10,6 +10,7 @@ from ..models import DriverStatus, Driver, DriverTransaction, Route
 from ..serializers.driver import DriverSerializer, DriverListSerializer, DriverUpdateSerializer, \
     DriverTransactionSerializer, DriverCreateSerializer
 from ..filters.driver_filter import DriverFilter, DriverTransactionFilter
+from ..pagination import CreatedAtCursorPagination
 
 
 class DriverViewSet(viewsets.ModelViewSet):
@@ -24,6 +25,7 @@ class DriverViewSet(viewsets.ModelViewSet):
     search_fields = ['from_location', 'to_location',]
     ordering_fields = ['created_at', 'amount']
     ordering = ['-created_at']
+    pagination_class = CreatedAtCursorPagination
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -151,6 +153,7 @@ class DriverTransactionViewSet(viewsets.ModelViewSet):
     filterset_class = DriverTransactionFilter
     ordering_fields = ['created_at', 'amount']
     ordering = ['-created_at']
+    pagination_class = CreatedAtCursorPagination
 
     @action(detail=False, methods=['get'])
     def driver_stats(self, request):
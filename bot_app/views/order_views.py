@@ -11,11 +11,12 @@ from ..serializers.order import (
     PassengerToDriverReviewCreateSerializer, DriverOrderSerializer,
 )
 from ..filters.order_filters import OrderFilter
+from ..pagination import CreatedAtCursorPagination
 
 
 class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all().select_related(
-        'driver', 'content_type'
+        'driver', 'content_type', 'travel', 'post'
     )
     serializer_class = OrderSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -26,6 +27,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         'created_at', 'updated_at'
     ]
     ordering = ['-created_at']
+    pagination_class = CreatedAtCursorPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -57,7 +59,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     def by_telegram_id(self, request, telegram_id=None):
         try:
             telegram_id = int(telegram_id)
-            order = Order.objects.filter(user=telegram_id)
+            order = Order.objects.filter(user=telegram_id).select_related('driver', 'travel', 'post')
             serializer = OrderListSerializer(order, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except ValueError:
@@ -109,7 +111,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'], url_path="driver")
     def driver(self, request, pk=None):
         try:
-            orders = Order.objects.get(id=pk)
+            orders = Order.objects.select_related('travel', 'post').get(id=pk)
             serializer = DriverOrderSerializer(orders).data
             return Response(serializer, status=status.HTTP_200_OK)
         except Exception as e:
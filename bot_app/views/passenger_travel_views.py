@@ -7,6 +7,7 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q
 
 from ..filters.passenger_travel_filter import PassengerTravelFilter
+from ..pagination import CreatedAtCursorPagination
 from ..models import PassengerTravel
 from ..serializers.passenger_travel import (
     PassengerTravelSerializer,
@@ -29,6 +30,7 @@ class PassengerTravelViewSet(viewsets.ModelViewSet):
         'price', 'passenger', 'created_at', 'updated_at'
     ]
     ordering = ['-created_at']
+    pagination_class = CreatedAtCursorPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -24,4 +24,12 @@ app.conf.beat_schedule = {
         "schedule": crontab(minute=59),  # har soat boshida
         "args": (6,),
     },
+    "prune-geocode-cache-daily": {
+        "task": "bot_app.tasks.geocode_tasks.prune_geocode_cache",
+        "schedule": crontab(hour=3, minute=30),  # har kuni 03:30 da
+    },
+    "warm-city-geocode-cache": {
+        "task": "bot_app.tasks.geocode_tasks.warm_city_geocode_cache",
+        "schedule": crontab(hour="*/6", minute=15),  # har 6 soatda
+    },
 }
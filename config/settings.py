@@ -81,6 +81,26 @@ CORS_ALLOW_HEADERS = [
 CELERY_BROKER_URL = env.CELERY_BROKER_URL
 CELERY_RESULT_BACKEND = env.CELERY_RESULT_BACKEND
 
+# location service settings (defaults: bot_app/utils/location_settings.py)
+LOCATION_SERVICE = {
+    # "snapshot" - shaharlar DB koordinatalaridan, "nominatim" - eski rejim
+    'CITY_LOCATOR': 'snapshot',
+    'CITY_SNAPSHOT_MAX_AGE': 300,
+    'CITY_INDEX_CELL_DEG': 0.25,
+    'NOMINATIM_URL': env.NOMINATIM_URL,
+    'NOMINATIM_POOL_LIMIT': 20,
+    'NOMINATIM_POOL_LIMIT_PER_HOST': 10,
+    'NOMINATIM_TIMEOUT': 10,
+    'NOMINATIM_CONNECT_TIMEOUT': 3,
+    'SINGLE_FLIGHT_REDIS': bool(env.REDIS_PUBLIC_URL),
+    'NOMINATIM_RATE_LIMIT': 1.0,
+    'NOMINATIM_WAIT_DEADLINE': 2.0,
+    'GEOCODE_FORWARD_TTL': 30 * 24 * 3600,
+    'GEOCODE_REVERSE_TTL': 7 * 24 * 3600,
+    'PLACE_GEOHASH_PRECISION': 6,
+    'BOUNDARIES_GEOJSON': env.BOUNDARIES_GEOJSON,
+}
+
 # middleware
 MIDDLEWARE = CORS_HEADERS + [
     'django.middleware.security.SecurityMiddleware',
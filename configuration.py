@@ -39,6 +39,12 @@ class EventSettings(BaseSettings):
 
     ENCRYPTION_KEY: Optional[str] = None
 
+    # tuman/viloyat chegaralari (GeoJSON), offline reverse geocoding uchun
+    BOUNDARIES_GEOJSON: Optional[str] = None
+
+    # Nominatim server (o'z serverimiz bo'lsa)
+    NOMINATIM_URL: str = "https://nominatim.openstreetmap.org"
+
     class Config:
         env_file = ".env"
 